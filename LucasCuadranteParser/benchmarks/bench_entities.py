@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de extract_entities_from_day_blocks sobre un día sintético con
+muchos empleados (cuadrantes multi-centro).
+
+Con --days D --workers N compara, para un documento de D días, la extracción
+secuencial con la repartida en N procesos (para ajustar PARALLEL_MIN_BLOCKS).
+
+Uso: python benchmarks/bench_entities.py [--employees 100 500 2000] [--repeat 3]
+     python benchmarks/bench_entities.py --days 31 91 365 --employees 50 --workers 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline.entities import extract_entities_from_day_blocks
+from pipeline.segment import segment_by_days
+from synthetic import generate_text, synthetic_month_text
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _compare_workers(days_list, employees_list, workers: int, repeat: int) -> None:
+    for days in days_list:
+        for n in employees_list:
+            blocks, _info = segment_by_days(generate_text(days=days, employees=n))
+            seq = _best(lambda: extract_entities_from_day_blocks(blocks, year_from_week=2026), repeat)
+            # PARALLEL_MIN_BLOCKS no aplica aquí: se fuerza el reparto para medirlo
+            import pipeline.entities as entities
+            saved, entities.PARALLEL_MIN_BLOCKS = entities.PARALLEL_MIN_BLOCKS, 0
+            try:
+                par = _best(lambda: extract_entities_from_day_blocks(
+                    blocks, year_from_week=2026, workers=workers), repeat)
+            finally:
+                entities.PARALLEL_MIN_BLOCKS = saved
+            print(f"{days:4d} días x {n:5d} empl.: secuencial {seq * 1000:8.1f} ms, "
+                  f"{workers} procesos {par * 1000:8.1f} ms ({seq / par:4.2f}x)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark de extract_entities_from_day_blocks")
+    parser.add_argument("--employees", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--days", type=int, nargs="+", help="Documentos de D días (con --workers)")
+    parser.add_argument("--workers", type=int, default=0, help="Comparar secuencial con N procesos")
+    args = parser.parse_args()
+
+    if args.workers:
+        _compare_workers(args.days or [31, 91, 365], args.employees, args.workers, args.repeat)
+        return 0
+
+    for n in args.employees:
+        blocks, _info = segment_by_days(synthetic_month_text(days=1, employees=n))
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            days = extract_entities_from_day_blocks(blocks, year_from_week=2026)
+            best = min(best, time.perf_counter() - t0)
+        print(f"{n:5d} empleados: {len(days[0].shifts):5d} turnos, mejor de {args.repeat}: {best * 1000:8.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
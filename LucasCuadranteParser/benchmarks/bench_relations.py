@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de la agregación por ventanas de turno (relations.apply_shift_rules)
+sobre un histórico sintético: un mes parseado una vez y repetido N veces.
+
+Compara día a día (apply_shift_rules) con el cálculo en bloque
+(apply_shift_rules_batch) en Python puro y con NumPy (si está instalado).
+
+Uso: python benchmarks/bench_relations.py [--months 1 12 36] [--employees 100] [--repeat 3]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline import windows
+from pipeline.entities import extract_entities_from_day_blocks
+from pipeline.relations import apply_shift_rules, apply_shift_rules_batch
+from pipeline.segment import segment_by_days
+from synthetic import synthetic_month_text
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark de apply_shift_rules")
+    parser.add_argument("--months", type=int, nargs="+", default=[1, 12, 36])
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    blocks, _info = segment_by_days(synthetic_month_text(days=31, employees=args.employees))
+    month = extract_entities_from_day_blocks(blocks, year_from_week=2026)
+    for n in args.months:
+        days = month * n
+        n_shifts = sum(len(d.shifts) for d in days)
+        per_day = _best(lambda: [apply_shift_rules(d) for d in days], args.repeat)
+        batch_py = _best(lambda: apply_shift_rules_batch(days, use_numpy=False), args.repeat)
+        line = (f"{len(days):6d} días, {n_shifts:8d} turnos: día a día {per_day * 1000:9.2f} ms, "
+                f"bloque Python {batch_py * 1000:9.2f} ms")
+        if windows.np is not None:
+            batch_np = _best(lambda: apply_shift_rules_batch(days, use_numpy=True), args.repeat)
+            line += f", bloque NumPy {batch_np * 1000:9.2f} ms"
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
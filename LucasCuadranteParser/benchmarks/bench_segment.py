@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark de segment_by_days sobre un texto sintético de un mes (benchmarks/synthetic.py).
+
+Uso: python benchmarks/bench_segment.py [--days 31] [--employees 40] [--repeat 5]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline.segment import segment_by_days
+from synthetic import synthetic_month_text
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark de segment_by_days")
+    parser.add_argument("--days", type=int, default=31)
+    parser.add_argument("--employees", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    text = synthetic_month_text(args.days, args.employees)
+    n_lines = text.count("\n") + 1
+    best = float("inf")
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        blocks, _info = segment_by_days(text)
+        best = min(best, time.perf_counter() - t0)
+    assert len(blocks) == args.days, len(blocks)
+    print(f"segment_by_days: {n_lines} líneas, {len(text) / 1e6:.2f} MB, {len(blocks)} días")
+    print(f"  mejor de {args.repeat}: {best * 1000:.2f} ms  ->  {n_lines / best / 1e6:.2f} M líneas/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
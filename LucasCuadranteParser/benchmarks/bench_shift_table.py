@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Memoria por turno y velocidad de agregación: lista de ParsedShift frente a ShiftTable.
+
+Memoria (tracemalloc, sin contar los textos de puestos/nombres, compartidos en todos
+los casos): dataclass normal con __dict__ (como era ParsedShift antes), ParsedShift
+actual (slots) y columnas de ShiftTable. Velocidad: to_lucas_week sobre la lista de
+DayEntities y sobre el ShiftTable (Python puro y NumPy si está instalado).
+
+Uso: python benchmarks/bench_shift_table.py [--months 12] [--employees 100] [--repeat 3]
+"""
+
+import argparse
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+from typing import Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline import windows
+from pipeline.entities import ParsedShift
+from pipeline.normalize import to_lucas_week
+from pipeline.relations import apply_shift_rules_batch
+from pipeline.runner import extract_entities_from_text
+from pipeline.table import ShiftTable
+from synthetic import synthetic_month_text
+
+
+@dataclass
+class _DictShift:
+    """Mismos campos que ParsedShift, sin slots (referencia de memoria)."""
+    role: str
+    start_h: int
+    start_m: int
+    end_h: int
+    end_m: int
+    crosses_midnight: bool = False
+    is_rest_or_absence: bool = False
+    is_other_establishment: bool = False
+    duration_hours: Optional[float] = None
+    employee_name: Optional[str] = None
+    max_hours_cap: Optional[float] = None
+
+
+def _allocated(build) -> tuple:
+    """(objeto construido, bytes que siguen reservados tras construirlo)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Memoria y velocidad: ParsedShift vs ShiftTable")
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    month = extract_entities_from_text(synthetic_month_text(days=31, employees=args.employees))
+    days = month * args.months
+    shifts = [ps for d in days for ps in d.shifts]
+    n = len(shifts)
+    rows = [astuple(ps) for ps in shifts]
+    names = [f.name for f in fields(ParsedShift)]
+
+    _objs, dict_bytes = _allocated(lambda: [_DictShift(*r) for r in rows])
+    del _objs
+    _objs, slot_bytes = _allocated(lambda: [ParsedShift(*r) for r in rows])
+    del _objs
+    table, table_bytes = _allocated(lambda: ShiftTable.from_day_entities(days))
+    print(f"{len(days)} días, {n} turnos ({len(names)} campos por turno)")
+    print(f"  memoria/turno: dataclass {dict_bytes / n:6.1f} B, slots {slot_bytes / n:6.1f} B, "
+          f"ShiftTable {table_bytes / n:6.1f} B (columnas: {table.nbytes() / n:.1f} B)")
+
+    t_list = _best(lambda: to_lucas_week(days), args.repeat)
+    t_table = _best(lambda: to_lucas_week(table), args.repeat)
+    print(f"  to_lucas_week: lista {n / t_list / 1e6:5.2f} M turnos/s, ShiftTable {n / t_table / 1e6:5.2f} M turnos/s")
+    engines = [False, True] if windows.np is not None else [False]
+    for use_numpy in engines:
+        agg_list = _best(lambda: apply_shift_rules_batch(days, use_numpy=use_numpy), args.repeat)
+        agg_table = _best(lambda: apply_shift_rules_batch(table, use_numpy=use_numpy), args.repeat)
+        print(f"  apply_shift_rules_batch ({'NumPy' if use_numpy else 'Python'}): "
+              f"lista {n / agg_list / 1e6:5.2f} M turnos/s, ShiftTable {n / agg_table / 1e6:5.2f} M turnos/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+Arnés diferencial: cada motor candidato frente al motor de referencia congelado
+(benchmarks/reference/), sobre cuadrantes de texto aleatorios.
+
+generate_case(seed) genera un cuadrante con lo que más fácilmente se rompe al optimizar
+segment_by_days, extract_entities_from_day_blocks o apply_shift_rules:
+- turnos partidos y turnos que cruzan la medianoche ("20:00 - 01:30"), en cuartos de hora;
+- "Ausencia injustificada XXhYY" (tope de horas) y descansos / ausencias;
+- filas de otro establecimiento (" - CENTRIC", " - MOLINA", con o sin horario en la línea);
+- nombres de día mal codificados (Mircoles, Mi\\ufffdrcoles, Sbado...), semanas que cruzan
+  de mes o de año, totales que no cuadran con el horario y leyendas presentes o recortadas.
+
+Cada caso se parsea con la referencia y con cada motor; de cada motor se informa la
+primera diferencia (caso, día, turno y campo) y la aceleración frente a la referencia
+(suma de tiempos de todos los casos). Motores: ENGINES o "modulo:funcion" (texto -> días
+formato Lucas).
+
+Uso:
+    python benchmarks/differential.py [--cases 200] [--seed 0] [--engine pipeline --engine tabla]
+    python benchmarks/differential.py --engine mi_modulo:parse_text --text semana.txt
+Termina con código 1 si algún motor difiere de la referencia.
+"""
+
+import argparse
+import importlib
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import reference
+from synthetic import DAY_NAMES, HOURS_ROW, MONTHS, PUESTOS, _FIRST, _LAST, _ROLES_COCINA, _ROLES_SALA
+from pipeline import entities, relations
+from pipeline.normalize import to_lucas_day, to_lucas_week
+from pipeline.runner import extract_entities_from_text, iter_lines_days, parse_text
+from pipeline.table import ShiftTable
+
+Engine = Callable[[str], List[dict]]
+
+# Variantes de los nombres con tilde tal como salen de algunos PDF
+_MANGLED = {
+    "Miércoles": ["Miércoles", "Miercoles", "Mircoles", "Mi�rcoles", "Mi?rcoles"],
+    "Sábado": ["Sábado", "Sabado", "Sbado", "S�bado"],
+}
+_RESTS = [("Descanso semanal", "(8h)"), ("Abs", "(8h)"), ("Descanso compensatorio", ""),
+          ("Recuperación festivo", ""), ("Vacaciones", "")]
+_SITES = ["CENTRIC", "MOLINA"]
+
+
+def _streaming(text: str) -> List[dict]:
+    """iter_lines_days: el pipeline en streaming, línea a línea."""
+    return list(iter_lines_days(text.split("\n")))
+
+
+def _per_day(text: str) -> List[dict]:
+    """to_lucas_day día a día (apply_shift_rules de un día, sin el bloque de to_lucas_week)."""
+    return [to_lucas_day(d) for d in extract_entities_from_text(text)]
+
+
+def _table(text: str) -> List[dict]:
+    """to_lucas_week sobre un ShiftTable (columnas; ventanas con NumPy desde NUMPY_MIN_SHIFTS turnos)."""
+    return to_lucas_week(ShiftTable.from_day_entities(extract_entities_from_text(text)))
+
+
+# Motores candidatos: texto de un cuadrante -> días formato Lucas
+ENGINES: Dict[str, Engine] = {
+    "pipeline": parse_text,
+    "streaming": _streaming,
+    "por-dia": _per_day,
+    "tabla": _table,
+}
+
+
+def _hhmm(minutes: int) -> str:
+    h, m = divmod(minutes % (24 * 60), 60)
+    return f"{h:02d}:{m:02d}"
+
+
+def _total(minutes: int) -> str:
+    return f"{minutes // 60:02d}h{minutes % 60:02d}"
+
+
+def _shift(rng: random.Random, earliest: int = 6 * 60) -> tuple:
+    """(inicio, fin) en minutos, en cuartos de hora; el fin puede pasar de las 24:00."""
+    start = rng.randrange(earliest, 23 * 60 + 46, 15)
+    return start, start + rng.randrange(60, 10 * 60 + 1, 15)
+
+
+def _employee_rows(rng: random.Random, first: str, last: str) -> List[str]:
+    """Las dos líneas de un empleado en un día, con un tipo de fila al azar."""
+    role = rng.choice(_ROLES_SALA if rng.random() < 0.55 else _ROLES_COCINA)
+    roll = rng.random()
+    if roll < 0.15:
+        label, detail = rng.choice(_RESTS)
+        total = _total(rng.randrange(0, 8 * 60 + 1, 6)) if label == "Vacaciones" else "00h00"
+        return [f"{first} {label} {total}", f"{last} {detail}".rstrip()]
+    # Un turno o dos (partido); el segundo empieza después del fin del primero
+    s1, e1 = _shift(rng)
+    ranges = [(s1, e1)]
+    if roll < 0.55 and e1 < 22 * 60:
+        ranges.append(_shift(rng, earliest=min(e1 + rng.randrange(15, 4 * 60, 15), 23 * 60 + 45)))
+    worked = sum(e - s for s, e in ranges)
+    total = _total(worked if rng.random() < 0.9 else rng.randrange(0, 12 * 60, 6))
+    hours = " ".join(f"{_hhmm(s)} - {_hhmm(e)}" for s, e in ranges)
+    if roll < 0.25:
+        return [f"{first} {role} Ausencia injustificada {_total(rng.randrange(30, 8 * 60 + 1, 30))}",
+                f"{last} {hours}"]
+    if roll < 0.35:
+        site = rng.choice(_SITES)
+        if rng.random() < 0.5:
+            return [f"{first} {role} - {site} {hours}", f"{last} {total}"]
+        return [f"{first} {role} - {site} {total}", f"{last} {hours}"]
+    roles = " ".join([role] * len(ranges))
+    return [f"{first} {roles} {total}", f"{last} {hours}"]
+
+
+def generate_case(seed: int, max_days: int = 10, max_employees: int = 30) -> str:
+    """Texto de un cuadrante aleatorio (determinista con la misma semilla)."""
+    rng = random.Random(seed)
+    start = date(rng.choice([2024, 2025, 2026]), 1, 1) + timedelta(days=rng.randrange(365))
+    n_days = rng.randint(1, max_days)
+    staff = [(rng.choice(_FIRST), rng.choice(_LAST)) for _ in range(rng.randint(1, max_employees))]
+    cropped = rng.random() < 0.5  # texto recortado a la tabla (sin cabecera de documento ni leyendas)
+    lines: List[str] = []
+    for d in range(n_days):
+        day = start + timedelta(days=d)
+        week_start = day - timedelta(days=day.weekday())
+        week = f"Horarios de BETLEM del {week_start:%d/%m/%Y} al {week_start + timedelta(days=6):%d/%m/%Y}"
+        if cropped:
+            lines.append(week)
+        else:
+            lines += ["Descargue la aplicación", f"Imprimir fecha : {week} escaneando este código QR", "Notas"]
+        name = DAY_NAMES[day.weekday()]
+        name = rng.choice(_MANGLED.get(name, [name]))
+        lines.append(f"{name} {day.day} {MONTHS[day.month - 1]} {HOURS_ROW}")
+        for first, last in rng.sample(staff, rng.randint(1, len(staff))):
+            lines += _employee_rows(rng, first, last)
+        if rng.random() < 0.5:
+            lines.append("Sin asignar -")
+        lines.append("Total empleados " + " ".join(str(rng.randint(0, 4)) for _ in range(96)))
+        if not cropped:
+            lines += [PUESTOS, "Equipos:", "sala,cocina,Operativo", f"-- {d + 1} of {n_days}"]
+    return "\n".join(lines)
+
+
+@dataclass
+class Divergence:
+    """Primera diferencia de un motor frente a la referencia en un caso."""
+    case: str
+    date: Optional[str] = None
+    shift: Optional[str] = None
+    field: Optional[str] = None
+    expected: object = None
+    got: object = None
+
+    def __str__(self) -> str:
+        where = " ".join(x for x in (self.case, self.date, self.shift) if x)
+        return f"{where}: {self.field} referencia={self.expected!r} motor={self.got!r}"
+
+
+def first_divergence(case: str, expected: List[dict], got: List[dict]) -> Optional[Divergence]:
+    """Primer día / turno / campo en que got difiere de expected (None si son iguales)."""
+    for e, g in zip(expected, got):
+        if e == g:
+            continue
+        if e["date"] != g["date"]:
+            return Divergence(case, e["date"], field="date", expected=e["date"], got=g["date"])
+        for key in ("total_hours_worked", "total_revenue"):
+            if e[key] != g[key]:
+                return Divergence(case, e["date"], field=key, expected=e[key], got=g[key])
+        for se, sg in zip(e["shifts"], g["shifts"]):
+            if se != sg:
+                key = next((k for k in se if se[k] != sg.get(k)), "shift")
+                return Divergence(case, e["date"], se["shift_name"], key, se.get(key), sg.get(key))
+        return Divergence(case, e["date"], field="shifts", expected=len(e["shifts"]), got=len(g["shifts"]))
+    if len(expected) != len(got):
+        extra = (expected if len(expected) > len(got) else got)[min(len(expected), len(got))]
+        return Divergence(case, extra["date"], field="días", expected=len(expected), got=len(got))
+    return None
+
+
+def _timed(fn: Engine, text: str) -> tuple:
+    t0 = time.perf_counter()
+    try:
+        result = fn(text)
+    except Exception as e:
+        result = e
+    return result, time.perf_counter() - t0
+
+
+def _clear_caches() -> None:
+    """
+    Vacía las lru_cache de pipeline (clasificación de líneas y roles): todos los motores
+    comparten esas cachés y, con los mismos textos, el primero las llenaría para los demás.
+    """
+    for module in (entities, relations):
+        for obj in vars(module).values():
+            if hasattr(obj, "cache_clear"):
+                obj.cache_clear()
+
+
+def run_differential(
+    cases: Sequence[tuple],
+    engines: Optional[Dict[str, Engine]] = None,
+    reference_engine: Engine = reference.parse_text,
+) -> dict:
+    """
+    cases: pares (nombre, texto). Devuelve, por motor, el tiempo total, la aceleración
+    frente a la referencia y la primera diferencia de cada caso que difiere (las
+    excepciones del motor cuentan como diferencia en el campo "excepción").
+    Cada motor recorre todos los casos seguidos, con las cachés de pipeline vacías al
+    empezar: dentro de la pasada se calientan de un caso a otro, como en --serve o un lote.
+    """
+    engines = ENGINES if engines is None else engines
+    expected = []
+    ref_s = 0.0
+    for case, text in cases:
+        result, elapsed = _timed(reference_engine, text)
+        if isinstance(result, Exception):
+            raise RuntimeError(f"la referencia falla en {case}: {result}") from result
+        expected.append(result)
+        ref_s += elapsed
+    report = {}
+    for name, fn in engines.items():
+        if cases:  # primera llamada fuera de la medida (regex, importaciones perezosas)
+            _timed(fn, cases[0][1])
+        _clear_caches()
+        seconds = 0.0
+        divergences = []
+        for (case, text), ref_days in zip(cases, expected):
+            got, elapsed = _timed(fn, text)
+            seconds += elapsed
+            if isinstance(got, Exception):
+                div = Divergence(case, field="excepción", got=f"{type(got).__name__}: {got}")
+            else:
+                div = first_divergence(case, ref_days, got)
+            if div is not None:
+                divergences.append(div)
+        report[name] = {
+            "seconds": seconds,
+            "speedup": ref_s / seconds if seconds > 0 else float("inf"),
+            "divergences": divergences,
+        }
+    return {"cases": len(cases), "reference_seconds": ref_s, "engines": report}
+
+
+def random_cases(n: int, seed: int = 0, max_days: int = 10, max_employees: int = 30) -> List[tuple]:
+    """n casos ("semilla N", texto) con semillas consecutivas desde seed."""
+    return [(f"semilla {s}", generate_case(s, max_days, max_employees)) for s in range(seed, seed + n)]
+
+
+def _load_engine(spec: str) -> Engine:
+    if spec in ENGINES:
+        return ENGINES[spec]
+    if ":" not in spec:
+        raise argparse.ArgumentTypeError(f"motor desconocido: {spec} (usar {', '.join(ENGINES)} o modulo:funcion)")
+    module, attr = spec.split(":", 1)
+    return getattr(importlib.import_module(module), attr)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Motores candidatos frente al motor de referencia congelado")
+    parser.add_argument("--cases", type=int, default=200, help="Casos aleatorios (0 = solo --text)")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del primer caso")
+    parser.add_argument("--max-days", type=int, default=10)
+    parser.add_argument("--max-employees", type=int, default=30)
+    parser.add_argument("--engine", action="append", metavar="NOMBRE",
+                        help=f"Motor a comparar ({', '.join(ENGINES)} o modulo:funcion; por defecto todos)")
+    parser.add_argument("--text", action="append", default=[], metavar="FICHERO",
+                        help="Texto ya extraído de un cuadrante real, como caso adicional")
+    parser.add_argument("--output", metavar="JSON", help="Guardar el informe en JSON")
+    args = parser.parse_args()
+
+    engines = {name: _load_engine(name) for name in args.engine} if args.engine else ENGINES
+    cases = random_cases(args.cases, args.seed, args.max_days, args.max_employees)
+    cases += [(Path(p).name, Path(p).read_text(encoding="utf-8")) for p in args.text]
+    report = run_differential(cases, engines)
+
+    print(f"{report['cases']} casos; referencia {report['reference_seconds'] * 1000:.1f} ms")
+    for name, res in report["engines"].items():
+        divs = res["divergences"]
+        status = "OK" if not divs else f"{len(divs)} casos distintos"
+        print(f"  {name:<12} {res['seconds'] * 1000:9.1f} ms  x{res['speedup']:.2f}  {status}")
+        if divs:
+            print(f"    primera: {divs[0]}")
+    if args.output:
+        out = {**report, "engines": {
+            name: {**res, "divergences": [asdict(d) for d in res["divergences"]]}
+            for name, res in report["engines"].items()
+        }}
+        Path(args.output).write_text(json.dumps(out, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    return 1 if any(res["divergences"] for res in report["engines"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
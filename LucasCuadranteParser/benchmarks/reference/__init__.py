@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de referencia congelado para el arnés diferencial (benchmarks/differential.py).
+
+segment.py, entities.py, relations.py y normalize.py son copias literales de los módulos
+de pipeline/ anteriores a las optimizaciones: lectura línea a línea, búsquedas hacia
+atrás y ventanas de turno día a día en Python puro. Dan el mismo formato Lucas que el
+pipeline actual en los 15 PDF de documentacion/. No se editan ni se optimizan: un cambio
+de reglas que deba cambiar el resultado se hace en pipeline/ y se copia aquí a mano, a
+la vista en el diff. Solo dependen de config (ventanas, umbral y mapa sala/cocina).
+"""
+
+from typing import List
+
+from .entities import DayEntities, extract_entities_from_day_blocks
+from .normalize import to_lucas_week
+from .segment import segment_by_days
+
+
+def extract_entities_from_text(text: str) -> List[DayEntities]:
+    """Texto de un cuadrante -> DayEntities por día, como runner.extract_entities_from_text."""
+    day_blocks, info = segment_by_days(text)
+    if not day_blocks:
+        return []
+    year_from_week = None
+    if info.get("week_start_dd_mm_yyyy"):
+        _, _, year_from_week = info["week_start_dd_mm_yyyy"]
+    return extract_entities_from_day_blocks(day_blocks, year_from_week=year_from_week)
+
+
+def parse_text(text: str) -> List[dict]:
+    """Texto de un cuadrante -> días formato Lucas, como runner.parse_text."""
+    return to_lucas_week(extract_entities_from_text(text))
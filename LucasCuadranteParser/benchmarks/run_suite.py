@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Suite de benchmarks del parser sobre cuadrantes sintéticos (benchmarks/synthetic.py).
+
+Para cada escenario (días x empleados) mide cada etapa: segment_by_days,
+extract_entities_from_day_blocks, apply_shift_rules (día a día), to_lucas_week,
+parse_text (texto -> JSON, de punta a punta) y, si se pide --pdf, main.py completo
+sobre un PDF generado (proceso aparte: arranque + pdfplumber + escritura).
+
+Los resultados (mejor y mediana de --repeat ejecuciones, en ms) se guardan en JSON.
+Con --baseline se comparan con una ejecución anterior y el proceso termina con código 1
+si alguna etapa es más lenta que la base en más de --threshold (ej. 0.25 = +25 %) y en
+más de --min-delta-ms (para ignorar ruido en etapas de microsegundos).
+
+Uso:
+    python benchmarks/run_suite.py --output base.json
+    python benchmarks/run_suite.py --baseline base.json --threshold 0.25
+    python benchmarks/run_suite.py --full --pdf           (incluye 1 año x 500 empleados y main.py)
+    python benchmarks/run_suite.py --scenario prueba:14:60
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config
+from synthetic import generate_pages, write_pdf
+from pipeline import windows
+from pipeline.entities import extract_entities_from_day_blocks
+from pipeline.normalize import to_lucas_week
+from pipeline.relations import apply_shift_rules
+from pipeline.runner import parse_text
+from pipeline.segment import segment_by_days
+
+# (nombre, días, empleados, medir main.py sobre PDF)
+QUICK_SCENARIOS = [
+    ("semana-10", 7, 10, True),
+    ("semana-100", 7, 100, True),
+    ("mes-100", 31, 100, True),
+    ("trimestre-200", 91, 200, False),
+]
+FULL_SCENARIOS = QUICK_SCENARIOS + [
+    ("anio-50", 365, 50, False),
+    ("anio-500", 365, 500, False),
+]
+DEFAULT_OUTPUT = Path(__file__).resolve().parent / "resultados" / "ultimo.json"
+
+
+def _measure(fn: Callable[[], object], repeat: int, warmup: bool = True) -> Dict[str, float]:
+    if warmup:  # primera llamada fuera de la medida (cachés de regex/roles, asignación inicial)
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return {"best_ms": round(min(times), 3), "median_ms": round(statistics.median(times), 3)}
+
+
+def run_scenario(days: int, employees: int, repeat: int, with_pdf: bool) -> dict:
+    """Genera el cuadrante del escenario y mide cada etapa."""
+    pages = generate_pages(days=days, employees=employees)
+    text = "\n".join("\n".join(p) for p in pages)
+    blocks, info = segment_by_days(text)
+    year = info["week_start_dd_mm_yyyy"][2]
+    day_entities = extract_entities_from_day_blocks(blocks, year_from_week=year)
+
+    stages = {
+        "segment_by_days": _measure(lambda: segment_by_days(text), repeat),
+        "extract_entities_from_day_blocks": _measure(
+            lambda: extract_entities_from_day_blocks(blocks, year_from_week=year), repeat
+        ),
+        "apply_shift_rules": _measure(lambda: [apply_shift_rules(d) for d in day_entities], repeat),
+        "to_lucas_week": _measure(lambda: to_lucas_week(day_entities), repeat),
+        "parse_text": _measure(lambda: parse_text(text), repeat),
+    }
+    if with_pdf:
+        stages["main_pdf"] = _measure_main(pages, max(1, min(repeat, 3)))
+    return {
+        "days": days,
+        "employees": employees,
+        "lines": text.count("\n") + 1,
+        "shifts": sum(len(d.shifts) for d in day_entities),
+        "stages": stages,
+    }
+
+
+def _measure_main(pages: List[List[str]], repeat: int) -> Dict[str, float]:
+    """main.py completo (sin caché) sobre el PDF generado, en un proceso aparte."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = write_pdf(Path(tmp) / "cuadrante.pdf", pages)
+        cmd = [sys.executable, str(ROOT / "main.py"), str(pdf), "--no-cache", "--no-entities",
+               "--output-dir", str(Path(tmp) / "out")]
+
+        def run() -> None:
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, cwd=str(ROOT))
+
+        return _measure(run, repeat, warmup=False)
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[Tuple]:
+    """
+    Filas (escenario, etapa, base ms, actual ms, ratio, regresión) de las etapas presentes
+    en ambas ejecuciones, comparando el mejor tiempo.
+    """
+    rows = []
+    for name, scen in current["scenarios"].items():
+        base_scen = baseline.get("scenarios", {}).get(name)
+        if not base_scen:
+            continue
+        for stage, cur in scen["stages"].items():
+            base = base_scen["stages"].get(stage)
+            if not base:
+                continue
+            b, c = base["best_ms"], cur["best_ms"]
+            ratio = c / b if b > 0 else float("inf")
+            regressed = ratio > 1 + threshold and c - b > min_delta_ms
+            rows.append((name, stage, b, c, ratio, regressed))
+    return rows
+
+
+def _parse_scenario(spec: str) -> Tuple[str, int, int, bool]:
+    """'nombre:días:empleados[:pdf]' -> tupla de escenario."""
+    parts = spec.split(":")
+    if len(parts) not in (3, 4):
+        raise argparse.ArgumentTypeError("formato: nombre:días:empleados[:pdf]")
+    return parts[0], int(parts[1]), int(parts[2]), len(parts) == 4 and parts[3] == "pdf"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Suite de benchmarks del parser (cuadrantes sintéticos)")
+    parser.add_argument("--full", action="store_true", help="Incluir escenarios de 1 año (50 y 500 empleados)")
+    parser.add_argument("--scenario", type=_parse_scenario, action="append",
+                        help="Escenario propio nombre:días:empleados[:pdf] (repetible; sustituye a los de serie)")
+    parser.add_argument("--pdf", action="store_true", help="Medir también main.py sobre un PDF generado")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", "-o", default=str(DEFAULT_OUTPUT), help="Fichero JSON de resultados")
+    parser.add_argument("--baseline", help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Regresión si actual > base * (1 + threshold)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Diferencias menores se ignoran (ruido)")
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenario or (FULL_SCENARIOS if args.full else QUICK_SCENARIOS)
+    result = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parser_version": config.PARSER_VERSION,
+            "numpy": windows.np is not None,
+            "repeat": args.repeat,
+        },
+        "scenarios": {},
+    }
+    for name, days, employees, pdf in scenarios:
+        scen = run_scenario(days, employees, args.repeat, with_pdf=args.pdf and pdf)
+        result["scenarios"][name] = scen
+        stages = ", ".join(f"{k} {v['best_ms']:.1f}" for k, v in scen["stages"].items())
+        print(f"{name:15s} {days:4d} días x {employees:4d} empl. ({scen['shifts']} turnos): {stages} ms")
+
+    out = Path(args.output)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Resultados guardados: {out}")
+
+    if not args.baseline:
+        return 0
+    baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    rows = compare(result, baseline, args.threshold, args.min_delta_ms)
+    if not rows:
+        print("La base no tiene escenarios/etapas en común con esta ejecución.")
+        return 0
+    print(f"\n{'escenario':15s} {'etapa':34s} {'base ms':>10s} {'actual ms':>10s} {'ratio':>7s}")
+    for name, stage, b, c, ratio, regressed in rows:
+        flag = "  REGRESIÓN" if regressed else ""
+        print(f"{name:15s} {stage:34s} {b:10.2f} {c:10.2f} {ratio:7.2f}{flag}")
+    n_bad = sum(1 for r in rows if r[5])
+    if n_bad:
+        print(f"\n{n_bad} etapas más lentas que la base (umbral +{args.threshold:.0%}).")
+        return 1
+    print(f"\nSin regresiones (umbral +{args.threshold:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Generadores de cuadrantes sintéticos con la forma de los PDF BETLEM, para benchmarks.
+
+- generate_text(): texto como el que devuelve ingest (cabecera de semana por página,
+  cabecera de día, filas nombre/apellidos con puesto y horario, pie con totales).
+  Mezcla turnos simples y partidos, descansos, ausencias (Abs, vacaciones, ausencia
+  injustificada con tope) y filas de otros establecimientos (" - MOLINA"). Determinista
+  con la misma semilla.
+- write_pdf(): escribe un PDF mínimo (sin dependencias: Helvetica, WinAnsi) con una
+  página por día, para medir también la extracción de texto con pdfplumber.
+
+Uso: python benchmarks/synthetic.py --days 7 --employees 40 [--pdf semana.pdf] [--text semana.txt]
+"""
+
+import argparse
+import random
+import sys
+import zlib
+from datetime import date, timedelta
+from pathlib import Path
+from typing import List, Union
+
+DAY_NAMES = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+MONTHS = ["enero", "febrero", "marzo", "abril", "mayo", "junio",
+          "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
+HOURS_ROW = " ".join(f"{h}h" for h in range(24)) + " Total Firma"
+PUESTOS = "Puestos: Camarero… Chef Oper… Cocinero/a Jefe de co… Manager Segundo … Supervisor Ausencias Otros est…"
+
+_FIRST = ["Guillermo", "Leonel Pablo", "Jose", "Santiago Adolfo", "Rosario", "Ivan", "Mizan", "Alicia",
+          "Ana Belen", "Carlos", "Lucia", "Pablo", "Nuria", "Hugo", "Irene", "Oscar", "Paula", "Raul"]
+_LAST = ["DEO MARTÍN", "VITALE", "GARCIA DE LA VEGA", "MEJIA PALACIO", "RODAS SERVELLON", "PELEGRINA",
+         "SHEK", "SORIANO", "LOPEZ RUIZ", "NAVARRO", "IBAÑEZ", "CASTRO", "GIL", "PEREZ ORTEGA"]
+_ROLES_SALA = ["Camarero/a", "Jefe de sala", "Segundo de sala", "Manager", "Supervisor"]
+_ROLES_COCINA = ["Cocinero/a", "Jefe de cocina", "Segundo de cocina", "Chef Operativo"]
+_OTHER_SITES = ["MOLINA", "CENTRIC"]
+# Turnos simples y partidos más habituales: (inicio, fin) en minutos
+_SINGLE = [(10 * 60, 16 * 60), (12 * 60, 16 * 60), (16 * 60, 24 * 60), (14 * 60, 22 * 60), (19 * 60, 25 * 60)]
+_SPLIT = [((11 * 60 + 30, 16 * 60), (19 * 60, 21 * 60 + 43)), ((12 * 60, 16 * 60), (20 * 60, 24 * 60)),
+          ((10 * 60 + 30, 16 * 60), (20 * 60, 24 * 60)), ((13 * 60, 16 * 60), (20 * 60, 25 * 60))]
+
+
+def _hhmm(minutes: int) -> str:
+    h, m = divmod(minutes % (24 * 60), 60)
+    return f"{h:02d}:{m:02d}"
+
+
+def _total(minutes: int) -> str:
+    return f"{minutes // 60:02d}h{minutes % 60:02d}"
+
+
+def _employee_rows(rng: random.Random, first: str, last: str) -> List[str]:
+    """Las dos líneas (nombre + puesto/total, apellidos + horario) de un empleado en un día."""
+    roll = rng.random()
+    role = rng.choice(_ROLES_SALA if rng.random() < 0.55 else _ROLES_COCINA)
+    if roll < 0.12:
+        return [f"{first} Descanso semanal 00h00", f"{last} (8h)"]
+    if roll < 0.16:
+        return [f"{first} Abs 00h00", f"{last} (8h)"]
+    if roll < 0.20:
+        return [f"{first} Vacaciones 05h42", last]
+    if roll < 0.24:
+        site = rng.choice(_OTHER_SITES)
+        s, e = rng.choice(_SINGLE)
+        return [f"{first} {role} - {site} {_total(e - s)}", f"{last} {_hhmm(s)} - {_hhmm(e)}"]
+    if roll < 0.27:
+        (s1, e1), (s2, e2) = rng.choice(_SPLIT)
+        cap = rng.choice([5 * 60 + 30, 4 * 60])
+        return [f"{first} {role} Ausencia injustificada {_total(cap)}",
+                f"{last} {_hhmm(s1)} - {_hhmm(e1)} {_hhmm(s2)} - {_hhmm(e2)}"]
+    if roll < 0.60:
+        (s1, e1), (s2, e2) = rng.choice(_SPLIT)
+        return [f"{first} {role} {role} {_total(e1 - s1 + e2 - s2)}",
+                f"{last} {_hhmm(s1)} - {_hhmm(e1)} {_hhmm(s2)} - {_hhmm(e2)}"]
+    s, e = rng.choice(_SINGLE)
+    return [f"{first} {role} {_total(e - s)}", f"{last} {_hhmm(s)} - {_hhmm(e)}"]
+
+
+def generate_pages(
+    days: int = 7,
+    employees: int = 40,
+    start: date = date(2026, 3, 2),
+    seed: int = 0,
+) -> List[List[str]]:
+    """Líneas de cada página (una página por día, como los PDF BETLEM)."""
+    rng = random.Random(seed)
+    staff = [
+        (f"{_FIRST[e % len(_FIRST)]}{'' if e < len(_FIRST) else e}", _LAST[(e * 7) % len(_LAST)])
+        for e in range(employees)
+    ]
+    pages: List[List[str]] = []
+    for d in range(days):
+        day = start + timedelta(days=d)
+        week_start = day - timedelta(days=day.weekday())
+        week_end = week_start + timedelta(days=6)
+        lines = [
+            "Descargue la aplicación",
+            f"Imprimir fecha : Horarios de BETLEM del {week_start:%d/%m/%Y} al {week_end:%d/%m/%Y} "
+            "escaneando este código QR",
+            "Notas",
+            f"{DAY_NAMES[day.weekday()]} {day.day} {MONTHS[day.month - 1]} {HOURS_ROW}",
+        ]
+        for first, last in staff:
+            lines.extend(_employee_rows(rng, first, last))
+        lines.append("Sin asignar -")
+        lines.append("Total empleados " + " ".join(str(rng.randint(0, 4)) for _ in range(96)))
+        lines.append(PUESTOS)
+        lines.append("Equipos:")
+        lines.append("sala,cocina,Operativo")
+        lines.append(f"-- {d + 1} of {days}")
+        pages.append(lines)
+    return pages
+
+
+def generate_text(
+    days: int = 7,
+    employees: int = 40,
+    start: date = date(2026, 3, 2),
+    seed: int = 0,
+) -> str:
+    """Texto sintético de `days` días consecutivos desde `start` con `employees` empleados."""
+    return "\n".join("\n".join(page) for page in generate_pages(days, employees, start, seed))
+
+
+def synthetic_month_text(days: int = 31, employees: int = 40) -> str:
+    """Mes sintético (marzo 2026) usado por los micro-benchmarks."""
+    return generate_text(days=days, employees=employees, start=date(2026, 3, 1))
+
+
+def _pdf_escape(line: str) -> bytes:
+    raw = line.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def write_pdf(path: Union[str, Path], pages: List[List[str]], font_size: float = 7.0) -> Path:
+    """
+    Escribe un PDF mínimo: cada página es una lista de líneas en Helvetica (WinAnsi).
+    La altura de página se ajusta al número de líneas (una página por día, sin cortes).
+    """
+    leading = font_size * 1.3
+    objects: List[bytes] = []
+
+    def add(obj: bytes) -> int:
+        objects.append(obj)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    pages_id = add(b"")  # se rellena al final
+    kids = []
+    for lines in pages:
+        height = max(842.0, 40 + leading * len(lines))
+        body = [f"BT /F1 {font_size:g} Tf {leading:g} TL 20 {height - 20:g} Td".encode("ascii")]
+        for line in lines:
+            body.append(b"(" + _pdf_escape(line) + b") '")
+        body.append(b"ET")
+        stream = zlib.compress(b"\n".join(body))
+        content_id = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 900 %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, int(height), content_id, font_id)
+        ))
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for k, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % k + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for off in offsets:
+        out += b"%010d 00000 n \n" % off
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref)
+    path = Path(path)
+    path.write_bytes(bytes(out))
+    return path
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Genera un cuadrante sintético (texto y/o PDF)")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--employees", type=int, default=40)
+    parser.add_argument("--start", default="2026-03-02", help="Primer día (AAAA-MM-DD)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--text", help="Guardar el texto en este fichero")
+    parser.add_argument("--pdf", help="Guardar un PDF (una página por día) en este fichero")
+    args = parser.parse_args()
+
+    pages = generate_pages(args.days, args.employees, date.fromisoformat(args.start), args.seed)
+    if args.text:
+        Path(args.text).write_text("\n".join("\n".join(p) for p in pages), encoding="utf-8")
+    if args.pdf:
+        write_pdf(args.pdf, pages)
+    if not args.text and not args.pdf:
+        sys.stdout.write("\n".join("\n".join(p) for p in pages) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
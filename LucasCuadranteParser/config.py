@@ -4,6 +4,23 @@
 import json
 from datetime import time
 from pathlib import Path
+from typing import Optional
+
+# Versión de la lógica de parseo. Subirla al cambiar reglas de extracción/agregación
+# invalida la caché de resultados (pipeline/cache.py).
+# 1.2: texto recortado a la tabla por defecto (CROP_TO_TABLE); cambia el puesto de algún descanso
+PARSER_VERSION = "1.2"
+
+# Extraer solo el texto de la tabla del cuadrante (sin cabecera del documento ni leyendas
+# "Puestos / Equipos / Empleados" entre días; ver pipeline/region.py). False = página entera
+CROP_TO_TABLE = True
+
+# Límites de la extracción de un PDF (0 = sin límite; ver pipeline/guards.py). Las páginas
+# que no caben se saltan y el resultado queda marcado como parcial
+MAX_PAGES = 0
+MAX_CHARS = 0
+PAGE_TIMEOUT_S = 0.0  # segundos por página
+BUDGET_S = 0.0  # segundos para toda la extracción
 
 # Ventanas de turno por defecto
 # Mediodía: 10:00–16:00 (6 h)
@@ -27,10 +44,14 @@ def _parse_time(s: str) -> time:
     return time(0, 0)
 
 
-def _load_shift_windows() -> dict:
-    """Carga SHIFT_WINDOWS desde shift_windows.json si existe; si no, usa valores por defecto."""
-    base = Path(__file__).resolve().parent
-    json_path = base / "shift_windows.json"
+def load_shift_windows(json_path: Optional[Path] = None) -> dict:
+    """
+    Carga SHIFT_WINDOWS desde json_path (por defecto shift_windows.json junto a este
+    fichero) si existe; si no, usa valores por defecto. Turnos ausentes = por defecto.
+    """
+    if json_path is None:
+        json_path = Path(__file__).resolve().parent / "shift_windows.json"
+    json_path = Path(json_path)
     if not json_path.exists():
         return _DEFAULT_SHIFT_WINDOWS.copy()
     try:
@@ -49,8 +70,6 @@ def _load_shift_windows() -> dict:
     return result
 
 
-SHIFT_WINDOWS = _load_shift_windows()
-
 # Mínimo de horas dentro de la ventana para contar como "trabajó ese turno" (1h30)
 MIN_HOURS_IN_SHIFT = 1.5
 
@@ -98,3 +117,11 @@ NON_WORK_PATTERNS = [
     "ausencia injustificada",
     "ausencia",
 ]
+
+
+def __getattr__(name: str):
+    """SHIFT_WINDOWS se lee de shift_windows.json en el primer acceso, no al importar config."""
+    if name == "SHIFT_WINDOWS":
+        value = globals()["SHIFT_WINDOWS"] = load_shift_windows()
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,29 +2,59 @@
 """
 Punto de entrada: convierte PDF de cuadrante BETLEM en JSON compatible con Lucas.
 Uso: python main.py [ruta_al_PDF] [--output-dir DIR] [--csv]
+     python main.py - --stdout < cuadrante.pdf   (PDF por stdin, JSON por stdout, sin ficheros)
+     python main.py PDF|CARPETA ... --format ndjson|parquet|arrow [--detail]   (histórico; ver pipeline/export.py)
+     python main.py PDF --incremental ESTADO.json   (nueva versión: solo páginas/días cambiados + diff)
+     python main.py PDF|CARPETA|GLOB ... [--jobs N] [--merge]   (lote: un JSON por PDF o uno unido)
+     python main.py --from-text TEXTO.txt [--output-dir DIR]   (texto ya extraído, sin pdfplumber)
+     python main.py PDF|CARPETA ... --validate-backend [--backend pdfium]   (comparar motor con pdfplumber)
+     python main.py --serve [--max-jobs N] [--timeout SEG]   (servidor JSON-lines por stdin/stdout)
+     python main.py reaggregate [--shift-windows F] [--min-hours H] [--role-map F]   (desde entidades guardadas)
+     python main.py PDF ... --db [RUTA]; python main.py query --from FECHA --to FECHA   (histórico SQLite)
 """
 
 import argparse
+import glob
 import json
 import sys
+import time
 from pathlib import Path
+from typing import Optional
 
 # Añadir raíz del proyecto al path
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from pipeline.ingest import extract_text_from_pdf
-from pipeline.segment import segment_by_days
-from pipeline.entities import extract_entities_from_day_blocks
-from pipeline.normalize import to_lucas_week
+import config
+from pipeline.backends import BACKENDS, DEFAULT_BACKEND
+from pipeline.export import COLUMNAR_FORMATS, FORMATS
+# El resto del pipeline se importa en cada _main_*: --help, `query` y un acierto de
+# caché no cargan el parseo (ver tests/test_startup.py)
+
+# Caché de resultados por defecto (ver pipeline/cache.py); --no-cache la desactiva
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "resultados"
+# Entidades por PDF para `main.py reaggregate` (ver pipeline/serialize.py); --no-entities no las guarda
+DEFAULT_ENTITIES_DIR = Path(__file__).resolve().parent / ".cache" / "entidades"
+# Histórico SQLite para `--db` y `main.py query` (ver pipeline/history.py)
+DEFAULT_DB_PATH = Path(__file__).resolve().parent / ".cache" / "historico.sqlite"
+# Código de salida de un resultado parcial (páginas saltadas por los límites; ver
+# pipeline/guards.py): la salida se escribe igual, pero quien llama (la API, con
+# --stdout) lo distingue de un parseo completo sin leer stderr
+EXIT_PARTIAL = 3
 
 
 def main() -> int:
+    if len(sys.argv) > 1 and sys.argv[1] == "reaggregate":
+        return _main_reaggregate(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        return _main_query(sys.argv[2:])
+
     parser = argparse.ArgumentParser(description="Convierte PDF cuadrante BETLEM a JSON Lucas")
     parser.add_argument(
-        "pdf_path",
-        nargs="?",
-        default=None,
-        help="Ruta al PDF (ej. documentacion/horas.pdf)",
+        "pdf_paths",
+        nargs="*",
+        metavar="pdf_path",
+        help="Ruta al PDF (ej. documentacion/horas.pdf; '-' = leer el PDF de stdin). "
+             "Varias rutas, carpetas o patrones glob = modo lote",
     )
     parser.add_argument(
         "--output-dir",
@@ -37,47 +67,546 @@ def main() -> int:
         action="store_true",
         help="Generar además un CSV resumen",
     )
+    parser.add_argument(
+        "--stdout",
+        action="store_true",
+        help="Escribir el JSON en stdout en lugar de en --output-dir (los mensajes van a stderr)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="Formato de salida: json (Lucas), ndjson (un día por línea; con --no-cache y --no-entities "
+             "se escribe según se parsea), parquet o arrow (columnar, una fila por día y turno; "
+             "requiere pyarrow)",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="JSON sin sangría ni espacios (menos bytes; para la API)",
+    )
+    parser.add_argument(
+        "--detail",
+        action="store_true",
+        help="Con --format parquet|arrow: escribir además <salida>.detail.<ext> con una fila por "
+             "turno de empleado (puesto, área, horario, horas por ventana)",
+    )
+    parser.add_argument(
+        "--ingest-workers",
+        type=int,
+        default=1,
+        help="Procesos para extraer el texto por páginas (0 = uno por CPU; 1 = secuencial)",
+    )
+    parser.add_argument(
+        "--entity-workers",
+        type=int,
+        default=1,
+        help="Procesos para extraer las entidades día a día en documentos largos (mes, año; "
+             "0 = uno por CPU). Los cuadrantes semanales siempre en secuencia",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        help=f"Motor de extracción de texto (por defecto {DEFAULT_BACKEND}; si el elegido no está "
+             "instalado o falla, se usa pdfplumber). Ver pipeline/backends.py",
+    )
+    parser.add_argument(
+        "--full-page",
+        action="store_true",
+        help="Extraer el texto de la página entera, sin recortar a la tabla del cuadrante "
+             "(ver pipeline/region.py)",
+    )
+    parser.add_argument(
+        "--max-pages",
+        type=int,
+        help="Leer como mucho N páginas; el resto se salta y el resultado queda marcado como parcial "
+             "(ver pipeline/guards.py)",
+    )
+    parser.add_argument(
+        "--max-chars",
+        type=int,
+        help="Dejar de leer páginas al pasar de N caracteres de texto extraído (resultado parcial)",
+    )
+    parser.add_argument(
+        "--page-timeout",
+        type=float,
+        metavar="SEGUNDOS",
+        help="Tiempo máximo por página; una página más lenta se salta (resultado parcial)",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="SEGUNDOS",
+        help="Tiempo máximo de la extracción de cada PDF; agotado, las páginas que faltan se saltan "
+             "(resultado parcial)",
+    )
+    parser.add_argument(
+        "--validate-backend",
+        action="store_true",
+        help="Comparar --backend (por defecto pdfium) con pdfplumber en los PDFs dados, día a día; "
+             "código 1 si alguno difiere",
+    )
+    parser.add_argument(
+        "--incremental",
+        metavar="ESTADO",
+        help="Re-parseo incremental frente al estado guardado en ESTADO (se crea/actualiza): solo se "
+             "procesan las páginas y días que cambian; escribe además <salida>.diff.json con los días "
+             "añadidos/eliminados/cambiados; con --stdout, {\"days\", \"diff\"} por stdout, sin ficheros "
+             "(ver pipeline/incremental.py)",
+    )
+    parser.add_argument(
+        "--db",
+        nargs="?",
+        const=str(DEFAULT_DB_PATH),
+        metavar="RUTA",
+        help="Guardar además los días y turnos de empleado en el histórico SQLite (por defecto "
+             ".cache/historico.sqlite); una semana guardada de nuevo sustituye a la anterior. "
+             "Consultar con main.py query",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="No leer ni escribir la caché de resultados (fuerza el parseo completo)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help="Carpeta de la caché de resultados (por PDF + configuración)",
+    )
+    parser.add_argument(
+        "--entities-dir",
+        default=str(DEFAULT_ENTITIES_DIR),
+        help="Carpeta donde se guardan las entidades de cada PDF (para main.py reaggregate)",
+    )
+    parser.add_argument(
+        "--no-entities",
+        action="store_true",
+        help="No guardar las entidades del PDF",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=0,
+        help="Modo lote: PDFs en paralelo (procesos; 0 = uno por CPU)",
+    )
+    parser.add_argument(
+        "--merge",
+        action="store_true",
+        help="Modo lote: un solo cuadrante_lucas.json con todos los días (sin fechas repetidas)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Modo servidor: peticiones JSON-lines por stdin, respuestas por stdout (ver server.py)",
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=1,
+        help="Con --serve: PDFs procesados a la vez (procesos worker)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=120.0,
+        help="Con --serve: segundos máximos por PDF si la petición no indica 'timeout' (0 = sin límite)",
+    )
+    parser.add_argument(
+        "--from-text",
+        metavar="FICHERO",
+        help="Parsear un texto ya extraído del PDF (UTF-8) sin cargar la pila PDF ni la caché",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Guardar <salida>.meta.json con tiempos por etapa, páginas, líneas, días, turnos y pico de memoria",
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FICHERO",
+        help="Perfilar la ejecución con cProfile y guardar las estadísticas (pstats / snakeviz) en FICHERO",
+    )
     args = parser.parse_args()
 
-    pdf_path = args.pdf_path
-    if not pdf_path:
-        # Por defecto: documentacion/horas.pdf respecto a la raíz del proyecto
-        base = Path(__file__).resolve().parent
-        pdf_path = base.parent / "documentacion" / "horas.pdf"
-    pdf_path = Path(pdf_path)
-    if not pdf_path.exists():
-        print(f"Error: no se encuentra el PDF: {pdf_path}", file=sys.stderr)
+    if args.profile:
+        return _profiled(_run, args, args.profile)
+    return _run(args)
+
+
+def _run(args) -> int:
+    if args.full_page:
+        config.CROP_TO_TABLE = False
+    if args.max_pages is not None:
+        config.MAX_PAGES = args.max_pages
+    if args.max_chars is not None:
+        config.MAX_CHARS = args.max_chars
+    if args.page_timeout is not None:
+        config.PAGE_TIMEOUT_S = args.page_timeout
+    if args.budget is not None:
+        config.BUDGET_S = args.budget
+    if args.serve:
+        if args.ingest_workers != 1 or args.entity_workers != 1:
+            # Los workers del servidor son procesos daemon: no pueden lanzar los suyos
+            print("Error: --serve no admite --ingest-workers ni --entity-workers "
+                  "(usar --max-jobs para procesar varios PDFs a la vez).", file=sys.stderr)
+            return 1
+        from server import serve
+        return serve(
+            max_jobs=args.max_jobs,
+            default_timeout=args.timeout or None,
+            cache_dir=None if args.no_cache else args.cache_dir,
+            entity_dir=None if args.no_entities else args.entities_dir,
+            backend=args.backend,
+        )
+
+    if args.stdout and (args.csv or args.merge or len(args.pdf_paths) > 1 or args.detail):
+        print("Error: --stdout es para un solo PDF y sin --csv ni --detail.", file=sys.stderr)
+        return 1
+    if args.detail and args.format not in COLUMNAR_FORMATS:
+        print("Error: --detail es para --format parquet o arrow.", file=sys.stderr)
+        return 1
+    if args.from_text:
+        if args.pdf_paths:
+            print("Error: --from-text no admite además rutas de PDF.", file=sys.stderr)
+            return 1
+        return _main_from_text(args)
+
+    if args.incremental and (args.merge or len(args.pdf_paths) > 1):
+        print("Error: --incremental es para un solo PDF (un estado por cuadrante).", file=sys.stderr)
+        return 1
+    if args.incremental and args.stdout and args.format != "json":
+        print('Error: --incremental --stdout escribe {"days", "diff"} en JSON; no admite --format.',
+              file=sys.stderr)
+        return 1
+
+    if args.validate_backend:
+        return _main_validate_backend(args)
+
+    if len(args.pdf_paths) > 1 or args.merge or any(
+        Path(p).is_dir() or glob.has_magic(p) for p in args.pdf_paths
+    ):
+        return _main_batch(args)
+
+    pdf_path = args.pdf_paths[0] if args.pdf_paths else None
+    if pdf_path == "-":
+        # PDF por stdin: se parsea en memoria, sin fichero temporal
+        pdf_input, pdf_name = sys.stdin.buffer.read(), "-"
+    else:
+        if not pdf_path:
+            # Por defecto: documentacion/horas.pdf respecto a la raíz del proyecto
+            base = Path(__file__).resolve().parent
+            pdf_path = base.parent / "documentacion" / "horas.pdf"
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            print(f"Error: no se encuentra el PDF: {pdf_path}", file=sys.stderr)
+            return 1
+        pdf_input, pdf_name = pdf_path, pdf_path.name
+
+    if args.incremental:
+        return _main_incremental(args, pdf_input, pdf_name)
+    if args.format == "ndjson" and args.no_cache and args.no_entities and not (args.csv or args.db):
+        return _main_stream_ndjson(args, pdf_input, pdf_name)
+    return _main_single(args, pdf_input, pdf_name)
+
+
+def _main_single(args, pdf_input, pdf_name: str) -> int:
+    """Un PDF: caché, parseo, salida en --format y, con --db, histórico."""
+    from pipeline.cache import ResultCache, pdf_sha256
+    from pipeline.guards import partial_info
+    from pipeline.runner import parse_pdf
+    from pipeline.serialize import EntityStore
+    from pipeline.timings import StageTimer
+
+    cache = None if args.no_cache else ResultCache(args.cache_dir)
+    store = None if args.no_entities else EntityStore(args.entities_dir)
+    timer = StageTimer()
+    stats: dict = {}
+    try:
+        week_data = parse_pdf(
+            pdf_input, cache=cache, workers=args.ingest_workers, entity_store=store, timer=timer,
+            backend=args.backend, entity_workers=args.entity_workers, stats=stats,
+        )
+    except Exception as e:
+        print(f"Error extrayendo PDF: {e}", file=sys.stderr)
+        return 1
+    partial = partial_info(stats)
+    if partial:
+        _warn_partial(pdf_name, partial)
+    if not week_data:
+        print("No se detectaron días en el PDF.", file=sys.stderr)
         return 1
+    if timer.counts.get("cache_hits"):
+        print("Resultado tomado de la caché.", file=_info_stream(args))
+
+    out_dir = Path(args.output_dir)
+    # Las del parseo; en un acierto de caché, las guardadas o (sin --entities-dir) se extraen
+    day_entities_list = stats.get("day_entities")
+    if day_entities_list is None and (args.detail or args.db):
+        from pipeline.runner import pdf_entities
+        day_entities_list = pdf_entities(pdf_input, entity_store=store, backend=args.backend)
+    with timer.stage("write"):
+        _write_outputs(week_data, out_dir, "cuadrante_lucas", args.csv, args.stdout,
+                       args.format, args.compact, day_entities_list if args.detail else None)
+    if args.db:
+        with timer.stage("history"):
+            _save_history(args, pdf_sha256(pdf_input), week_data, day_entities_list, pdf_name, pdf=pdf_input)
+    if args.timings or (partial and not args.stdout):
+        # Un resultado parcial deja siempre su .meta.json junto a la salida (con --stdout,
+        # el aviso por stderr y EXIT_PARTIAL: stdout sigue siendo la lista de días)
+        _write_meta(out_dir, "cuadrante_lucas", {
+            "pdf": pdf_name, "backend": args.backend or DEFAULT_BACKEND, **(partial or {}), **timer.to_dict()
+        }, _info_stream(args))
+    return EXIT_PARTIAL if partial else 0
 
+
+def _warn_partial(name: str, partial: dict) -> None:
+    pages = ", ".join(str(p) for p in partial["skipped_pages"])
+    print(f"Aviso: resultado parcial de {name}: páginas saltadas {pages} "
+          f"(límites: {', '.join(partial['limits'])}).", file=sys.stderr)
+
+
+def _main_stream_ndjson(args, pdf_input, pdf_name: str) -> int:
+    """--format ndjson sin caché ni entidades que guardar: cada día se escribe en cuanto se parsea."""
+    from pipeline.export import write_ndjson
+    from pipeline.guards import partial_info
+    from pipeline.runner import iter_pdf_days
+
+    if args.stdout:
+        # Texto UTF-8 sobre stdout binario: no depende de la codificación de la consola
+        import io
+        out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", newline="\n", write_through=True)
+        out_path = None
+    else:
+        out_dir = Path(args.output_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_path = out_dir / "cuadrante_lucas.ndjson"
+        out = open(out_path, "w", encoding="utf-8", newline="\n")
+    stats: dict = {}
     try:
-        text = extract_text_from_pdf(pdf_path)
+        n = write_ndjson(iter_pdf_days(pdf_input, backend=args.backend, stats=stats), out)
     except Exception as e:
         print(f"Error extrayendo PDF: {e}", file=sys.stderr)
         return 1
+    finally:
+        if out_path is None:
+            out.detach()
+        else:
+            out.close()
+    partial = partial_info(stats)
+    if partial:
+        _warn_partial(pdf_name, partial)
+    if not n:
+        print("No se detectaron días en el PDF.", file=sys.stderr)
+        return 1
+    if out_path is not None:
+        print(f"NDJSON guardado: {out_path}")
+        if partial:
+            _write_meta(out_path.parent, "cuadrante_lucas", {"pdf": pdf_name, **partial})
+    return EXIT_PARTIAL if partial else 0
+
+
+def _main_incremental(args, pdf_input, pdf_name: str) -> int:
+    """
+    --incremental: reutiliza páginas y días sin cambios del estado anterior; escribe el diff
+    por día. Con --stdout, días y diff van juntos a stdout ({"days", "diff"}), sin ficheros.
+    """
+    from pipeline.cache import pdf_sha256
+    from pipeline.incremental import parse_pdf_incremental
+    from pipeline.timings import StageTimer
 
-    day_blocks, info = segment_by_days(text)
-    if not day_blocks:
+    timer = StageTimer()
+    try:
+        res = parse_pdf_incremental(pdf_input, args.incremental, backend=args.backend, timer=timer)
+    except Exception as e:
+        print(f"Error extrayendo PDF: {e}", file=sys.stderr)
+        return 1
+    if res["partial"]:
+        _warn_partial(pdf_name, res["partial"])
+    if not res["days"]:
         print("No se detectaron días en el PDF.", file=sys.stderr)
         return 1
+    info = _info_stream(args)
+    diff = res["diff"]
+    print(f"Incremental: {res['pages_reparsed']} páginas y {res['days_reparsed']} días re-parseados; "
+          f"{len(diff['changed'])} cambiados, {len(diff['added'])} añadidos, "
+          f"{len(diff['removed'])} eliminados.", file=info)
+
+    out_dir = Path(args.output_dir)
+    with timer.stage("write"):
+        if args.stdout:
+            fmt = {"separators": (",", ":")} if args.compact else {"indent": 2}
+            data = json.dumps({"days": res["days"], "diff": diff}, ensure_ascii=False, **fmt) + "\n"
+            sys.stdout.buffer.write(data.encode("utf-8"))
+            sys.stdout.buffer.flush()
+        else:
+            _write_outputs(res["days"], out_dir, "cuadrante_lucas", args.csv, False,
+                           args.format, args.compact, res["entities"] if args.detail else None)
+            out_diff = out_dir / "cuadrante_lucas.diff.json"
+            with open(out_diff, "w", encoding="utf-8") as f:
+                json.dump({"pdf": pdf_name, **diff}, f, ensure_ascii=False, indent=2)
+            print(f"Diff guardado: {out_diff}", file=info)
+    if args.db:
+        with timer.stage("history"):
+            _save_history(args, pdf_sha256(pdf_input), res["days"], res["entities"], pdf_name, pdf=pdf_input)
+    if args.timings or (res["partial"] and not args.stdout):
+        _write_meta(out_dir, "cuadrante_lucas", {
+            "pdf": pdf_name, "backend": res["backend"], **(res["partial"] or {}), **timer.to_dict()
+        }, info)
+    return EXIT_PARTIAL if res["partial"] else 0
+
+
+def _main_validate_backend(args) -> int:
+    """--validate-backend: ¿da el motor los mismos días que pdfplumber en estos PDFs?"""
+    from pipeline.batch import expand_inputs
+    from pipeline.runner import compare_backends
+
+    backend = args.backend or "pdfium"
+    if backend == DEFAULT_BACKEND:
+        print(f"Error: --validate-backend compara otro motor con {DEFAULT_BACKEND}; indique --backend.",
+              file=sys.stderr)
+        return 1
+    pdf_paths = expand_inputs(args.pdf_paths)
+    if not pdf_paths:
+        print("Error: ninguna entrada corresponde a un PDF.", file=sys.stderr)
+        return 1
+    n_diff = n_err = 0
+    for pdf_path in pdf_paths:
+        try:
+            res = compare_backends(pdf_path, backend)
+        except Exception as e:
+            n_err += 1
+            print(f"FALLO {pdf_path}: {type(e).__name__}: {e}", file=sys.stderr)
+            continue
+        secs = res["seconds"]
+        times = f"{DEFAULT_BACKEND} {secs[DEFAULT_BACKEND]:.1f} s, {backend} {secs[backend]:.1f} s"
+        if res["identical"]:
+            print(f"OK    {pdf_path} ({res['days']} días; {times})")
+        else:
+            n_diff += 1
+            days = ", ".join(res["differing_days"]) or "cabecera de semana"
+            print(f"DIFF  {pdf_path} (difiere: {days}; {times})")
+    print(f"Resumen: {len(pdf_paths) - n_diff - n_err} iguales, {n_diff} distintos, "
+          f"{n_err} con error ({backend} frente a {DEFAULT_BACKEND}).")
+    return 0 if not n_diff and not n_err else 1
+
 
-    year_from_week = None
-    if info.get("week_start_dd_mm_yyyy"):
-        _, _, y = info["week_start_dd_mm_yyyy"]
-        year_from_week = y
+def _main_from_text(args) -> int:
+    """--from-text: segmentar/agregar un texto ya extraído (sin pdfplumber, sin caché)."""
+    from pipeline.normalize import to_lucas_week
+    from pipeline.runner import extract_entities_from_text
+    from pipeline.timings import StageTimer
 
-    day_entities_list = extract_entities_from_day_blocks(day_blocks, year_from_week=year_from_week)
-    week_data = to_lucas_week(day_entities_list)
+    text_path = Path(args.from_text)
+    if not text_path.exists():
+        print(f"Error: no se encuentra el texto: {text_path}", file=sys.stderr)
+        return 1
+    timer = StageTimer()
+    with timer.stage("read"):
+        text = text_path.read_text(encoding="utf-8")
+    day_entities_list = extract_entities_from_text(text, timer=timer, entity_workers=args.entity_workers)
+    with timer.stage("aggregate"):
+        week_data = to_lucas_week(day_entities_list)
+    if not week_data:
+        print("No se detectaron días en el texto.", file=sys.stderr)
+        return 1
 
     out_dir = Path(args.output_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_json = out_dir / "cuadrante_lucas.json"
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump(week_data, f, ensure_ascii=False, indent=2)
-    print(f"JSON guardado: {out_json}")
+    with timer.stage("write"):
+        _write_outputs(week_data, out_dir, "cuadrante_lucas", args.csv, args.stdout,
+                       args.format, args.compact, day_entities_list if args.detail else None)
+    if args.db:
+        # Sin PDF: el histórico referencia el SHA-256 del texto
+        import hashlib
+        with timer.stage("history"):
+            sha = hashlib.sha256(text.encode("utf-8")).hexdigest()
+            _save_history(args, sha, week_data, day_entities_list, text_path.name)
+    if args.timings:
+        _write_meta(out_dir, "cuadrante_lucas", {"text": text_path.name, **timer.to_dict()},
+                    _info_stream(args))
+    return 0
+
+
+def _save_history(
+    args, sha256: str, week_data: list, day_entities_list, source: str, history=None, pdf=None
+) -> None:
+    """
+    --db: guarda días y turnos de empleado en el histórico SQLite (history = base ya abierta).
+    pdf: el PDF de origen, para fechar la versión (sin él, o sin fecha, la versión es la
+    más antigua: ver history.UNDATED).
+    """
+    from pipeline.history import HistoryStore, pdf_document_date
+
+    version = pdf_document_date(pdf) if pdf is not None else None
+    if history is not None:
+        n = history.upsert(sha256, week_data, day_entities_list, source=source, version=version)
+    else:
+        with HistoryStore(args.db) as db:
+            n = db.upsert(sha256, week_data, day_entities_list, source=source, version=version)
+    kept = len(week_data) - n
+    note = f" ({kept} ya venían de un PDF más reciente)" if kept else ""
+    print(f"Histórico: {n} días de {source} guardados en {args.db}{note}", file=_info_stream(args))
+
+
+def _info_stream(args):
+    """Con --stdout, stdout es solo el JSON: los mensajes informativos van a stderr."""
+    return sys.stderr if getattr(args, "stdout", False) else sys.stdout
+
 
-    if args.csv:
+def _write_outputs(
+    week_data: list,
+    out_dir: Path,
+    stem: str,
+    with_csv: bool,
+    to_stdout: bool = False,
+    fmt: str = "json",
+    compact: bool = False,
+    detail: Optional[list] = None,
+) -> None:
+    """
+    Escribe <stem>.<fmt> (json, ndjson, parquet o arrow; y <stem>.csv si with_csv) en
+    out_dir; con to_stdout, la salida va a stdout. detail: DayEntities para
+    <stem>.detail.<fmt> (solo columnar; ver pipeline/export.py).
+    """
+    import pipeline.export as export
+
+    if fmt in COLUMNAR_FORMATS:
+        table = export.days_table(week_data)
+        if to_stdout:
+            sys.stdout.buffer.write(export.to_bytes(table, fmt))
+            sys.stdout.buffer.flush()
+            return
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_table = out_dir / f"{stem}.{fmt}"
+        export.write_table(table, out_table, fmt)
+        print(f"{fmt.capitalize()} guardado: {out_table}")
+        if detail is not None:
+            out_detail = out_dir / f"{stem}.detail.{fmt}"
+            export.write_table(export.detail_table(detail), out_detail, fmt)
+            print(f"Detalle guardado: {out_detail}")
+    elif to_stdout:
+        # Bytes UTF-8 directamente: no depende de la codificación de la consola (Windows)
+        if fmt == "ndjson":
+            data = "".join(export.ndjson_line(day) for day in week_data)
+        else:
+            data = export.dumps_json(week_data, compact) + "\n"
+        out = sys.stdout.buffer
+        out.write(data.encode("utf-8"))
+        out.flush()
+        return
+    else:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        out_json = out_dir / f"{stem}.{fmt}"
+        with open(out_json, "w", encoding="utf-8", newline="\n") as f:
+            if fmt == "ndjson":
+                export.write_ndjson(week_data, f)
+            else:
+                f.write(export.dumps_json(week_data, compact))
+        print(f"{fmt.upper()} guardado: {out_json}")
+
+    if with_csv:
         import csv
-        out_csv = out_dir / "cuadrante_lucas.csv"
+        out_csv = out_dir / f"{stem}.csv"
         with open(out_csv, "w", newline="", encoding="utf-8") as f:
             w = csv.writer(f)
             w.writerow(["date", "shift_name", "staff_floor", "staff_kitchen", "hours_worked"])
@@ -92,6 +621,250 @@ def main() -> int:
                     ])
         print(f"CSV guardado: {out_csv}")
 
+
+def _write_meta(out_dir: Path, stem: str, meta: dict, info=None) -> None:
+    """Escribe <stem>.meta.json (tiempos y contadores de --timings) e imprime un resumen."""
+    meta = {"parser_version": config.PARSER_VERSION, **meta}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_meta = out_dir / f"{stem}.meta.json"
+    with open(out_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    stages = ", ".join(f"{k} {v:.0f} ms" for k, v in meta.get("stages_ms", {}).items())
+    print(f"Tiempos guardados: {out_meta}" + (f" ({stages})" if stages else ""), file=info or sys.stdout)
+
+
+def _profiled(fn, args, out_path: str) -> int:
+    """Ejecuta fn(args) bajo cProfile, guarda las estadísticas y muestra las funciones más costosas."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, args)
+    finally:
+        profiler.dump_stats(out_path)
+        print(f"Perfil guardado: {out_path}", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+
+
+def _unique_stem(pdf_path: str, used_stems: set) -> str:
+    """Nombre de salida a partir del PDF; si se repite, se añade _2, _3..."""
+    stem = Path(pdf_path).stem
+    n = 2
+    while stem in used_stems:
+        stem = f"{Path(pdf_path).stem}_{n}"
+        n += 1
+    used_stems.add(stem)
+    return stem
+
+
+def _main_batch(args) -> int:
+    """Modo lote: parsea todos los PDFs en paralelo; un PDF erróneo no detiene el resto."""
+    from pipeline.batch import expand_inputs, merge_days, run_batch
+    from pipeline.cache import pdf_sha256
+
+    pdf_paths = expand_inputs(args.pdf_paths)
+    if not pdf_paths:
+        print("Error: ninguna entrada corresponde a un PDF.", file=sys.stderr)
+        return 1
+
+    out_dir = Path(args.output_dir)
+    cache_dir = None if args.no_cache else args.cache_dir
+    entity_dir = None if args.no_entities else args.entities_dir
+    history = None
+    if args.db:
+        from pipeline.history import HistoryStore
+        history = HistoryStore(args.db)
+    results = []
+    used_stems = set()
+    detail_by_date: dict = {}  # --detail --merge: misma regla que merge_days (gana el PDF posterior)
+    for res in run_batch(pdf_paths, jobs=args.jobs, cache_dir=cache_dir, entity_dir=entity_dir,
+                         timings=args.timings, backend=args.backend,
+                         entities=args.detail or history is not None):
+        results.append(res)
+        if not res.ok:
+            print(f"FALLO {res.pdf_path}: {res.error}", file=sys.stderr)
+            continue
+        print(f"OK    {res.pdf_path} ({len(res.days)} días, {res.elapsed_s:.1f} s)")
+        if res.partial:
+            _warn_partial(res.pdf_path, res.partial)
+        day_entities_list = res.entities
+        if args.detail:
+            detail_by_date.update((d.date_iso, d) for d in day_entities_list)
+        if history is not None:
+            # Fechas repetidas: gana el PDF más reciente; con la misma fecha de PDF, el
+            # posterior en el orden del lote (como --merge)
+            _save_history(args, pdf_sha256(res.pdf_path), res.days, day_entities_list,
+                          Path(res.pdf_path).name, history, pdf=res.pdf_path)
+        if not args.merge:
+            stem = _unique_stem(res.pdf_path, used_stems)
+            _write_outputs(res.days, out_dir, stem, args.csv, fmt=args.format, compact=args.compact,
+                           detail=day_entities_list if args.detail else None)
+            if args.timings or res.partial:
+                _write_meta(out_dir, stem, {"pdf": Path(res.pdf_path).name, **(res.partial or {}),
+                                            **(res.timings or {})})
+
+    n_ok = sum(1 for r in results if r.ok)
+    if args.merge and n_ok:
+        detail = [detail_by_date[d] for d in sorted(detail_by_date)] if args.detail else None
+        _write_outputs(merge_days(results), out_dir, "cuadrante_lucas", args.csv, fmt=args.format,
+                       compact=args.compact, detail=detail)
+        if args.timings or any(r.partial for r in results):
+            _write_meta(out_dir, "cuadrante_lucas", {"pdfs": [
+                {"pdf": Path(r.pdf_path).name, "ok": r.ok, **(r.partial or {}), **(r.timings or {})}
+                for r in results
+            ]})
+    if history is not None:
+        history.close()
+    print(f"Resumen: {n_ok} correctos, {len(results) - n_ok} con error, {len(results)} PDFs.")
+    if n_ok != len(results):
+        return 1
+    return EXIT_PARTIAL if any(r.partial for r in results) else 0
+
+
+def _main_reaggregate(argv: list) -> int:
+    """
+    Re-agrega las entidades guardadas (sin abrir ningún PDF) con otras ventanas de
+    turno, otro umbral o otro mapa sala/cocina: solo apply_shift_rules + to_lucas_week.
+    """
+    from pipeline.batch import BatchResult, expand_inputs, merge_days
+    from pipeline.cache import pdf_sha256
+    from pipeline.normalize import to_lucas_week
+    from pipeline.relations import reset_role_cache
+    from pipeline.serialize import EntityStore
+
+    parser = argparse.ArgumentParser(
+        prog="main.py reaggregate",
+        description="Recalcula el JSON Lucas desde las entidades guardadas, sin volver a parsear los PDFs",
+    )
+    parser.add_argument(
+        "pdf_paths",
+        nargs="*",
+        metavar="pdf_path",
+        help="Limitar a estos PDFs (ficheros, carpetas o glob). Sin rutas: todos los guardados",
+    )
+    parser.add_argument("--entities-dir", default=str(DEFAULT_ENTITIES_DIR), help="Carpeta de entidades guardadas")
+    parser.add_argument("--shift-windows", help="JSON de ventanas (mismo formato que shift_windows.json)")
+    parser.add_argument("--min-hours", type=float, help="Horas mínimas en una ventana para contar a la persona")
+    parser.add_argument("--role-map", help='JSON {"puesto": "sala"|"cocina", ...} que sustituye a ROLE_TO_AREA')
+    parser.add_argument("--output-dir", "-o", default="output", help="Carpeta de salida")
+    parser.add_argument("--merge", action="store_true", help="Un solo cuadrante_lucas.json con todos los días")
+    parser.add_argument("--csv", action="store_true", help="Generar además un CSV resumen")
+    args = parser.parse_args(argv)
+
+    if args.shift_windows:
+        if not Path(args.shift_windows).exists():
+            print(f"Error: no se encuentra {args.shift_windows}", file=sys.stderr)
+            return 1
+        config.SHIFT_WINDOWS = config.load_shift_windows(Path(args.shift_windows))
+    if args.min_hours is not None:
+        config.MIN_HOURS_IN_SHIFT = args.min_hours
+    if args.role_map:
+        try:
+            with open(args.role_map, encoding="utf-8") as f:
+                role_map = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error leyendo --role-map: {e}", file=sys.stderr)
+            return 1
+        if not isinstance(role_map, dict) or any(v not in ("sala", "cocina") for v in role_map.values()):
+            print('Error: --role-map debe ser un objeto {"puesto": "sala"|"cocina"}', file=sys.stderr)
+            return 1
+        config.ROLE_TO_AREA = role_map
+    reset_role_cache()
+
+    store = EntityStore(args.entities_dir)
+    if args.pdf_paths:
+        entries = []
+        for pdf_path in expand_inputs(args.pdf_paths):
+            day_entities_list = store.get(pdf_sha256(pdf_path)) if pdf_path.exists() else None
+            if day_entities_list is None:
+                print(f"Sin entidades guardadas para {pdf_path} (parsearlo antes con main.py)", file=sys.stderr)
+                continue
+            entries.append(({"source": pdf_path.name}, day_entities_list))
+    else:
+        entries = list(store.entries())
+    if not entries:
+        print(f"Error: no hay entidades guardadas en {args.entities_dir}", file=sys.stderr)
+        return 1
+
+    t0 = time.perf_counter()
+    results = [
+        BatchResult(meta["source"] or "sin_nombre", ok=True, days=to_lucas_week(day_entities_list))
+        for meta, day_entities_list in entries
+    ]
+    elapsed = time.perf_counter() - t0
+    out_dir = Path(args.output_dir)
+    if args.merge:
+        _write_outputs(merge_days(results), out_dir, "cuadrante_lucas", args.csv)
+    else:
+        used_stems = set()
+        for res in results:
+            _write_outputs(res.days, out_dir, _unique_stem(res.pdf_path, used_stems), args.csv)
+    n_days = sum(len(r.days) for r in results)
+    print(f"Re-agregados {len(results)} PDFs ({n_days} días) en {elapsed:.2f} s.")
+    return 0
+
+
+def _main_query(argv: list) -> int:
+    """Consulta el histórico SQLite (--db) por rango de fechas, sin abrir ningún PDF."""
+    from datetime import date
+
+    from pipeline.export import ndjson_line
+    from pipeline.history import HistoryStore
+
+    parser = argparse.ArgumentParser(
+        prog="main.py query",
+        description="Días (o turnos, o turnos de empleado) guardados con --db, por rango de fechas",
+    )
+    parser.add_argument("--db", default=str(DEFAULT_DB_PATH), help="Histórico SQLite (ver main.py --db)")
+    parser.add_argument("--from", dest="date_from", metavar="AAAA-MM-DD", help="Primera fecha (inclusive)")
+    parser.add_argument("--to", dest="date_to", metavar="AAAA-MM-DD", help="Última fecha (inclusive)")
+    what = parser.add_mutually_exclusive_group()
+    what.add_argument("--shift", metavar="NOMBRE", help=f"Filas por turno ({', '.join(config.SHIFT_NAMES)})")
+    what.add_argument("--employee", metavar="NOMBRE", help="Turnos de esta persona (nombre como en el PDF)")
+    what.add_argument("--employees", action="store_true", help="Turnos de todas las personas")
+    parser.add_argument("--source", metavar="SHA256", help="Solo los días de este PDF (días formato Lucas)")
+    parser.add_argument(
+        "--format",
+        choices=("ndjson", "json"),
+        default="ndjson",
+        help="ndjson: una fila por línea (por defecto); json: una lista",
+    )
+    args = parser.parse_args(argv)
+
+    for value in (args.date_from, args.date_to):
+        if value is not None:
+            try:
+                date.fromisoformat(value)
+            except ValueError:
+                print(f"Error: fecha no válida: {value} (formato AAAA-MM-DD)", file=sys.stderr)
+                return 1
+    if not Path(args.db).exists():
+        print(f"Error: no existe el histórico {args.db} (crearlo con main.py PDF --db)", file=sys.stderr)
+        return 1
+
+    with HistoryStore(args.db) as history:
+        if args.shift:
+            rows = history.shifts(args.date_from, args.date_to, shift_name=args.shift)
+        elif args.employee or args.employees:
+            rows = history.employee_shifts(args.date_from, args.date_to, employee=args.employee)
+        else:
+            rows = history.days(args.date_from, args.date_to, sha256=args.source)
+        # Fila a fila según se leen del índice; bytes UTF-8 como en --stdout
+        out = sys.stdout.buffer
+        n = 0
+        if args.format == "json":
+            out.write(b"[")
+        for row in rows:
+            line = ndjson_line(row)
+            if args.format == "json":
+                line = ("," if n else "") + line.rstrip("\n")
+            out.write(line.encode("utf-8"))
+            n += 1
+        if args.format == "json":
+            out.write(b"]\n")
+        out.flush()
+    print(f"{n} filas.", file=sys.stderr)
     return 0
 
 
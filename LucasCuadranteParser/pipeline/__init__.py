@@ -1,16 +1,31 @@
 # -*- coding: utf-8 -*-
 """Pipeline: PDF cuadrante BETLEM -> JSON compatible con Lucas."""
 
-from .ingest import extract_text_from_pdf
-from .segment import segment_by_days
-from .entities import extract_entities_from_day_blocks
-from .relations import apply_shift_rules
-from .normalize import to_lucas_week
+import importlib
 
-__all__ = [
-    "extract_text_from_pdf",
-    "segment_by_days",
-    "extract_entities_from_day_blocks",
-    "apply_shift_rules",
-    "to_lucas_week",
-]
+# Re-exportaciones perezosas (PEP 562): `from pipeline import parse_text` solo importa
+# los submódulos necesarios, y `import pipeline.cache` no arrastra ingest ni relations.
+_EXPORTS = {
+    "extract_text_from_pdf": ".ingest",
+    "segment_by_days": ".segment",
+    "extract_entities_from_day_blocks": ".entities",
+    "apply_shift_rules": ".relations",
+    "to_lucas_week": ".normalize",
+    "parse_pdf": ".runner",
+    "parse_text": ".runner",
+    "iter_pdf_days": ".runner",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
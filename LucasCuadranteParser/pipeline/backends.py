@@ -0,0 +1,392 @@
+# -*- coding: utf-8 -*-
+"""
+Motores de extracción de texto del PDF, intercambiables (ver ingest.extract_text_from_pdf).
+
+- "pdfplumber" (por defecto): page.extract_text() de pdfplumber, la referencia.
+- "pdfminer": el mismo intérprete de pdfminer que usa pdfplumber, pero con un dispositivo
+  que solo recoge los caracteres (sin trazados ni el diccionario de atributos por objeto
+  de pdfplumber) y la misma reconstrucción de palabras y líneas (chars_to_text). Mismo
+  texto que pdfplumber, ~2x más rápido.
+- "pdfium": pypdfium2 (PDFium, en C; opcional). Geometría de cada carácter desde PDFium con
+  la misma reconstrucción; un orden de magnitud más rápido. PDFium no expone los espacios
+  del contenido tal cual (los marca como generados), así que se deducen por posición: puede
+  diferir de pdfplumber en algún espacio. Antes de adoptarlo para un tipo de documento,
+  validar con runner.compare_backends (main.py --validate-backend).
+
+Cada motor es una clase que se abre como contexto sobre un PDF y ofrece n_pages,
+page_chars(i) y page_text(i) (None si la página no tiene texto). Los imports son perezosos.
+
+Con crop (por defecto config.CROP_TO_TABLE), page_text solo reconstruye el texto de la
+tabla del cuadrante (ver pipeline/region.py): la geometría se detecta una vez en la
+primera página (table_layout) y se aplica a todas.
+
+El PDF puede ser una ruta (Path) o estar ya en memoria (ver ingest.as_pdf_source): bytes,
+bytearray, memoryview, mmap o un fichero binario con seek. Nada se escribe a disco.
+"""
+
+import io
+import itertools
+import mmap
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+DEFAULT_BACKEND = "pdfplumber"
+
+# Tolerancias por defecto de pdfplumber (x_tolerance, y_tolerance)
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+# Ligaduras que pdfplumber expande por defecto (expand_ligatures=True)
+LIGATURES = {"ﬀ": "ff", "ﬃ": "ffi", "ﬄ": "ffl", "ﬁ": "fi", "ﬂ": "fl", "ﬆ": "st", "ﬅ": "st"}
+
+# Carácter: (texto, x0, x1, top, bottom, upright), coordenadas con origen arriba a la izquierda
+Char = Tuple[str, float, float, float, float, bool]
+
+# Lo que aceptan los motores: ruta o PDF en memoria
+PdfSource = Union[Path, bytes, bytearray, memoryview, mmap.mmap, io.IOBase]
+
+
+def _binary_stream(source: PdfSource):
+    """
+    (fichero, propio) para leer el PDF con pdfminer: una ruta se abre (y hay que cerrarla);
+    bytes se envuelven en BytesIO (sin copia); mmap y ficheros ya abiertos se usan tal cual.
+    """
+    if isinstance(source, Path):
+        return open(source, "rb"), True
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), False
+    return source, False
+
+
+def _cluster_ids(values, tolerance: float) -> Dict[float, int]:
+    """Como pdfplumber cluster_list: valores ordenados; uno nuevo empieza grupo si dista > tolerance del anterior."""
+    ids: Dict[float, int] = {}
+    group = -1
+    last = None
+    for v in sorted(set(values)):
+        if last is None or v > last + tolerance:
+            group += 1
+        ids[v] = group
+        last = v
+    return ids
+
+
+def _chars_to_words(line: List[Char], upright: bool) -> List[Tuple[str, float]]:
+    """Palabras (texto, top) de una línea ya ordenada (pdfplumber WordExtractor.iter_chars_to_words)."""
+    words: List[Tuple[str, float]] = []
+    current: List[Char] = []
+    for ch in line:
+        if ch[0].isspace():
+            if current:
+                words.append(_merge(current))
+            current = []
+            continue
+        if current:
+            prev = current[-1]
+            if upright:  # ltr: distancia horizontal entre caracteres, vertical entre tops
+                ax, bx, cx, ay, cy = prev[1], prev[2], ch[1], prev[3], ch[3]
+            else:  # ttb
+                ax, bx, cx, ay, cy = prev[3], prev[4], ch[3], prev[1], ch[1]
+            if cx < ax or cx > bx + X_TOLERANCE or abs(cy - ay) > Y_TOLERANCE:
+                words.append(_merge(current))
+                current = [ch]
+                continue
+        current.append(ch)
+    if current:
+        words.append(_merge(current))
+    return words
+
+
+def _merge(chars: List[Char]) -> Tuple[str, float]:
+    return "".join(LIGATURES.get(c[0], c[0]) for c in chars), min(c[3] for c in chars)
+
+
+def chars_to_text(chars: List[Char]) -> str:
+    """
+    Texto de una página a partir de sus caracteres en orden de contenido, con el mismo
+    algoritmo que pdfplumber page.extract_text() con sus parámetros por defecto:
+    caracteres -> líneas (agrupando por top con tolerancia) -> palabras (hueco > x_tolerance
+    o espacio) -> líneas de palabras (agrupando por top) unidas con " " y "\\n".
+    """
+    words: List[Tuple[str, float]] = []
+    for upright, group in itertools.groupby(chars, key=lambda c: c[5]):
+        group = list(group)
+        # Líneas: por top (horizontal) o x0 (texto girado), en orden de grupo
+        key = 3 if upright else 1
+        ids = _cluster_ids([c[key] for c in group], Y_TOLERANCE if upright else X_TOLERANCE)
+        lines: Dict[int, List[Char]] = {}
+        for c in group:
+            lines.setdefault(ids[c[key]], []).append(c)
+        sort_key = (lambda c: (c[1], c[1])) if upright else (lambda c: (c[3], c[4]))
+        for k in sorted(lines):
+            words.extend(_chars_to_words(sorted(lines[k], key=sort_key), upright))
+    if not words:
+        return ""
+    # Líneas de palabras: grupos consecutivos con el mismo cluster de top
+    ids = _cluster_ids([w[1] for w in words], Y_TOLERANCE)
+    out_lines = []
+    for _, line in itertools.groupby(words, key=lambda w: ids[w[1]]):
+        out_lines.append(" ".join(w[0] for w in line))
+    return "\n".join(out_lines)
+
+
+# table_layout() aún no calculado (None ya significa "sin tabla reconocible")
+_UNKNOWN = object()
+
+
+class PdfplumberDocument:
+    """Motor de referencia: pdfplumber page.extract_text()."""
+
+    # Lo fija open_document; sin recorte, page_text es el texto de la página entera
+    crop = False
+    _layout = _UNKNOWN
+
+    def __init__(self, source: PdfSource) -> None:
+        from .ingest import _pdfplumber
+
+        if isinstance(source, Path):
+            self._pdf = _pdfplumber().open(source)
+        else:
+            self._pdf = _pdfplumber().open(_binary_stream(source)[0])
+        self.n_pages = len(self._pdf.pages)
+
+    def page_chars(self, i: int) -> List[Char]:
+        return [(c["text"], c["x0"], c["x1"], c["top"], c["bottom"], c["upright"]) for c in self._pdf.pages[i].chars]
+
+    def table_layout(self, first_page_chars: Optional[List[Char]] = None):
+        """Geometría de la tabla (region.TableLayout) de la primera página, o None; se calcula una vez."""
+        if self._layout is _UNKNOWN:
+            from .region import detect_layout
+
+            if first_page_chars is None:
+                first_page_chars = self.page_chars(0) if self.n_pages else []
+            self._layout = detect_layout(first_page_chars)
+        return self._layout
+
+    def set_table_layout(self, layout) -> None:
+        """Usa una geometría ya calculada (ej. la del proceso padre en la extracción en paralelo)."""
+        self._layout = layout
+
+    def _bands(self, i: int, chars: List[Char]):
+        """Bandas de la tabla en la página i, o None si no se recorta."""
+        if not self.crop:
+            return None
+        layout = self.table_layout(chars if i == 0 else None)
+        if layout is None:
+            return None
+        from .region import table_bands
+
+        return table_bands(chars, layout, first_page=i == 0)
+
+    def _chars_text(self, i: int, chars: List[Char]) -> str:
+        """Texto de la página a partir de sus caracteres, recortados a la tabla si procede."""
+        bands = self._bands(i, chars)
+        if bands is not None:
+            from .region import crop_chars
+
+            chars = crop_chars(chars, bands)
+        return chars_to_text(chars) if chars else ""
+
+    def page_text(self, i: int) -> Optional[str]:
+        page = self._pdf.pages[i]
+        bands = self._bands(i, self.page_chars(i)) if self.crop else None
+        if bands is None:
+            return page.extract_text()
+        from .region import in_bands
+
+        # Los objetos de la página ya están leídos (page_chars): filter no vuelve a interpretarla
+        return page.filter(
+            lambda obj: obj.get("object_type") != "char" or in_bands(obj["x0"], obj["top"], bands)
+        ).extract_text()
+
+    def close(self) -> None:
+        self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PdfminerDocument(PdfplumberDocument):
+    """Intérprete de pdfminer con un dispositivo que solo recoge caracteres."""
+
+    def __init__(self, source: PdfSource) -> None:
+        from pdfminer.converter import PDFPageAggregator
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        class _CharsOnly(PDFPageAggregator):
+            def paint_path(self, *args, **kwargs) -> None:  # líneas y rectángulos: no se usan
+                pass
+
+        self._file, self._owns_file = _binary_stream(source)
+        try:
+            doc = PDFDocument(PDFParser(self._file))
+            self._pages = list(PDFPage.create_pages(doc))
+            self.n_pages = len(self._pages)
+            self._device = _CharsOnly(PDFResourceManager(caching=True), laparams=None)
+            self._interpreter = PDFPageInterpreter(self._device.rsrcmgr, self._device)
+        except BaseException:
+            # PDF ilegible: no dejar abierto el fichero que se abrió aquí (el fallback lo reabre)
+            self.close()
+            raise
+
+    def page_text(self, i: int) -> Optional[str]:
+        return self._chars_text(i, self.page_chars(i))
+
+    def page_chars(self, i: int) -> List[Char]:
+        from pdfminer.layout import LTChar, LTContainer
+
+        page = self._pages[i]
+        self._interpreter.process_page(page)
+        layout = self._device.get_result()
+        # Misma conversión de coordenadas que pdfplumber Page.process_object
+        rotation = (page.attrs.get("Rotate") or 0) % 360
+        x0, y0, x1, y1 = page.mediabox
+        lo_x, hi_x = sorted((x0, x1))
+        lo_y, hi_y = sorted((y0, y1))
+        if rotation in (90, 270):
+            lo_x, lo_y, hi_x, hi_y = lo_y, lo_x, hi_y, hi_x
+        height = hi_y - lo_y
+        mb_x0, mb_top = lo_x, height - hi_y
+
+        chars: List[Char] = []
+
+        def walk(objs) -> None:
+            for obj in objs:
+                if isinstance(obj, LTContainer):
+                    walk(obj._objs)
+                elif isinstance(obj, LTChar):
+                    cx0, cx1 = obj.x0, obj.x1
+                    if mb_x0 != 0:
+                        cx0, cx1 = cx0 + mb_x0, cx1 + mb_x0
+                    chars.append((
+                        obj.get_text(), cx0, cx1,
+                        (height - obj.y1) + mb_top, (height - obj.y0) + mb_top, obj.upright,
+                    ))
+
+        walk(layout._objs)
+        return chars
+
+    def close(self) -> None:
+        if self._owns_file:
+            self._file.close()
+
+
+class PdfiumDocument(PdfplumberDocument):
+    """pypdfium2: caracteres y cajas desde PDFium, reconstrucción como pdfplumber."""
+
+    # Un espacio generado por PDFium corresponde a un espacio real del contenido si cae
+    # sobre el carácter siguiente (pdfplumber lo tendría entre los dos); si cae en el
+    # hueco, PDFium lo ha inventado por la distancia entre objetos de texto.
+    SPACE_SLACK = 0.25
+
+    def __init__(self, source: PdfSource) -> None:
+        import pypdfium2
+
+        self._doc = pypdfium2.PdfDocument(self._pdfium_input(source))
+        self.n_pages = len(self._doc)
+
+    def page_text(self, i: int) -> Optional[str]:
+        return self._chars_text(i, self.page_chars(i))
+
+    def page_chars(self, i: int) -> List[Char]:
+        import ctypes
+
+        import pypdfium2.raw as pdfium_c
+
+        page = self._doc[i]
+        textpage = page.get_textpage()
+        try:
+            height = page.get_height()
+            tp = textpage.raw
+            rect = pdfium_c.FS_RECTF()
+            matrix = pdfium_c.FS_MATRIX()
+            ox, oy, descent = ctypes.c_double(), ctypes.c_double(), ctypes.c_float()
+            chars: List[Char] = []
+            pending_space = None
+            for k in range(pdfium_c.FPDFText_CountChars(tp)):
+                text = chr(pdfium_c.FPDFText_GetUnicode(tp, k))
+                pdfium_c.FPDFText_GetLooseCharBox(tp, k, rect)
+                if text.isspace():
+                    if text == " " and chars and not chars[-1][0].isspace():
+                        if pdfium_c.FPDFText_IsGenerated(tp, k):
+                            pending_space = rect.left
+                        else:
+                            chars.append(self._space_after(chars[-1]))
+                    continue
+                if pending_space is not None:
+                    if pending_space > rect.left - self.SPACE_SLACK:
+                        chars.append(self._space_after(chars[-1]))
+                    pending_space = None
+                # top/bottom como pdfminer: caja de altura = cuerpo de letra, desde el descendente
+                pdfium_c.FPDFText_GetMatrix(tp, k, matrix)
+                scale = abs(matrix.d)
+                size = pdfium_c.FPDFText_GetFontSize(tp, k)
+                font = pdfium_c.FPDFTextObj_GetFont(pdfium_c.FPDFText_GetTextObject(tp, k))
+                pdfium_c.FPDFFont_GetDescent(font, ctypes.c_float(size), descent)
+                pdfium_c.FPDFText_GetCharOrigin(tp, k, ox, oy)
+                bottom = (height - oy.value) - descent.value * scale
+                chars.append((text, rect.left, rect.right, bottom - size * scale, bottom, True))
+            return chars
+        finally:
+            textpage.close()
+            page.close()
+
+    @staticmethod
+    def _pdfium_input(source: PdfSource):
+        """PDFium lee rutas, bytes y ficheros con readinto; un buffer escribible (bytearray,
+        mmap de escritura) se le pasa sin copiar como array de ctypes."""
+        import ctypes
+
+        if isinstance(source, (bytearray, memoryview, mmap.mmap)):
+            try:
+                return (ctypes.c_char * len(source)).from_buffer(source)
+            except TypeError:  # buffer de solo lectura
+                return bytes(source)
+        return source
+
+    @staticmethod
+    def _space_after(prev: Char) -> Char:
+        return (" ", prev[2], prev[2], prev[3], prev[4], prev[5])
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+_BACKENDS = {
+    "pdfplumber": (PdfplumberDocument, "pdfplumber"),
+    "pdfminer": (PdfminerDocument, "pdfminer"),
+    "pdfium": (PdfiumDocument, "pypdfium2"),
+}
+BACKENDS = tuple(_BACKENDS)
+
+
+def is_available(name: str) -> bool:
+    """True si el paquete del motor está instalado (sin importarlo)."""
+    import importlib.util
+
+    if name not in _BACKENDS:
+        raise ValueError(f"Motor de PDF desconocido: {name!r} (opciones: {', '.join(BACKENDS)})")
+    return importlib.util.find_spec(_BACKENDS[name][1]) is not None
+
+
+def open_document(source: PdfSource, backend: Optional[str] = None, crop: Optional[bool] = None):
+    """
+    Abre el PDF (ruta o en memoria) con el motor indicado (None = DEFAULT_BACKEND). Usar como contexto.
+    crop: recortar page_text a la tabla del cuadrante (None = config.CROP_TO_TABLE).
+    """
+    name = backend or DEFAULT_BACKEND
+    if name not in _BACKENDS:
+        raise ValueError(f"Motor de PDF desconocido: {name!r} (opciones: {', '.join(BACKENDS)})")
+    doc = _BACKENDS[name][0](Path(source) if isinstance(source, str) else source)
+    if crop is None:
+        import config
+
+        crop = config.CROP_TO_TABLE
+    doc.crop = crop
+    return doc
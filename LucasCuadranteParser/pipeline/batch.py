@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Lotes: parsear muchos PDFs (ej. un año de cuadrantes semanales) en varios procesos.
+
+Cada PDF se procesa por separado; un PDF que falla queda marcado como fallo con su
+error y no interrumpe el resto del lote.
+"""
+
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from .cache import ResultCache
+from .guards import Limits, partial_info
+from .entities import DayEntities
+from .runner import parse_pdf, pdf_entities
+from .serialize import EntityStore
+from .timings import StageTimer
+
+
+@dataclass
+class BatchResult:
+    """Resultado de un PDF del lote."""
+    pdf_path: str
+    ok: bool
+    days: List[dict] = field(default_factory=list)
+    error: Optional[str] = None
+    elapsed_s: float = 0.0
+    timings: Optional[dict] = None  # StageTimer.to_dict() si se pidió (run_batch(timings=True))
+    partial: Optional[dict] = None  # páginas saltadas por los límites de config (ver pipeline/guards.py)
+    entities: Optional[List[DayEntities]] = None  # DayEntities del PDF si se pidieron (run_batch(entities=True))
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[Path]:
+    """
+    Convierte la lista de entradas en rutas de PDF: cada entrada puede ser un fichero,
+    una carpeta (todos sus *.pdf, ordenados) o un patrón glob ("cuadrantes/2025-*.pdf").
+    Se eliminan duplicados manteniendo el orden.
+    """
+    paths: List[Path] = []
+    for raw in inputs:
+        p = Path(raw)
+        if p.is_dir():
+            found = sorted(q for q in p.iterdir() if q.suffix.lower() == ".pdf")
+        elif glob.has_magic(raw):
+            found = sorted(Path(q) for q in glob.glob(raw, recursive=True))
+        else:
+            found = [p]
+        paths.extend(found)
+    seen = set()
+    unique: List[Path] = []
+    for p in paths:
+        key = os.path.normcase(str(p.resolve()))
+        if key not in seen:
+            seen.add(key)
+            unique.append(p)
+    return unique
+
+
+def _parse_one(
+    pdf_path: str,
+    cache_dir: Optional[str],
+    entity_dir: Optional[str] = None,
+    timings: bool = False,
+    backend: Optional[str] = None,
+    limits: Optional[Limits] = None,
+    entities: bool = False,
+) -> BatchResult:
+    """Worker: parsea un PDF y nunca lanza; los errores van en BatchResult.error."""
+    t0 = time.perf_counter()
+    timer = StageTimer() if timings else None
+    try:
+        cache = ResultCache(cache_dir) if cache_dir else None
+        store = EntityStore(entity_dir) if entity_dir else None
+        stats: dict = {}
+        days = parse_pdf(pdf_path, cache=cache, entity_store=store, timer=timer, backend=backend,
+                         limits=limits, stats=stats)
+        if not days:
+            res = BatchResult(pdf_path, ok=False, error="No se detectaron días en el PDF.")
+        else:
+            res = BatchResult(pdf_path, ok=True, days=days)
+            if entities:
+                # Las del parseo; en un acierto de caché, las guardadas o (sin store) se extraen aquí
+                res.entities = stats.get("day_entities")
+                if res.entities is None:
+                    res.entities = pdf_entities(pdf_path, entity_store=store, backend=backend, limits=limits)
+        res.partial = partial_info(stats)
+    except Exception as e:
+        res = BatchResult(pdf_path, ok=False, error=f"{type(e).__name__}: {e}")
+    res.elapsed_s = time.perf_counter() - t0
+    if timer is not None:
+        res.timings = timer.to_dict()
+    return res
+
+
+def run_batch(
+    pdf_paths: List[Path],
+    jobs: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    entity_dir: Optional[str] = None,
+    timings: bool = False,
+    backend: Optional[str] = None,
+    limits: Optional[Limits] = None,
+    entities: bool = False,
+) -> Iterator[BatchResult]:
+    """
+    Parsea los PDFs en `jobs` procesos (None/0 = uno por CPU; 1 = en este proceso).
+    Devuelve los resultados en el mismo orden que pdf_paths. cache_dir / entity_dir
+    activan la caché de resultados y el guardado de entidades (pipeline/serialize.py).
+    timings rellena BatchResult.timings (el pico de memoria es el del proceso worker).
+    backend: motor de extracción de texto (ver pipeline/backends.py).
+    limits: límites de la extracción de cada PDF (por defecto los de config, tomados aquí
+    y no en cada worker; ver pipeline/guards.py). BatchResult.partial marca los parciales.
+    entities rellena BatchResult.entities en el worker (para --detail o el histórico, sin
+    volver a extraer cada PDF en este proceso).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    if limits is None:
+        limits = Limits.from_config()
+    names = [str(p) for p in pdf_paths]
+    if jobs <= 1 or len(names) <= 1:
+        for name in names:
+            yield _parse_one(name, cache_dir, entity_dir, timings, backend, limits, entities)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(names))) as pool:
+        n = len(names)
+        yield from pool.map(_parse_one, names, [cache_dir] * n, [entity_dir] * n, [timings] * n,
+                            [backend] * n, [limits] * n, [entities] * n)
+
+
+def merge_days(results: Iterable[BatchResult]) -> List[dict]:
+    """
+    Une los días de todos los PDFs correctos en una sola lista ordenada por fecha.
+    Si una fecha aparece en varios PDFs (rangos solapados), gana el PDF posterior en
+    el orden del lote (ej. la versión más reciente del cuadrante).
+    """
+    by_date: dict = {}
+    for res in results:
+        if not res.ok:
+            continue
+        for day in res.days:
+            by_date[day["date"]] = day
+    return [by_date[d] for d in sorted(by_date)]
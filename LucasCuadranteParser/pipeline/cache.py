@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Caché en disco de resultados: PDF ya parseado -> JSON Lucas final.
+
+Clave = SHA-256 del contenido del PDF + huella de la configuración que afecta al
+resultado (SHIFT_WINDOWS, MIN_HOURS_IN_SHIFT, SHIFT_NAMES, ROLE_TO_AREA y
+PARSER_VERSION). Volver a subir el mismo PDF con la misma configuración devuelve el
+JSON guardado sin extraer texto. Un fichero <clave>.json por entrada; expulsión LRU
+(por fecha de último acceso) cuando se supera el número de entradas o el tamaño total.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from pathlib import Path
+from typing import List, Optional, Union
+
+import config
+from .backends import DEFAULT_BACKEND
+
+DEFAULT_MAX_ENTRIES = 500
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def pdf_sha256(pdf_path) -> str:
+    """
+    SHA-256 (hex) del contenido del PDF: fichero leído por bloques, o PDF en memoria
+    (bytes, mmap, fichero binario con seek; ver ingest.as_pdf_source).
+    """
+    if isinstance(pdf_path, (bytes, bytearray, memoryview, mmap.mmap)):
+        return hashlib.sha256(pdf_path).hexdigest()
+    h = hashlib.sha256()
+    if hasattr(pdf_path, "read"):
+        pos = pdf_path.tell()
+        pdf_path.seek(0)
+        for chunk in iter(lambda: pdf_path.read(1 << 20), b""):
+            h.update(chunk)
+        pdf_path.seek(pos)
+        return h.hexdigest()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def config_fingerprint() -> str:
+    """Huella (hex corto) de la configuración que influye en el JSON de salida."""
+    payload = {
+        "version": config.PARSER_VERSION,
+        "shift_windows": {
+            name: [t0.strftime("%H:%M"), t1.strftime("%H:%M")]
+            for name, (t0, t1) in config.SHIFT_WINDOWS.items()
+        },
+        "min_hours": config.MIN_HOURS_IN_SHIFT,
+        "shift_names": list(config.SHIFT_NAMES),
+        # Lista de pares: el orden de ROLE_TO_AREA importa (claves más específicas primero)
+        "role_to_area": list(config.ROLE_TO_AREA.items()),
+        # El texto recortado a la tabla puede cambiar algún puesto de un descanso (ver region.py)
+        "crop_to_table": config.CROP_TO_TABLE,
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class ResultCache:
+    """Caché LRU en disco de resultados to_lucas_week por PDF."""
+
+    def __init__(
+        self,
+        cache_dir: Union[str, Path],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def key_for(self, pdf_path: Union[str, Path], sha256: Optional[str] = None, backend: Optional[str] = None) -> str:
+        """
+        Clave del PDF con la configuración actual (sha256: hash ya calculado, para no releer el PDF).
+        Un motor de extracción distinto del de por defecto lleva su propia entrada.
+        """
+        key = f"{sha256 or pdf_sha256(pdf_path)}-{config_fingerprint()}"
+        if backend and backend != DEFAULT_BACKEND:
+            key += f"-{backend}"
+        return key
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """Devuelve el resultado guardado o None. Un acierto renueva su fecha de acceso (LRU)."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError):
+            # Entrada corrupta (escritura interrumpida, disco lleno...): se descarta
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, week_data: List[dict]) -> None:
+        """Guarda el resultado (escritura atómica) y aplica la expulsión LRU."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(week_data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(size for _mtime, size, _path in entries)
+        count = len(entries)
+        for _mtime, size, path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            count -= 1
+            total -= size
@@ -7,10 +7,13 @@ Lógica principal: horario a horario. Las horas se calculan desde cada rango
 la suma de esas duraciones (sin contar descansos/ausencias).
 """
 
+import os
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from operator import attrgetter
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from .segment import DayBlock
 
@@ -22,21 +25,60 @@ KNOWN_ROLE_KEYWORDS = (
     "cocinero", "cocinera", "chef oper", "chef operativo", "soporte",
 )
 
+# Extracción en paralelo (extract_entities_from_day_blocks(workers=N), solo si se pide):
+# por debajo de este número de bloques (días) se hace en secuencia. 60 es una estimación,
+# no un cruce medido: benchmarks/bench_entities.py solo se ha pasado en una máquina de una
+# CPU, donde el reparto nunca gana; hay que medirlo con varios núcleos antes de ajustarlo
+PARALLEL_MIN_BLOCKS = 60
+# Trozos por worker: reparte mejor días de tamaño desigual sin multiplicar el coste por tarea
+CHUNKS_PER_WORKER = 2
+
+# Expresiones de línea, compiladas una vez (las usa classify_line)
 RE_TOTAL_HOURS = re.compile(r"(\d{1,2})h(\d{2})\s*$", re.IGNORECASE)
 RE_TIME_RANGE = re.compile(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})", re.IGNORECASE)
 RE_DURATION_ONLY = re.compile(r"\((\d+)h\)\s*$", re.IGNORECASE)
-
-
-@dataclass
+RE_COUNT_ROW = re.compile(r"^[\d\s]+$")
+RE_SAME_LINE_HOURS = re.compile(r"^(.+?)\s+(\d{1,2})h(\d{2})\s*$", re.IGNORECASE)
+# Cabecera del día o tabla: "Lunes 9 febrero 0h 1h ..." (Mi.?rcoles / S.?bado por encoding PDF)
+RE_DAY_HEADER = re.compile(r"^(Lunes|Martes|Mi.?rcoles|Jueves|Viernes|S.?bado|Domingo)\s+\d", re.IGNORECASE)
+RE_PAGE_FOOTER = re.compile(r"^--\s*\d+ of \d+")
+RE_PAREN_HOURS = re.compile(r"\(\d+h\)")
+RE_HHMM = re.compile(r"\d{1,2}h\d{2}")
+RE_TRAILING_DURATION = re.compile(r"\s*\(\d+h\)\s*$", re.IGNORECASE)
+RE_ESTABLISHMENT_NAME = re.compile(r"^[A-Za-záéíóúÁÉÍÓÚñÑ]+$")
+
+# Motor de puestos, construido una vez: palabras clave de más larga a más corta (precedencia
+# "más específico primero", ej. "segundo de cocina" antes que "segundo") y una sola regex
+# con lookahead que encuentra todas las palabras clave presentes en una pasada (aunque se solapen).
+_ROLE_KEYWORDS_BY_LEN = tuple(sorted(KNOWN_ROLE_KEYWORDS, key=len, reverse=True))
+_ROLE_KEYWORD_RANK = {kw: k for k, kw in enumerate(_ROLE_KEYWORDS_BY_LEN)}
+_RE_ROLE_KEYWORDS = re.compile("(?=(" + "|".join(re.escape(kw) for kw in _ROLE_KEYWORDS_BY_LEN) + "))")
+_RE_TRAILING_TOTAL = re.compile(r"\s*\d{1,2}h\d{2}\s*$", re.IGNORECASE)
+# Palabras que cortan el nombre en "Nombre Rol XXhYY" (empleado en una sola línea)
+_NAME_STOP_WORDS = frozenset((
+    "descanso", "semanal", "compensatorio", "abs", "ausencia", "chef", "operativo", "oper", "manager",
+    "camarero", "camarera", "cocinero", "cocinera", "jefe", "segundo", "supervisor", "soporte",
+))
+
+
+@dataclass(frozen=True, slots=True)
 class ParsedEmployee:
     """Empleado con horas totales del día."""
     name: str
     total_hours: float
 
+    def __reduce__(self):
+        # Pickle por tupla de campos (procesos worker): ~2x más rápido que el estado por __slots__
+        return ParsedEmployee, _EMPLOYEE_FIELDS(self)
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class ParsedShift:
-    """Turno: rol + rango horario (o descanso/ausencia)."""
+    """
+    Turno: rol + rango horario (o descanso/ausencia). Inmutable y con __slots__ (sin
+    __dict__ por instancia): en re-agregaciones de histórico hay millones. Para lotes
+    grandes, pipeline/table.ShiftTable guarda los mismos datos por columnas.
+    """
     role: str
     start_h: int
     start_m: int
@@ -50,8 +92,16 @@ class ParsedShift:
     # Si la línea tiene "Ausencia injustificada XXhYY", tope de horas a contar para ese empleado ese día
     max_hours_cap: Optional[float] = None
 
+    def __reduce__(self):
+        return ParsedShift, _SHIFT_FIELDS(self)
+
+
+# Campos en el orden del constructor (dataclasses.fields): __reduce__ sigue a la clase si cambia
+_EMPLOYEE_FIELDS = attrgetter(*(f.name for f in fields(ParsedEmployee)))
+_SHIFT_FIELDS = attrgetter(*(f.name for f in fields(ParsedShift)))
+
 
-@dataclass
+@dataclass(slots=True)
 class DayEntities:
     """Entidades extraídas de un día."""
     date_iso: str
@@ -118,14 +168,148 @@ def _is_other_establishment(role: str) -> bool:
     if not first_word or len(first_word) > 30:
         return False
     # Nombre de establecimiento: solo letras (ej. CENTRIC, MOLINA)
-    if re.match(r"^[A-Za-záéíóúÁÉÍÓÚñÑ]+$", first_word) and len(first_word) >= 2:
+    if RE_ESTABLISHMENT_NAME.match(first_word) and len(first_word) >= 2:
         return True
     return False
 
 
+def _normalize_role_candidate(cand: str) -> str:
+    """Quita sufijo HHhMM de líneas tipo 'Manager 08h00' para usar solo el rol."""
+    s = _RE_TRAILING_TOTAL.sub("", cand.strip()).strip()
+    return s or cand.strip()
+
+
+# Las mismas líneas de rol ("Jose Camarero/a 08h00", "Manager"...) se repiten en todos los
+# días del mes: se memoriza el resultado por línea.
+@lru_cache(maxsize=8192)
+def _extract_known_role(ln: str) -> str:
+    """De una línea tipo 'Guillermo Manager 08h00' extrae solo el puesto conocido ('Manager')."""
+    s = _normalize_role_candidate(ln).lower()
+    if not s:
+        return ""
+    found = _RE_ROLE_KEYWORDS.findall(s)
+    if found:
+        orig = ln.lower()
+        for kw in sorted(set(found), key=_ROLE_KEYWORD_RANK.__getitem__):
+            orig_idx = orig.find(kw)
+            if orig_idx >= 0:
+                best = ln[orig_idx : orig_idx + len(kw)]
+                if best:
+                    return best.strip()
+        # Solo con mayúsculas/minúsculas Unicode que cambian de longitud: recorrido completo
+        for kw in _ROLE_KEYWORDS_BY_LEN:
+            if kw in s:
+                orig_idx = orig.find(kw)
+                if orig_idx >= 0:
+                    best = ln[orig_idx : orig_idx + len(kw)]
+                    if best:
+                        return best.strip()
+    return _normalize_role_candidate(ln)
+
+
+@lru_cache(maxsize=8192)
+def _looks_like_role(ln: str) -> bool:
+    """True si la línea parece un puesto conocido (Manager, Camarero/a, etc.)."""
+    s = _normalize_role_candidate(ln).lower()
+    if not s:
+        return False
+    return _RE_ROLE_KEYWORDS.search(s) is not None
+
+
+@dataclass(frozen=True, slots=True)
+class LineFeatures:
+    """
+    Una línea del bloque clasificada una sola vez (classify_line): lo que las etapas de
+    empleados y turnos necesitan saber de ella, sin volver a pasarle expresiones regulares.
+    """
+    text: str
+    time_ranges: Tuple[Tuple[int, int, int, int], ...] = ()  # (h0, m0, h1, m1) de cada "HH:MM - HH:MM"
+    duration: Optional[int] = None  # "(8h)" al final de la línea
+    has_paren_hours: bool = False  # "(8h)" en cualquier posición
+    has_hhmm: bool = False  # "08h00" en cualquier posición
+    total_hours: Optional[float] = None  # "XXhYY" al final (total del empleado)
+    # Empleado en una sola línea "Nombre ... XXhYY" (sin rangos horarios): (texto previo, hh, mm)
+    same_line_total: Optional[Tuple[str, int, int]] = None
+    without_total: str = ""  # la línea sin el "XXhYY" final
+    is_day_header: bool = False  # "Lunes 9 febrero 0h 1h ..."
+    is_table_header: bool = False  # fila de la tabla con tabuladores y "Total"
+    is_count_row: bool = False  # solo números (fila de "Total empleados")
+    is_skip: bool = False  # "Notas..." o pie de página "-- 1 of 3"
+    role_candidate: bool = False  # parece un puesto conocido y no es horario ni duración
+    role: str = ""  # puesto conocido de la línea (si role_candidate)
+    other_establishment: bool = False  # "... - MOLINA"
+    indicates_absence: bool = False  # "descanso semanal", "ausencia injustificada"...
+    absence_cap: Optional[float] = None  # "Ausencia injustificada XXhYY": tope de horas
+
+    @property
+    def is_time_or_duration(self) -> bool:
+        return bool(self.time_ranges) or self.duration is not None
+
+
+# Las líneas de puesto, "Sin asignar -", "Total empleados ..." se repiten en todos los días
+@lru_cache(maxsize=16384)
+def classify_line(text: str) -> LineFeatures:
+    """
+    Clasifica una línea (ya sin espacios en los extremos) en una pasada. Cada expresión
+    solo se evalúa si la línea contiene el carácter que la delata (":" para horarios,
+    "(" para duraciones, "h" para totales).
+    """
+    time_ranges: tuple = ()
+    if ":" in text:
+        time_ranges = tuple(
+            (int(m.group(1)), int(m.group(2)), int(m.group(3)), int(m.group(4)))
+            for m in RE_TIME_RANGE.finditer(text)
+        )
+    duration = None
+    has_paren_hours = False
+    if "(" in text:
+        m = RE_DURATION_ONLY.search(text)
+        duration = int(m.group(1)) if m else None
+        has_paren_hours = RE_PAREN_HOURS.search(text) is not None
+    has_hhmm = False
+    total_hours = None
+    same_line_total = None
+    without_total = text
+    if "h" in text or "H" in text:
+        has_hhmm = RE_HHMM.search(text) is not None
+        m = RE_TOTAL_HOURS.search(text)
+        if m:
+            total_hours = int(m.group(1)) + int(m.group(2)) / 60.0
+            without_total = _RE_TRAILING_TOTAL.sub("", text).strip()
+        m = RE_SAME_LINE_HOURS.match(text)
+        # No es un empleado en una línea si mezcla turnos con totales (rango horario o línea larga con "(8h)")
+        if m and not time_ranges and not (len(m.group(1)) > 40 and has_paren_hours):
+            same_line_total = (m.group(1).strip(), int(m.group(2)), int(m.group(3)))
+    is_time_or_duration = bool(time_ranges) or duration is not None
+    role_candidate = not is_time_or_duration and _looks_like_role(text)
+    lower = text.lower()
+    absence_cap = None
+    if total_hours is not None and "ausencia injustificada" in lower:
+        absence_cap = total_hours
+    return LineFeatures(
+        text=text,
+        time_ranges=time_ranges,
+        duration=duration,
+        has_paren_hours=has_paren_hours,
+        has_hhmm=has_hhmm,
+        total_hours=total_hours,
+        same_line_total=same_line_total,
+        without_total=without_total,
+        is_day_header=RE_DAY_HEADER.match(text) is not None,
+        is_table_header="\t" in text and "Total" in text,
+        is_count_row=RE_COUNT_ROW.match(text) is not None,
+        is_skip=text.startswith("Notas") or (text.startswith("--") and RE_PAGE_FOOTER.match(text) is not None),
+        role_candidate=role_candidate,
+        role=_extract_known_role(text) if role_candidate else "",
+        other_establishment=_is_other_establishment(text),
+        indicates_absence=_line_indicates_absence(text),
+        absence_cap=absence_cap,
+    )
+
+
 def duration_hours(ps: "ParsedShift") -> float:
     """Horario a horario: duración del rango (11-16 = 5h, 19-23 = 4h; si pasa medianoche, ej. 20-01 = 5h). Descansos y otros establecimientos = 0."""
-    if ps.is_rest_or_absence or getattr(ps, "is_other_establishment", False):
+    if ps.is_rest_or_absence or ps.is_other_establishment:
         return 0.0
     start_min = ps.start_h * 60 + ps.start_m
     end_min = ps.end_h * 60 + ps.end_m
@@ -134,221 +318,216 @@ def duration_hours(ps: "ParsedShift") -> float:
     return (end_min - start_min) / 60.0
 
 
-def extract_entities_from_day_blocks(
-    day_blocks: List[DayBlock],
-    year_from_week: Optional[int] = None,
-) -> List[DayEntities]:
+def extract_day_entities(block: DayBlock, year: int) -> DayEntities:
     """
-    Extrae de cada DayBlock: fecha, empleados con horas totales, y lista plana de
-    turnos (rol + rango horario o descanso). year_from_week puede venir del rango
-    de la cabecera del PDF.
+    Extrae de un DayBlock: fecha (con el año dado), empleados con horas totales y
+    lista plana de turnos (rol + rango horario o descanso).
     """
-    current_year = year_from_week or datetime.now().year
-    result: List[DayEntities] = []
-
-    for block in day_blocks:
-        try:
-            d = _build_date(block.day_num, block.month_name, current_year)
-        except ValueError:
-            d = date(current_year, 1, 1)
-        date_iso = d.isoformat()
-        lines = [ln.strip() for ln in block.raw_text.split("\n") if ln.strip()]
-
-        # Empleados: pares Nombre / Apellidos HHhMM o una sola línea "Nombre ... XXhYY". No parar en
-        # "Total empleados" porque hay más empleados en la página siguiente (mismo día).
-        RE_COUNT_ROW = re.compile(r"^[\d\s]+$")
-        RE_SAME_LINE_HOURS = re.compile(r"^(.+?)\s+(\d{1,2})h(\d{2})\s*$", re.IGNORECASE)
-        employees: List[ParsedEmployee] = []
-        employee_line_names: List[tuple] = []  # (line_index, name) para asociar rangos a persona
-        i = 0
-        while i < len(lines):
-            line = lines[i]
-            if "Total empleados" in line:
-                i += 1
-                # Números pueden estar en la misma línea ("Total empleados 0 0 ...") o en la siguiente
-                if i < len(lines) and RE_COUNT_ROW.match(lines[i].strip()):
-                    i += 1
-                continue
-            # Cabecera del día o tabla: "Lunes 9 febrero 0h 1h ..." (Mi.?rcoles / S.?bado por encoding PDF)
-            if re.match(r"^(Lunes|Martes|Mi.?rcoles|Jueves|Viernes|S.?bado|Domingo)\s+\d", line, re.I):
-                i += 1
-                continue
-            if "\t" in line and "Total" in line:
-                i += 1
-                continue
-            # Una sola línea con XXhYY al final (ej. "Ivan Descanso semanal 00h00", "Chef Oper Chef Operativo 08h00").
-            # No tratar como single-line si la línea mezcla turnos con totales (rango horario o línea larga con "(8h)").
-            m_single = RE_SAME_LINE_HOURS.match(line)
-            if m_single and (
-                re.search(r"\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}", line)
-                or (len(m_single.group(1)) > 40 and re.search(r"\(\d+h\)", line))
-            ):
-                m_single = None
-            if m_single and "Total empleados" not in line and "Sin asignar" not in line:
-                pre, hh, mm = m_single.group(1).strip(), int(m_single.group(2)), int(m_single.group(3))
-                total_h = hh + mm / 60.0
-                # Nombre: primeros tokens antes de rol conocido
-                tokens = pre.split()
-                name_tokens = []
-                for t in tokens:
-                    if t.lower() in ("descanso", "semanal", "compensatorio", "abs", "ausencia", "chef", "operativo", "oper", "manager", "camarero", "camarera", "cocinero", "cocinera", "jefe", "segundo", "supervisor", "soporte") and len(name_tokens) >= 1:
-                        break
-                    name_tokens.append(t)
-                name = " ".join(name_tokens) if name_tokens else (pre.split()[0] if pre.split() else pre)
-                if name and len(name) < 50:
-                    employees.append(ParsedEmployee(name=name, total_hours=total_h))
-                    employee_line_names.append((i, name))
-                i += 1
-                continue
-            # Par de líneas: Nombre / Apellidos XXhYY. No emparejar si first es un turno (rango horario o (8h)).
-            if i + 1 >= len(lines):
-                i += 1
-                continue
-            first, second = lines[i], lines[i + 1]
-            if "," in first and len(first) > 50:
-                i += 1
-                continue
-            if re.search(r"\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}", first) or re.search(r"\(\d+h\)", first):
+    try:
+        d = _build_date(block.day_num, block.month_name, year)
+    except ValueError:
+        d = date(year, 1, 1)
+    date_iso = d.isoformat()
+    raw_lines = block.lines if block.lines is not None else block.raw_text.split("\n")
+    lines = [ln.strip() for ln in raw_lines if ln.strip()]
+    feats = [classify_line(ln) for ln in lines]
+    n = len(lines)
+
+    # Empleados: pares Nombre / Apellidos HHhMM o una sola línea "Nombre ... XXhYY". No parar en
+    # "Total empleados" porque hay más empleados en la página siguiente (mismo día).
+    employees: List[ParsedEmployee] = []
+    employee_line_names: List[tuple] = []  # (line_index, name) para asociar rangos a persona
+    i = 0
+    while i < n:
+        line = lines[i]
+        f = feats[i]
+        if "Total empleados" in line:
+            i += 1
+            # Números pueden estar en la misma línea ("Total empleados 0 0 ...") o en la siguiente
+            if i < n and feats[i].is_count_row:
                 i += 1
-                continue
-            total_h = _parse_total_hours(second)
-            if re.search(r"\d{1,2}h\d{2}", second):
-                # Python 3.11 no permite backslashes dentro de la expresión de un f-string;
-                # limpiamos la segunda línea primero y luego construimos el nombre.
-                clean_second = re.sub(r"\s*\d{1,2}h\d{2}\s*$", "", second, flags=re.I).strip()
-                name = f"{first} {clean_second}".strip()
-                if name and not name.startswith("Total empleados") and "Sin asignar" not in name and len(name) < 80:
-                    employees.append(ParsedEmployee(name=name, total_hours=total_h))
-                    employee_line_names.append((i, name))
-                i += 2
-                continue
+            continue
+        if f.is_day_header or f.is_table_header:
             i += 1
-
-        # Última persona "activa" por línea (para asociar cada rango horario a la persona correcta)
-        employee_at_line: List[Optional[str]] = [None] * len(lines)
-        current_name: Optional[str] = None
-        for idx in range(len(lines)):
-            for (j, name) in reversed(employee_line_names):
-                if j <= idx:
-                    current_name = name
+            continue
+        # Una sola línea con XXhYY al final (ej. "Ivan Descanso semanal 00h00", "Chef Oper Chef Operativo 08h00").
+        if f.same_line_total and "Sin asignar" not in line:
+            pre, hh, mm = f.same_line_total
+            total_h = hh + mm / 60.0
+            # Nombre: primeros tokens antes de rol conocido
+            tokens = pre.split()
+            name_tokens = []
+            for t in tokens:
+                if t.lower() in _NAME_STOP_WORDS and len(name_tokens) >= 1:
                     break
-            employee_at_line[idx] = current_name
-
-        # Turnos: en el PDF extraído por pdfplumber, rol+hora están entremezclados con la lista de
-        # empleados (línea "Nombre Rol 08h00", siguiente "APELLIDOS 16:00 - 00:00"). También pueden
-        # aparecer después de "Equipos:" / "Empleados:". Recorremos todo el bloque desde la línea 1
-        # (tras la cabecera del día) para capturar todos los rangos horarios.
-        shifts: List[ParsedShift] = []
-        parse_start = 1  # saltar línea 0 (cabecera "Lunes 9 febrero 0h 1h ...")
-        def _is_time_or_duration(ln: str) -> bool:
-            return bool(RE_TIME_RANGE.search(ln)) or bool(RE_DURATION_ONLY.search(ln))
-
-        def _normalize_role_candidate(cand: str) -> str:
-            """Quita sufijo HHhMM de líneas tipo 'Manager 08h00' para usar solo el rol."""
-            s = re.sub(r"\s*\d{1,2}h\d{2}\s*$", "", cand.strip(), flags=re.I).strip()
-            return s or cand.strip()
-
-        def _extract_known_role(ln: str) -> str:
-            """De una línea tipo 'Guillermo Manager 08h00' extrae solo el puesto conocido ('Manager')."""
-            s = _normalize_role_candidate(ln).lower()
-            if not s:
-                return ""
-            best = ""
-            for kw in sorted(KNOWN_ROLE_KEYWORDS, key=len, reverse=True):
-                if kw in s:
-                    idx = s.find(kw)
-                    orig = ln.lower()
-                    orig_idx = orig.find(kw)
-                    if orig_idx >= 0:
-                        best = ln[orig_idx : orig_idx + len(kw)]
-                        if best:
-                            return best.strip()
-            return _normalize_role_candidate(ln)
-
-        def _looks_like_role(ln: str) -> bool:
-            """True si la línea parece un puesto conocido (Manager, Camarero/a, etc.)."""
-            s = _normalize_role_candidate(ln).lower()
-            if not s:
-                return False
-            return any(kw in s for kw in KNOWN_ROLE_KEYWORDS)
-
-        def _find_role_line(idx: int) -> str:
-            """Busca hacia atrás la última línea que sea un rol conocido (no hora, duración ni nombre)."""
-            for j in range(idx - 1, -1, -1):
-                cand = lines[j].strip()
-                if not cand or cand.startswith("Notas") or re.match(r"^--\s*\d+ of \d+", cand):
-                    continue
-                if _is_time_or_duration(cand):
-                    continue
-                if RE_TOTAL_HOURS.search(cand) and not _looks_like_role(cand):
-                    continue
-                if not _looks_like_role(cand):
-                    continue
-                return _extract_known_role(cand)
-            return ""
-
-        i = parse_start
-        while i < len(lines):
-            line = lines[i]
-            if not line or line.startswith("Notas") or re.match(r"^--\s*\d+ of \d+", line):
-                i += 1
-                continue
-            # En el PDF: cada empleado suele ser "Nombre Role TotalH" + "APELLIDOS HH:MM - HH:MM". El rol está en la línea ANTERIOR.
-            # Solo usar la línea siguiente como rol cuando la anterior no tiene rol (layout "horario\nrol").
-            role = _find_role_line(i)
-            if not role and i + 1 < len(lines):
-                next_ln = lines[i + 1].strip()
-                if next_ln and _looks_like_role(next_ln) and not _is_time_or_duration(next_ln):
-                    role = _extract_known_role(next_ln) or next_ln
+                name_tokens.append(t)
+            name = " ".join(name_tokens) if name_tokens else (tokens[0] if tokens else pre)
+            if name and len(name) < 50:
+                employees.append(ParsedEmployee(name=name, total_hours=total_h))
+                employee_line_names.append((i, name))
+            i += 1
+            continue
+        # Par de líneas: Nombre / Apellidos XXhYY. No emparejar si first es un turno (rango horario o (8h)).
+        if i + 1 >= n:
+            i += 1
+            continue
+        if "," in line and len(line) > 50:
+            i += 1
+            continue
+        if f.time_ranges or f.has_paren_hours:
+            i += 1
+            continue
+        second = feats[i + 1]
+        if second.has_hhmm:
+            name = f"{line} {second.without_total}".strip()
+            if name and not name.startswith("Total empleados") and "Sin asignar" not in name and len(name) < 80:
+                employees.append(ParsedEmployee(name=name, total_hours=second.total_hours or 0.0))
+                employee_line_names.append((i, name))
+            i += 2
+            continue
+        i += 1
+
+    # Última persona "activa" por línea (para asociar cada rango horario a la persona correcta).
+    # Una pasada hacia delante: employee_line_names está ordenada por línea.
+    employee_at_line: List[Optional[str]] = [None] * n
+    current_name: Optional[str] = None
+    next_emp = 0
+    for idx in range(n):
+        while next_emp < len(employee_line_names) and employee_line_names[next_emp][0] <= idx:
+            current_name = employee_line_names[next_emp][1]
+            next_emp += 1
+        employee_at_line[idx] = current_name
+
+    # Turnos: en el PDF extraído por pdfplumber, rol+hora están entremezclados con la lista de
+    # empleados (línea "Nombre Rol 08h00", siguiente "APELLIDOS 16:00 - 00:00"). También pueden
+    # aparecer después de "Equipos:" / "Empleados:". Recorremos todo el bloque desde la línea 1
+    # (tras la cabecera del día) para capturar todos los rangos horarios.
+    shifts: List[ParsedShift] = []
+    parse_start = 1  # saltar línea 0 (cabecera "Lunes 9 febrero 0h 1h ...")
+
+    # Último rol conocido antes de cada línea (no hora, duración ni nombre), en una sola
+    # pasada hacia delante: role_before[idx] = rol de la última línea j < idx que lo sea.
+    role_before: List[str] = [""] * n
+    last_role = ""
+    for idx, f in enumerate(feats):
+        role_before[idx] = last_role
+        if f.role_candidate and not f.is_skip:
+            last_role = f.role
+
+    for i in range(parse_start, n):
+        f = feats[i]
+        # Solo las líneas con horario o duración generan turnos
+        if f.is_skip or not f.is_time_or_duration:
+            continue
+        line = lines[i]
+        # En el PDF: cada empleado suele ser "Nombre Role TotalH" + "APELLIDOS HH:MM - HH:MM". El rol está en la línea ANTERIOR.
+        # Solo usar la línea siguiente como rol cuando la anterior no tiene rol (layout "horario\nrol").
+        role = role_before[i]
+        if not role and i + 1 < n and feats[i + 1].role_candidate:
+            role = feats[i + 1].role or lines[i + 1]
+        emp_name = employee_at_line[i]
+        prev = feats[i - 1] if i > 0 else None
+        role_line_prev = prev.text if prev else ""
+        if f.time_ranges:
             # Turno partido: una línea puede tener varios rangos (ej. "12:00 - 16:00 20:00 - 00:00")
-            # = misma persona hace 2 turnos el mismo día; creamos un ParsedShift por cada rango
-            emp_name = employee_at_line[i] if i < len(employee_at_line) else None
+            # = misma persona hace 2 turnos el mismo día; creamos un ParsedShift por cada rango.
             # Para detectar "otro establecimiento" (ej. "Camarero/a - CENTRIC") usamos la línea del rol y la actual
-            role_line_full = (lines[i - 1].strip() if i > 0 else "") + " " + line
-            role_line_prev = (lines[i - 1].strip() if i > 0 else "")
+            role_line_full = role_line_prev + " " + line
             # Si "Ausencia injustificada XXhYY", usar XXhYY como tope de horas para ese empleado (no excluir)
-            cap_hours: Optional[float] = None
-            if "ausencia injustificada" in role_line_prev.lower():
-                cap_m = RE_TOTAL_HOURS.search(role_line_prev)
-                if cap_m:
-                    cap_hours = int(cap_m.group(1)) + int(cap_m.group(2)) / 60.0
-            for tr in RE_TIME_RANGE.finditer(line):
-                sh, sm = int(tr.group(1)), int(tr.group(2))
-                eh, em = int(tr.group(3)), int(tr.group(4))
-                crosses = (eh < sh) or (eh == 0 and em == 0)
-                use_role = role or (lines[i - 1].strip() if i > 0 else line)
-                # Ausencia: comprobar también la línea del rol; usar frases completas para la línea previa
-                # (ej. "Guillermo Manager Ausencia injustificada 05h30") para no marcar "Abs Camarero/a" como ausencia
-                rest = _is_rest_or_absence(use_role) or _line_indicates_absence(role_line_full) or _line_indicates_absence(role_line_prev)
-                # Si hay tope por "Ausencia injustificada XXhYY", no marcar como rest (contamos con tope)
-                if cap_hours is not None:
-                    rest = False
-                # "Sin asignar" no cuenta (ej. "Sin asignar Supervisor 18:00-23:00")
-                if "sin asignar" in role_line_full.lower() or "sin asignar" in line.lower():
-                    rest = True
-                other_est = _is_other_establishment(role_line_full) or _is_other_establishment(line) or _is_other_establishment(use_role)
+            cap_hours = prev.absence_cap if prev else None
+            use_role = role or (role_line_prev if i > 0 else line)
+            # Ausencia: comprobar también la línea del rol; usar frases completas para la línea previa
+            # (ej. "Guillermo Manager Ausencia injustificada 05h30") para no marcar "Abs Camarero/a" como ausencia
+            rest = (
+                _is_rest_or_absence(use_role)
+                or _line_indicates_absence(role_line_full)
+                or (prev is not None and prev.indicates_absence)
+            )
+            # Si hay tope por "Ausencia injustificada XXhYY", no marcar como rest (contamos con tope)
+            if cap_hours is not None:
+                rest = False
+            # "Sin asignar" no cuenta (ej. "Sin asignar Supervisor 18:00-23:00")
+            if "sin asignar" in role_line_full.lower():
+                rest = True
+            other_est = (
+                _is_other_establishment(role_line_full)
+                or f.other_establishment
+                or _is_other_establishment(use_role)
+            )
+            for sh, sm, eh, em in f.time_ranges:
                 shifts.append(ParsedShift(
                     role=use_role,
                     start_h=sh, start_m=sm, end_h=eh, end_m=em,
-                    crosses_midnight=crosses,
+                    crosses_midnight=(eh < sh) or (eh == 0 and em == 0),
                     is_rest_or_absence=rest,
                     is_other_establishment=other_est,
                     employee_name=emp_name,
                     max_hours_cap=cap_hours,
                 ))
-            duration_m = RE_DURATION_ONLY.search(line)
-            if duration_m and not RE_TIME_RANGE.search(line):
-                use_role = role or (lines[i - 1].strip() if i > 0 else re.sub(r"\s*\(\d+h\)\s*$", "", line, flags=re.I).strip())
-                other_est = _is_other_establishment(use_role)
-                shifts.append(ParsedShift(
-                    role=use_role,
-                    start_h=0, start_m=0, end_h=0, end_m=0,
-                    is_rest_or_absence=True,
-                    is_other_establishment=other_est,
-                    duration_hours=float(duration_m.group(1)),
-                    employee_name=emp_name,
-                ))
-            i += 1
+        elif f.duration is not None:
+            use_role = role or (role_line_prev if i > 0 else RE_TRAILING_DURATION.sub("", line).strip())
+            shifts.append(ParsedShift(
+                role=use_role,
+                start_h=0, start_m=0, end_h=0, end_m=0,
+                is_rest_or_absence=True,
+                is_other_establishment=_is_other_establishment(use_role),
+                duration_hours=float(f.duration),
+                employee_name=emp_name,
+            ))
+
+    return DayEntities(date_iso=date_iso, employees=employees, shifts=shifts)
+
+
+def entity_year(year_from_week: Optional[int]) -> int:
+    """Año de las fechas: el de la cabecera de semana (segment.week_year) o, sin ella, el actual."""
+    return year_from_week or datetime.now().year
+
 
-        result.append(DayEntities(date_iso=date_iso, employees=employees, shifts=shifts))
-    return result
+def iter_day_entities(
+    day_blocks: Iterable[DayBlock],
+    year_from_week: Optional[int] = None,
+) -> Iterator[DayEntities]:
+    """Versión perezosa de extract_entities_from_day_blocks: un DayEntities por bloque, según llegan."""
+    current_year = entity_year(year_from_week)
+    for block in day_blocks:
+        yield extract_day_entities(block, current_year)
+
+
+def _extract_chunk(day_blocks: List[DayBlock], year: int) -> List[DayEntities]:
+    """Worker: entidades de un trozo contiguo de bloques, con el año ya decidido por el proceso principal."""
+    return [extract_day_entities(block, year) for block in day_blocks]
+
+
+def extract_entities_from_day_blocks(
+    day_blocks: List[DayBlock],
+    year_from_week: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> List[DayEntities]:
+    """
+    Extrae de cada DayBlock: fecha, empleados con horas totales, y lista plana de
+    turnos (rol + rango horario o descanso). year_from_week puede venir del rango
+    de la cabecera del PDF.
+
+    workers > 1 reparte los bloques en trozos contiguos entre procesos y une los
+    resultados en el orden original (0 = un proceso por CPU). El año se fija aquí
+    antes de repartir: el resultado es idéntico al secuencial. Con menos de
+    PARALLEL_MIN_BLOCKS bloques (un cuadrante semanal, un mes) siempre en secuencia:
+    arrancar procesos y pasar las entidades entre ellos cuesta más que parsearlas.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if not workers or workers <= 1 or len(day_blocks) < PARALLEL_MIN_BLOCKS:
+        return list(iter_day_entities(day_blocks, year_from_week=year_from_week))
+
+    from concurrent.futures import ProcessPoolExecutor  # multiprocessing solo si se usa
+
+    year = entity_year(year_from_week)
+    # Sin `lines` (duplican raw_text): menos que serializar; el worker parte raw_text
+    blocks = [replace(b, lines=None) for b in day_blocks]
+    n_chunks = min(workers * CHUNKS_PER_WORKER, len(blocks))
+    size = -(-len(blocks) // n_chunks)
+    chunks = [blocks[k:k + size] for k in range(0, len(blocks), size)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+        # pool.map devuelve los trozos en orden: los días quedan en el orden de day_blocks
+        parts = pool.map(_extract_chunk, chunks, [year] * len(chunks))
+        return [day for part in parts for day in part]
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Formatos de salida para análisis de histórico, además del JSON Lucas con sangría:
+
+- JSON compacto (dumps_json(..., compact=True)): sin sangría ni espacios; menos bytes que
+  serializar y parsear (ruta de la API).
+- NDJSON (write_ndjson): un día por línea, escrito y volcado según llega. Con
+  runner.iter_pdf_days el primer día sale antes de leer la última página.
+- Columnar, Parquet o Arrow IPC (requiere pyarrow, opcional; se importa en el primer uso):
+  days_table: una fila por día y turno (date, total_hours_worked, total_revenue,
+  shift_name, staff_floor, staff_kitchen, hours_worked).
+  detail_table: una fila por turno de empleado (fecha, persona, puesto, área, inicio y
+  fin en minutos, flags, duración, tope y horas en cada ventana de config.SHIFT_NAMES).
+"""
+
+import json
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterable, List, TextIO, Union
+
+import config
+
+if TYPE_CHECKING:
+    from .entities import DayEntities, ParsedShift
+
+# entities/relations se importan en shift_row/detail_table: main.py lee FORMATS para
+# --help y las rutas de caché y `query` no cargan el parseo de entidades
+
+FORMATS = ("json", "ndjson", "parquet", "arrow")
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+_COMPACT = {"ensure_ascii": False, "separators": (",", ":")}
+
+
+def dumps_json(days: List[dict], compact: bool = False) -> str:
+    """JSON Lucas: con sangría (por defecto, legible) o compacto."""
+    if compact:
+        return json.dumps(days, **_COMPACT)
+    return json.dumps(days, ensure_ascii=False, indent=2)
+
+
+def ndjson_line(day: dict) -> str:
+    """Un día como línea NDJSON (JSON compacto + salto de línea)."""
+    return json.dumps(day, **_COMPACT) + "\n"
+
+
+def write_ndjson(days: Iterable[dict], fp: TextIO) -> int:
+    """Escribe un día por línea, volcando cada línea según llega. Devuelve el número de días."""
+    n = 0
+    for day in days:
+        fp.write(ndjson_line(day))
+        fp.flush()
+        n += 1
+    return n
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Las salidas Parquet/Arrow necesitan pyarrow. Ejecuta: pip install pyarrow") from None
+    return pyarrow
+
+
+def days_table(days: List[dict]):
+    """Días formato Lucas -> pyarrow.Table con una fila por día y turno."""
+    pa = _pyarrow()
+    cols = {k: [] for k in ("date", "total_hours_worked", "total_revenue", "shift_name",
+                            "staff_floor", "staff_kitchen", "hours_worked")}
+    for day in days:
+        d = date.fromisoformat(day["date"])
+        for s in day["shifts"]:
+            cols["date"].append(d)
+            cols["total_hours_worked"].append(day["total_hours_worked"])
+            cols["total_revenue"].append(day["total_revenue"])
+            cols["shift_name"].append(s["shift_name"])
+            cols["staff_floor"].append(s["staff_floor"])
+            cols["staff_kitchen"].append(s["staff_kitchen"])
+            cols["hours_worked"].append(s["hours_worked"])
+    return pa.table({
+        "date": pa.array(cols["date"], pa.date32()),
+        "total_hours_worked": pa.array(cols["total_hours_worked"], pa.float64()),
+        "total_revenue": pa.array(cols["total_revenue"], pa.float64()),
+        "shift_name": pa.array(cols["shift_name"], pa.string()).dictionary_encode(),
+        "staff_floor": pa.array(cols["staff_floor"], pa.int32()),
+        "staff_kitchen": pa.array(cols["staff_kitchen"], pa.int32()),
+        "hours_worked": pa.array(cols["hours_worked"], pa.float64()),
+    })
+
+
+DETAIL_COLUMNS = (
+    "date", "employee", "role", "area", "start_min", "end_min", "crosses_midnight",
+    "is_rest_or_absence", "is_other_establishment", "duration_hours", "max_hours_cap",
+)
+
+
+def shift_row(date_iso: str, ps: "ParsedShift") -> tuple:
+    """Turno de empleado como fila de DETAIL_COLUMNS (también la usa pipeline/history.py)."""
+    from .entities import duration_hours
+    from .relations import _role_to_area
+
+    return (
+        date_iso,
+        ps.employee_name,
+        ps.role,
+        _role_to_area(ps.role),
+        ps.start_h * 60 + ps.start_m,
+        ps.end_h * 60 + ps.end_m,
+        ps.crosses_midnight,
+        ps.is_rest_or_absence,
+        ps.is_other_establishment,
+        ps.duration_hours if ps.duration_hours is not None else duration_hours(ps),
+        ps.max_hours_cap,
+    )
+
+
+def detail_table(day_entities_list: List["DayEntities"]):
+    """DayEntities -> pyarrow.Table con una fila por turno de empleado (ver docstring del módulo)."""
+    from .relations import _counts_in_windows, _shift_span, _window_bounds
+
+    pa = _pyarrow()
+    bounds = _window_bounds()
+    rows = []
+    window_cols = [[] for _ in bounds]
+    for day in day_entities_list:
+        for ps in day.shifts:
+            rows.append(shift_row(day.date_iso, ps))
+            # Horas en cada ventana (mismo cálculo que relations, sin umbral por persona)
+            counts = _counts_in_windows(ps)
+            start, end = _shift_span(ps)
+            for k, (win_s, win_e) in enumerate(bounds):
+                overlap = min(end, win_e) - max(start, win_s) if counts else 0
+                window_cols[k].append(overlap / 60.0 if overlap > 0 else 0.0)
+    cols = dict(zip(DETAIL_COLUMNS, zip(*rows))) if rows else {k: () for k in DETAIL_COLUMNS}
+    types = {
+        "start_min": pa.int16(), "end_min": pa.int16(), "crosses_midnight": pa.bool_(),
+        "is_rest_or_absence": pa.bool_(), "is_other_establishment": pa.bool_(),
+        "duration_hours": pa.float64(), "max_hours_cap": pa.float64(),
+    }
+    data = {"date": pa.array([date.fromisoformat(d) for d in cols["date"]], pa.date32())}
+    for name in ("employee", "role", "area"):
+        data[name] = pa.array(cols[name], pa.string()).dictionary_encode()
+    for name, typ in types.items():
+        data[name] = pa.array(cols[name], typ)
+    for name, values in zip(config.SHIFT_NAMES, window_cols):
+        data[f"hours_{name.lower()}"] = pa.array(values, pa.float64())
+    return pa.table(data)
+
+
+def write_table(table, dest: Union[str, Path, BinaryIO], fmt: str) -> None:
+    """Escribe la tabla en Parquet o Arrow IPC (fichero) en dest (ruta o flujo binario)."""
+    pa = _pyarrow()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, dest)
+    elif fmt == "arrow":
+        sink = str(dest) if isinstance(dest, Path) else dest
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        raise ValueError(f"Formato columnar desconocido: {fmt!r} (opciones: {', '.join(COLUMNAR_FORMATS)})")
+
+
+def to_bytes(table, fmt: str) -> bytes:
+    """La tabla en Parquet o Arrow IPC en memoria (ej. para escribirla en stdout)."""
+    pa = _pyarrow()
+    sink = pa.BufferOutputStream()
+    write_table(table, sink, fmt)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Límites de recursos de la extracción: un PDF enorme o malformado no debe bloquear una
+importación (la API espera al proceso sin límite).
+
+- max_pages: solo se leen las primeras páginas; el resto se salta.
+- max_chars: se deja de leer cuando el texto extraído supera ese número de
+  caracteres; la página que lo supera tampoco se usa.
+- page_timeout_s: tiempo máximo para extraer una página; si se pasa, esa página se
+  salta y se sigue con la siguiente.
+- budget_s: tiempo total de la extracción; agotado, las páginas que faltan se saltan.
+
+El tiempo por página se corta con una alarma (SIGALRM) que interrumpe el código Python
+de pdfplumber/pdfminer. Sin alarma (Windows, o fuera del hilo principal) solo se puede
+comprobar entre páginas: el presupuesto total se respeta página a página, pero una sola
+página lenta no se interrumpe. El código nativo de pdfium tampoco se interrumpe.
+
+Con páginas saltadas el resultado es parcial: los días de las páginas leídas, marcados
+con partial = True y la lista de páginas saltadas (ver Guard.report). Un resultado
+parcial no se guarda en la caché ni en el almacén de entidades.
+"""
+
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+# Motivos por los que se salta una página (Guard.report()["limits"])
+MAX_PAGES = "max_pages"
+MAX_CHARS = "max_chars"
+PAGE_TIMEOUT = "page_timeout"
+BUDGET = "budget"
+
+
+class PageTimeout(BaseException):
+    """
+    La extracción de una página superó su tiempo (page_timeout_s o lo que quedaba de
+    budget_s). Hereda de BaseException, como KeyboardInterrupt: pdfplumber envuelve
+    cualquier Exception de pdfminer en PdfminerException.
+    """
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Límites de una extracción (None = sin límite)."""
+
+    max_pages: Optional[int] = None
+    max_chars: Optional[int] = None
+    page_timeout_s: Optional[float] = None
+    budget_s: Optional[float] = None
+
+    @classmethod
+    def from_config(cls, **overrides) -> "Limits":
+        """Límites de config (MAX_PAGES, MAX_CHARS, PAGE_TIMEOUT_S, BUDGET_S; 0 = sin límite)."""
+        import config
+
+        values = {
+            "max_pages": config.MAX_PAGES or None,
+            "max_chars": config.MAX_CHARS or None,
+            "page_timeout_s": config.PAGE_TIMEOUT_S or None,
+            "budget_s": config.BUDGET_S or None,
+        }
+        values.update(overrides)
+        return cls(**values)
+
+
+def _can_alarm() -> bool:
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+class Guard:
+    """Estado de los límites durante una extracción: reloj, caracteres leídos y páginas saltadas."""
+
+    def __init__(self, limits: Limits) -> None:
+        self.limits = limits
+        self._t0 = time.monotonic()
+        self.chars = 0
+        self.skipped: Dict[int, str] = {}  # índice de página -> motivo
+
+    def _left(self) -> Optional[float]:
+        if self.limits.budget_s is None:
+            return None
+        return self.limits.budget_s - (time.monotonic() - self._t0)
+
+    def remaining(self) -> Limits:
+        """
+        Límites para seguir en otro sitio (reintento con otro motor, workers de ingest): el
+        presupuesto que queda y el tiempo por página. Páginas y caracteres los aplica
+        quien reúne las páginas (accept_pages).
+        """
+        left = self._left()
+        return Limits(page_timeout_s=self.limits.page_timeout_s, budget_s=None if left is None else max(left, 0.0))
+
+    def before_page(self, i: int) -> Optional[str]:
+        """Motivo para no leer la página i (ya marcada como saltada), o None si se puede leer."""
+        limits = self.limits
+        reason = None
+        if limits.max_pages is not None and i >= limits.max_pages:
+            reason = MAX_PAGES
+        elif limits.max_chars is not None and self.chars > limits.max_chars:
+            reason = MAX_CHARS
+        elif limits.budget_s is not None and self._left() <= 0:
+            reason = BUDGET
+        if reason is not None:
+            self.skipped[i] = reason
+        return reason
+
+    @contextmanager
+    def page(self):
+        """
+        Contexto para extraer una página: con alarma, lanza PageTimeout al pasar
+        page_timeout_s o lo que queda de budget_s (lo que llegue antes).
+        """
+        timeout, reason = self.limits.page_timeout_s, PAGE_TIMEOUT
+        left = self._left()
+        if left is not None and (timeout is None or left < timeout):
+            timeout, reason = left, BUDGET
+        if timeout is None or not _can_alarm():
+            yield
+            return
+
+        def on_alarm(signum, frame):
+            raise PageTimeout(reason)
+
+        previous = signal.signal(signal.SIGALRM, on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, max(timeout, 1e-3))
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+
+    def extract(self, i: int, read):
+        """read() de la página i con los límites; None si la página se salta."""
+        if self.before_page(i) is not None:
+            return None
+        try:
+            with self.page():
+                content = read()
+        except PageTimeout as e:
+            self.skipped[i] = e.reason
+            return None
+        return self.accept(i, content)
+
+    def accept(self, i: int, content: Optional[str]) -> Optional[str]:
+        """Cuenta los caracteres de la página; None (saltada) si con ella se pasa de max_chars."""
+        if content:
+            self.chars += len(content)
+        if self.limits.max_chars is not None and self.chars > self.limits.max_chars:
+            self.skipped[i] = MAX_CHARS
+            return None
+        return content
+
+    def accept_pages(self, pages: list, skipped: Dict[int, str]) -> list:
+        """
+        Páginas extraídas en otro sitio (workers) en orden: une sus saltadas y aplica
+        max_pages y max_chars como en la extracción secuencial.
+        """
+        self.skipped.update(skipped)
+        out = []
+        for i, content in enumerate(pages):
+            if i in self.skipped:
+                out.append(None)
+            elif self.limits.max_pages is not None and i >= self.limits.max_pages:
+                self.skipped[i] = MAX_PAGES
+                out.append(None)
+            elif self.limits.max_chars is not None and self.chars > self.limits.max_chars:
+                self.skipped[i] = MAX_CHARS
+                out.append(None)
+            else:
+                out.append(self.accept(i, content))
+        return out
+
+    def report(self) -> Optional[dict]:
+        """{"partial": True, "skipped_pages": [1-based], "limits": [motivos]}, o None si no se saltó nada."""
+        if not self.skipped:
+            return None
+        return {
+            "partial": True,
+            "skipped_pages": [i + 1 for i in sorted(self.skipped)],
+            "limits": sorted(set(self.skipped.values())),
+        }
+
+
+def guard_for(limits: Optional[Limits]) -> Optional[Guard]:
+    """Guard para una extracción con limits, o None si no hay ningún límite."""
+    if limits is None or limits == Limits():
+        return None
+    return Guard(limits)
+
+
+def partial_info(stats: dict) -> Optional[dict]:
+    """Claves de resultado parcial de los stats de una extracción (ver Guard.report), o None si está completo."""
+    if not stats.get("partial"):
+        return None
+    return {k: stats[k] for k in ("partial", "skipped_pages", "limits")}
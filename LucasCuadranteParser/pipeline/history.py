@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Histórico de parseos en SQLite: los días formato Lucas y los turnos de empleado de
+cada PDF parseado, para consultar semanas pasadas (main.py query) sin guardar ni
+volver a abrir los PDFs.
+
+Tablas:
+
+    sources          sha256 (PDF), source, parsed_at, parser_version, version (fecha del PDF, o '')
+    days             date (PK), sha256, total_revenue, total_hours_worked, json (día Lucas)
+    shifts           date, shift_name (PK conjunta), sha256, staff_floor, staff_kitchen, hours_worked
+    employee_shifts  una fila por turno de empleado (columnas de export.DETAIL_COLUMNS) + sha256
+
+Índices por fecha, turno, empleado y sha256 del PDF. Cada fecha pertenece a un solo
+PDF: al guardar un PDF se sustituyen las filas de sus fechas salvo las que ya vienen de
+un PDF más reciente. "Más reciente" es la versión del PDF (su /ModDate, ver
+pdf_document_date): cargar tarde un cuadrante antiguo no pisa la semana ya guardada
+desde uno nuevo. Un PDF sin fecha (o un --from-text) se guarda con version '' y pierde
+siempre frente a uno con fecha; entre dos sin fecha gana el último guardado. La hora
+del parseo no sirve de versión: no es comparable con la fecha de otro PDF.
+Las horas por ventana no se guardan: dependen de la configuración (ver reaggregate);
+employee_shifts guarda los datos de partida (inicio, fin, flags, duración).
+"""
+
+import json
+import mmap
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, List, Optional, Union
+
+import config
+from .export import DETAIL_COLUMNS, shift_row
+
+if TYPE_CHECKING:
+    from .entities import DayEntities
+
+SCHEMA_VERSION = 1
+# version de un PDF sin fecha: menor que cualquier fecha ISO
+UNDATED = ""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    sha256 TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    parsed_at TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    version TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS days (
+    date TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    total_revenue REAL NOT NULL,
+    total_hours_worked REAL NOT NULL,
+    json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS days_sha256 ON days (sha256);
+CREATE TABLE IF NOT EXISTS shifts (
+    date TEXT NOT NULL,
+    shift_name TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    staff_floor INTEGER NOT NULL,
+    staff_kitchen INTEGER NOT NULL,
+    hours_worked REAL NOT NULL,
+    PRIMARY KEY (date, shift_name)
+);
+CREATE INDEX IF NOT EXISTS shifts_name_date ON shifts (shift_name, date);
+CREATE TABLE IF NOT EXISTS employee_shifts (
+    date TEXT NOT NULL,
+    employee TEXT,
+    role TEXT NOT NULL,
+    area TEXT,
+    start_min INTEGER NOT NULL,
+    end_min INTEGER NOT NULL,
+    crosses_midnight INTEGER NOT NULL,
+    is_rest_or_absence INTEGER NOT NULL,
+    is_other_establishment INTEGER NOT NULL,
+    duration_hours REAL NOT NULL,
+    max_hours_cap REAL,
+    sha256 TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS employee_shifts_date ON employee_shifts (date);
+CREATE INDEX IF NOT EXISTS employee_shifts_employee ON employee_shifts (employee, date);
+CREATE INDEX IF NOT EXISTS employee_shifts_sha256 ON employee_shifts (sha256);
+"""
+
+_BOOL_COLUMNS = ("crosses_midnight", "is_rest_or_absence", "is_other_establishment")
+
+# Fecha del PDF en su diccionario Info: /ModDate (D:AAAAMMDDHHmmSS...) o, si falta, /CreationDate
+_RE_PDF_DATE = re.compile(rb"/(ModDate|CreationDate)\s*\(D:(\d{4})(\d{2})(\d{2})(\d{2})?(\d{2})?(\d{2})?")
+# Los generadores habituales escriben Info al principio o al final del fichero
+_PDF_DATE_SCAN = 64 * 1024
+
+
+def pdf_document_date(pdf) -> Optional[str]:
+    """
+    Fecha ISO (hora local del PDF, sin zona) de /ModDate o /CreationDate del PDF, o None
+    si no se encuentra en los primeros o últimos 64 KiB. pdf: ruta o PDF en memoria
+    (bytes, mmap, fichero binario con seek; ver ingest.as_pdf_source).
+    """
+    if isinstance(pdf, (bytes, bytearray, memoryview, mmap.mmap)):
+        data = bytes(pdf[:_PDF_DATE_SCAN]) + b"\n" + bytes(pdf[-_PDF_DATE_SCAN:])
+    elif hasattr(pdf, "read"):
+        pos = pdf.tell()
+        pdf.seek(0)
+        data = pdf.read(_PDF_DATE_SCAN)
+        pdf.seek(0, 2)
+        pdf.seek(max(0, pdf.tell() - _PDF_DATE_SCAN))
+        data += b"\n" + pdf.read()
+        pdf.seek(pos)
+    else:
+        with open(pdf, "rb") as f:
+            data = f.read(_PDF_DATE_SCAN)
+            f.seek(0, 2)
+            f.seek(max(0, f.tell() - _PDF_DATE_SCAN))
+            data += b"\n" + f.read()
+    found = {m.group(1): m.groups()[1:] for m in _RE_PDF_DATE.finditer(data)}
+    parts = found.get(b"ModDate") or found.get(b"CreationDate")
+    if not parts:
+        return None
+    y, mo, d, h, mi, sec = (p.decode() if p else "00" for p in parts)
+    return f"{y}-{mo}-{d}T{h}:{mi}:{sec}"
+
+
+class HistoryStore:
+    """Base de datos SQLite del histórico (se crea al abrirla). Usar como context manager."""
+
+    def __init__(self, db_path: Union[str, Path]) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self._conn.close()
+            raise ValueError(f"{self.db_path}: esquema de histórico v{version} no soportado (esperado v{SCHEMA_VERSION})")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def upsert(
+        self,
+        sha256: str,
+        week_data: List[dict],
+        day_entities_list: Optional[List["DayEntities"]] = None,
+        source: str = "",
+        version: Optional[str] = None,
+    ) -> int:
+        """
+        Guarda (una transacción) los días de un PDF y, si se dan, sus turnos de empleado.
+        version: fecha ISO del PDF (ver pdf_document_date); None = sin fecha (UNDATED).
+        Las fechas que ya estaban se sustituyen salvo si vienen de un PDF con versión
+        posterior (con la misma, gana el último guardado; sin fecha pierde frente a
+        cualquier fecha). Devuelve los días guardados.
+        """
+        parsed_at = datetime.now().isoformat(timespec="seconds")
+        version = version or UNDATED
+        conn = self._conn
+        with conn:
+            if week_data:
+                # Fechas del rango que ya vienen de otro PDF más reciente: se conservan
+                newer = {date for (date,) in conn.execute(
+                    "SELECT days.date FROM days JOIN sources USING (sha256)"
+                    " WHERE days.date BETWEEN ? AND ? AND days.sha256 != ? AND sources.version > ?",
+                    (min(d["date"] for d in week_data), max(d["date"] for d in week_data), sha256, version),
+                )}
+                week_data = [day for day in week_data if day["date"] not in newer]
+            dates = [(day["date"],) for day in week_data]
+            conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                (sha256, source, parsed_at, config.PARSER_VERSION, version),
+            )
+            for table in ("days", "shifts", "employee_shifts"):
+                conn.executemany(f"DELETE FROM {table} WHERE date = ?", dates)
+            conn.executemany("INSERT INTO days VALUES (?, ?, ?, ?, ?)", [
+                (day["date"], sha256, day["total_revenue"], day["total_hours_worked"],
+                 json.dumps(day, ensure_ascii=False, separators=(",", ":")))
+                for day in week_data
+            ])
+            conn.executemany("INSERT INTO shifts VALUES (?, ?, ?, ?, ?, ?)", [
+                (day["date"], s["shift_name"], sha256, s["staff_floor"], s["staff_kitchen"], s["hours_worked"])
+                for day in week_data
+                for s in day["shifts"]
+            ])
+            if day_entities_list:
+                saved = {d for (d,) in dates}
+                conn.executemany(
+                    f"INSERT INTO employee_shifts VALUES ({', '.join('?' * (len(DETAIL_COLUMNS) + 1))})",
+                    [
+                        shift_row(day.date_iso, ps) + (sha256,)
+                        for day in day_entities_list
+                        if day.date_iso in saved
+                        for ps in day.shifts
+                    ],
+                )
+        return len(dates)
+
+    @staticmethod
+    def _range(date_from: Optional[str], date_to: Optional[str]) -> tuple:
+        # Fechas ISO: el orden de texto es el de fecha, y el índice sirve para el rango
+        return date_from or "0000-00-00", date_to or "9999-99-99"
+
+    def days(
+        self, date_from: Optional[str] = None, date_to: Optional[str] = None, sha256: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Días formato Lucas entre date_from y date_to (ISO, inclusive), por fecha, según se leen."""
+        sql = "SELECT json FROM days WHERE date BETWEEN ? AND ?"
+        params = self._range(date_from, date_to)
+        if sha256:
+            sql += " AND sha256 = ?"
+            params += (sha256,)
+        for (raw,) in self._conn.execute(sql + " ORDER BY date", params):
+            yield json.loads(raw)
+
+    def shifts(
+        self, date_from: Optional[str] = None, date_to: Optional[str] = None, shift_name: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Filas (date, shift_name, staff_floor, staff_kitchen, hours_worked, sha256) del rango."""
+        sql = "SELECT * FROM shifts WHERE date BETWEEN ? AND ?"
+        params = self._range(date_from, date_to)
+        if shift_name:
+            sql += " AND shift_name = ?"
+            params += (shift_name,)
+        cur = self._conn.execute(sql + " ORDER BY date, shift_name", params)
+        names = [c[0] for c in cur.description]
+        for row in cur:
+            yield dict(zip(names, row))
+
+    def employee_shifts(
+        self, date_from: Optional[str] = None, date_to: Optional[str] = None, employee: Optional[str] = None
+    ) -> Iterator[dict]:
+        """Turnos de empleado del rango (columnas de export.DETAIL_COLUMNS + sha256), por fecha."""
+        sql = "SELECT * FROM employee_shifts WHERE date BETWEEN ? AND ?"
+        params = self._range(date_from, date_to)
+        if employee:
+            sql += " AND employee = ?"
+            params += (employee,)
+        cur = self._conn.execute(sql + " ORDER BY date, rowid", params)
+        names = [c[0] for c in cur.description]
+        for row in cur:
+            item = dict(zip(names, row))
+            for k in _BOOL_COLUMNS:
+                item[k] = bool(item[k])
+            yield item
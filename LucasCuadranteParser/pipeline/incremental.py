@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+Re-parseo incremental: nueva versión de un cuadrante ya parseado en la que solo cambian
+algunos días. Solo se extrae el texto de las páginas que cambian, y solo se vuelven a
+parsear los días cuyo bloque de texto cambia; el resto reutiliza texto y DayEntities
+de la versión anterior.
+
+Estado (un JSON por cuadrante, lo elige quien llama; ej. uno por semana):
+
+    {"format": 2, "parser_version": "1.2", "config": "<config_fingerprint>",
+     "crop_to_table": true, "backend": "pdfplumber", "source": "semana7.pdf", "parsed_at": "...",
+     "table_layout": {"total_x0": 512.3, "firma_x0": 540.1, "legend_x0": 20.0},  # o null
+     "pages": [{"fingerprint": "...", "text": "..."}],
+     "blocks": ["<hash del bloque del día>", ...],   # en el orden de "entities"
+     "entities": {...entities_to_dict...},
+     "result": [...días formato Lucas...]}
+
+Huella de página: SHA-256 de sus flujos de contenido y de las fuentes/XObjects que usa
+(leídos con pdfminer, sin análisis de layout: ~1 ms por página frente a ~1 s de
+extracción con pdfplumber). No depende de la numeración de objetos del PDF, así que
+una página igual en un PDF regenerado da la misma huella.
+
+El estado solo se reutiliza con la misma versión del parser, configuración, recorte a la
+tabla (config.CROP_TO_TABLE) y motor de extracción: el texto de las páginas depende de
+los dos últimos. Como en ingest, si el motor pedido no está instalado o falla al leer el
+PDF se usa pdfplumber (con su estado), y el estado guarda el motor efectivo. Con recorte, el texto de cada página depende también
+de la geometría de la tabla detectada en la primera página (region.detect_layout): el
+estado la guarda y, si la primera página cambia y su geometría no es la misma, no se
+reutiliza el texto de ninguna página. Con la misma primera página se usa la guardada
+sin volver a leerla.
+
+El resultado incluye un diff por día frente a la versión anterior (diff_days) para que
+la API solo actualice los ExecutionDay que cambian.
+
+Los límites de extracción (pipeline/guards.py) se aplican a las páginas en orden, también
+a las reutilizadas (cuentan para max_pages y max_chars). Un resultado parcial no guarda
+estado: la próxima vez se vuelven a leer las páginas saltadas.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from contextlib import nullcontext
+from dataclasses import asdict, replace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import config
+from .backends import DEFAULT_BACKEND, PdfSource, _binary_stream, is_available, open_document
+from .cache import config_fingerprint
+from .entities import DayEntities, entity_year, extract_entities_from_day_blocks
+from .guards import Guard, Limits, guard_for
+from .ingest import PdfInput, _rewind, as_pdf_source
+from .normalize import to_lucas_week
+from .region import TableLayout
+from .segment import DayBlock, segment_by_days, week_year
+from .serialize import entities_from_dict, entities_to_dict
+from .timings import StageTimer, stage
+
+STATE_FORMAT = 2
+
+
+def _hash_object(obj, h, memo: Dict[int, bytes], depth: int = 0) -> None:
+    """Vuelca en h una forma canónica del objeto PDF (referencias resueltas, flujos por contenido)."""
+    from pdfminer.psparser import PSLiteral
+    from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+
+    if depth > 12:  # ciclos (ej. /Parent): basta con la estructura cercana
+        return
+    if isinstance(obj, PDFObjRef):
+        digest = memo.get(obj.objid)
+        if digest is None:
+            sub = hashlib.sha256()
+            memo[obj.objid] = b""  # en curso: corta referencias circulares
+            _hash_object(obj.resolve(), sub, memo, depth + 1)
+            digest = memo[obj.objid] = sub.digest()
+        h.update(b"R" + digest)
+    elif isinstance(obj, PDFStream):
+        _hash_object(obj.attrs, h, memo, depth + 1)
+        if getattr(resolve1(obj.attrs.get("Subtype")), "name", None) == "Image":
+            return  # las imágenes no aportan texto
+        h.update(b"S" + hashlib.sha256(obj.get_data()).digest())
+    elif isinstance(obj, dict):
+        h.update(b"{")
+        for k in sorted(obj):
+            if k == "Parent":
+                continue
+            h.update(str(k).encode("utf-8") + b":")
+            _hash_object(obj[k], h, memo, depth + 1)
+        h.update(b"}")
+    elif isinstance(obj, (list, tuple)):
+        h.update(b"[")
+        for v in obj:
+            _hash_object(v, h, memo, depth + 1)
+        h.update(b"]")
+    elif isinstance(obj, PSLiteral):
+        h.update(b"/" + str(obj.name).encode("utf-8"))
+    else:
+        h.update(repr(obj).encode("utf-8"))
+
+
+def page_fingerprints(pdf: PdfInput) -> List[str]:
+    """Huella (hex) de cada página: contenido + fuentes/XObjects + MediaBox/Rotate."""
+    from pdfminer.pdfdocument import PDFDocument
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdfparser import PDFParser
+
+    source = as_pdf_source(pdf)
+    fp, owned = _binary_stream(source)
+    try:
+        memo: Dict[int, bytes] = {}
+        result = []
+        for page in PDFPage.create_pages(PDFDocument(PDFParser(fp))):
+            h = hashlib.sha256()
+            _hash_object([page.mediabox, page.rotate], h, memo)
+            resources = page.resources or {}
+            _hash_object({k: resources[k] for k in ("Font", "XObject") if k in resources}, h, memo)
+            for stream in page.contents:
+                _hash_object(stream, h, memo)
+            result.append(h.hexdigest())
+        return result
+    finally:
+        if owned:
+            fp.close()
+        elif hasattr(fp, "seek"):
+            fp.seek(0)
+
+
+def _block_key(block: DayBlock, year: int) -> str:
+    """
+    Hash del bloque de un día: mismo texto y mismo año -> mismas DayEntities. year es el
+    efectivo (entities.entity_year): sin cabecera de semana es el año actual, así que un
+    cambio de año en el reloj re-parsea esos días, como lo haría runner.parse_pdf.
+    """
+    raw = f"{year}\n{block.day_num} {block.month_name}\n{block.raw_text}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def _layout_to_dict(layout: Optional[TableLayout]) -> Optional[dict]:
+    return asdict(layout) if layout is not None else None
+
+
+def _layout_from_dict(data: Optional[dict]) -> Optional[TableLayout]:
+    return TableLayout(**data) if data is not None else None
+
+
+def load_state(state_path: Union[str, Path], backend: Optional[str] = None) -> Optional[dict]:
+    """
+    Estado guardado, o None si no existe, está corrupto o es de otra versión del parser,
+    otra configuración, otro recorte u otro motor de extracción (en ese caso se parsea
+    todo de nuevo). backend es el motor efectivo (None = DEFAULT_BACKEND).
+    """
+    try:
+        with open(state_path, encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if (
+        state.get("format") != STATE_FORMAT
+        or state.get("parser_version") != config.PARSER_VERSION
+        or state.get("config") != config_fingerprint()
+        or state.get("crop_to_table") != config.CROP_TO_TABLE
+        or state.get("backend") != (backend or DEFAULT_BACKEND)
+    ):
+        return None
+    return state
+
+
+def save_state(state_path: Union[str, Path], state: dict) -> None:
+    """Guarda el estado (escritura atómica)."""
+    path = Path(state_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def diff_days(previous: List[dict], current: List[dict]) -> dict:
+    """
+    Diff por fecha entre dos resultados formato Lucas:
+    {"added": [...], "removed": [...], "changed": [...], "unchanged": [...]} (fechas ISO ordenadas).
+    """
+    before = {d["date"]: d for d in previous}
+    after = {d["date"]: d for d in current}
+    return {
+        "added": sorted(d for d in after if d not in before),
+        "removed": sorted(d for d in before if d not in after),
+        "changed": sorted(d for d in after if d in before and after[d] != before[d]),
+        "unchanged": sorted(d for d in after if d in before and after[d] == before[d]),
+    }
+
+
+def _read_pages(
+    source: PdfSource, state_path: Union[str, Path], backend: str, fingerprints: List[str], guard: Optional[Guard]
+) -> Tuple[Optional[dict], List[Optional[str]], List[int], Optional[dict]]:
+    """
+    Estado previo del motor backend (o None), texto de cada página (reutilizado si su
+    huella no cambia), índices de las páginas extraídas y geometría de la tabla.
+    """
+    previous = load_state(state_path, backend)
+    prev_texts: Dict[str, Optional[str]] = {}
+    if previous is not None:
+        prev_texts = {p["fingerprint"]: p["text"] for p in previous["pages"]}
+    # Misma primera página -> misma geometría de la tabla (solo importa con recorte)
+    same_first = previous is not None and [p["fingerprint"] for p in previous["pages"][:1]] == fingerprints[:1]
+    layout = previous["table_layout"] if same_first else None
+    need_layout = config.CROP_TO_TABLE and bool(fingerprints) and not same_first
+    texts: List[Optional[str]] = []
+    missing = [i for i, fp in enumerate(fingerprints) if fp not in prev_texts]
+    with open_document(source, backend) if missing or need_layout else nullcontext() as doc:
+        if need_layout:
+            layout = _layout_to_dict(doc.table_layout())
+            if previous is not None and layout != previous["table_layout"]:
+                # Otra geometría: el texto recortado de las páginas sin cambios también cambia
+                prev_texts = {}
+                missing = list(range(len(fingerprints)))
+        elif doc is not None and doc.crop:
+            doc.set_table_layout(_layout_from_dict(layout))
+        for i, fp in enumerate(fingerprints):
+            if fp in prev_texts:
+                read = lambda fp=fp: prev_texts[fp]
+            else:
+                read = lambda i=i: doc.page_text(i)
+            texts.append(read() if guard is None else guard.extract(i, read))
+    return previous, texts, missing, layout
+
+
+def parse_pdf_incremental(
+    pdf_path: PdfInput,
+    state_path: Union[str, Path],
+    backend: Optional[str] = None,
+    timer: Optional[StageTimer] = None,
+    limits: Optional[Limits] = None,
+) -> dict:
+    """
+    Parsea el PDF reutilizando lo que no cambió desde el estado en state_path, y guarda
+    el nuevo estado. Devuelve {"days": [...formato Lucas...], "diff": diff_days(...),
+    "pages_reparsed": n, "days_reparsed": n, "entities": [...DayEntities...]}. Sin estado previo (o incompatible) es un
+    parseo completo y todos los días salen como "added".
+    El resultado es el mismo que el de runner.parse_pdf con el mismo motor. "backend" es
+    el motor efectivo y "backend_fallback" el motivo si no es el pedido (o None).
+    limits: como en runner.parse_pdf (por defecto los de config). "partial" es None o
+    {"partial": True, "skipped_pages": [...], "limits": [...]}; si es parcial, el estado
+    no se guarda.
+    """
+    source: PdfSource = as_pdf_source(pdf_path)
+    backend = backend or DEFAULT_BACKEND
+    fallback = None
+    if backend != DEFAULT_BACKEND and not is_available(backend):
+        backend, fallback = DEFAULT_BACKEND, f"{backend}: no instalado"
+
+    with stage(timer, "fingerprint"):
+        fingerprints = page_fingerprints(source)
+    guard = guard_for(Limits.from_config() if limits is None else limits)
+    with stage(timer, "ingest"):
+        try:
+            previous, texts, missing, layout = _read_pages(source, state_path, backend, fingerprints, guard)
+        except Exception as e:
+            # Como ingest._extract: si el motor pedido falla, se repite con pdfplumber (y su estado)
+            if backend == DEFAULT_BACKEND:
+                raise
+            backend, fallback = DEFAULT_BACKEND, f"{backend}: {type(e).__name__}: {e}"
+            _rewind(source)
+            if guard is not None:
+                # El reintento no vuelve a empezar el presupuesto
+                guard = Guard(replace(guard.limits, budget_s=guard.remaining().budget_s))
+            previous, texts, missing, layout = _read_pages(source, state_path, backend, fingerprints, guard)
+    prev_entities: Dict[str, DayEntities] = {}
+    if previous is not None:
+        prev_entities = dict(zip(previous["blocks"], entities_from_dict(previous["entities"])))
+    partial = guard.report() if guard is not None else None
+    if partial:
+        missing = [i for i in missing if i not in guard.skipped]
+    text = "\n".join(t for t in texts if t)
+
+    with stage(timer, "segment"):
+        blocks, info = segment_by_days(text)
+    # Año como en runner.extract_entities_from_text: mismas entidades que un parseo completo
+    year = entity_year(week_year(info))
+    keys = [_block_key(b, year) for b in blocks]
+    with stage(timer, "entities"):
+        fresh = iter(extract_entities_from_day_blocks(
+            [b for b, k in zip(blocks, keys) if k not in prev_entities], year_from_week=year
+        ))
+        day_entities = [prev_entities[k] if k in prev_entities else next(fresh) for k in keys]
+    with stage(timer, "aggregate"):
+        week_data = to_lucas_week(day_entities)
+    days_reparsed = sum(1 for k in keys if k not in prev_entities)
+    if timer is not None:
+        timer.count("pages", len(fingerprints))
+        timer.count("pages_reparsed", len(missing))
+        timer.count("days", len(day_entities))
+        timer.count("days_reparsed", days_reparsed)
+        if fallback:
+            timer.count("backend_fallbacks", 1)
+
+    with stage(timer, "store"):
+        if partial is None:
+            save_state(state_path, {
+                "format": STATE_FORMAT,
+                "parser_version": config.PARSER_VERSION,
+                "config": config_fingerprint(),
+                "crop_to_table": config.CROP_TO_TABLE,
+                "backend": backend,
+                "table_layout": layout,
+                "source": source.name if isinstance(source, Path) else "-",
+                "parsed_at": datetime.now().isoformat(timespec="seconds"),
+                "pages": [{"fingerprint": fp, "text": t} for fp, t in zip(fingerprints, texts)],
+                "blocks": keys,
+                "entities": entities_to_dict(day_entities),
+                "result": week_data,
+            })
+    return {
+        "days": week_data,
+        "diff": diff_days(previous["result"] if previous else [], week_data),
+        "pages_reparsed": len(missing),
+        "days_reparsed": days_reparsed,
+        "entities": day_entities,
+        "partial": partial,
+        "backend": backend,
+        "backend_fallback": fallback,
+    }
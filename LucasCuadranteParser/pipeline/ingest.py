@@ -1,31 +1,267 @@
 # -*- coding: utf-8 -*-
-"""Ingesta: leer PDF y extraer texto por página."""
+"""Ingesta: leer PDF y extraer texto por página (motor intercambiable, ver pipeline/backends.py)."""
 
+import mmap
+import os
+from dataclasses import replace
 from pathlib import Path
-from typing import List
+from typing import BinaryIO, Iterator, List, Optional, Union
 
-try:
-    import pdfplumber
-except ImportError:
-    pdfplumber = None
+from .backends import DEFAULT_BACKEND, PdfSource, is_available, open_document
+from .guards import Guard, Limits, guard_for
 
+# Entrada de PDF: ruta, o el PDF ya en memoria (bytes, mmap, fichero binario, sys.stdin.buffer)
+PdfInput = Union[str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap, BinaryIO]
 
-def extract_text_from_pdf(pdf_path: str | Path) -> str:
+# pdfplumber (y pdfminer debajo) tarda ~0,1 s en importarse: se carga en el primer uso,
+# no al importar el pipeline (--help, --from-text, aciertos de caché no lo necesitan).
+pdfplumber = None
+
+# Con menos páginas no compensa arrancar procesos: se extrae en secuencia
+PARALLEL_MIN_PAGES = 3
+
+
+def _pdfplumber():
+    """Importa pdfplumber la primera vez; ImportError con mensaje claro si no está instalado."""
+    global pdfplumber
+    if pdfplumber is None:
+        try:
+            import pdfplumber as module
+        except ImportError:
+            raise ImportError("Se necesita pdfplumber. Ejecuta: pip install pdfplumber") from None
+        pdfplumber = module
+    return pdfplumber
+
+
+def as_pdf_source(pdf: PdfInput) -> PdfSource:
+    """
+    Normaliza la entrada del PDF para los motores: una ruta se comprueba y pasa a Path
+    (FileNotFoundError si no existe); bytes, bytearray, memoryview y mmap se usan tal
+    cual, sin copiar; un fichero binario con seek también, y uno sin seek (tubería,
+    stdin) se lee entero a bytes.
+    """
+    if isinstance(pdf, (str, os.PathLike)):
+        path = Path(pdf)
+        if not path.exists():
+            raise FileNotFoundError(f"PDF no encontrado: {path}")
+        return path
+    if isinstance(pdf, (bytes, bytearray, memoryview, mmap.mmap)):
+        return pdf
+    if hasattr(pdf, "read"):
+        seekable = getattr(pdf, "seekable", None)
+        return pdf if seekable and seekable() else pdf.read()
+    raise TypeError(f"Entrada de PDF no admitida: {type(pdf).__name__}")
+
+
+def _read_pages(doc, pages: range, guard: Optional[Guard]) -> List[Optional[str]]:
+    """Texto de las páginas; con guard, None en las que se saltan (ver pipeline/guards.py)."""
+    if guard is None:
+        return [doc.page_text(i) for i in pages]
+    return [guard.extract(i, lambda i=i: doc.page_text(i)) for i in pages]
+
+
+def _extract_page_range(
+    pdf_path: str, start: int, stop: int, backend: str = DEFAULT_BACKEND, crop: bool = False, layout=None,
+    limits: Optional[Limits] = None,
+) -> tuple:
+    """
+    Worker: abre el PDF por su cuenta y extrae el texto de las páginas [start, stop).
+    Con crop, layout es la geometría de la tabla calculada en el proceso padre. Con
+    limits (tiempo por página y lo que queda del presupuesto), devuelve también las
+    páginas saltadas: (textos, {índice: motivo}).
+    """
+    guard = guard_for(limits)
+    with open_document(pdf_path, backend, crop=crop) as doc:
+        if crop:
+            doc.set_table_layout(layout)
+        pages = _read_pages(doc, range(start, stop), guard)
+    return pages, (guard.skipped if guard is not None else {})
+
+
+def _page_ranges(n_pages: int, n_chunks: int) -> List[tuple]:
+    """Reparte n_pages en n_chunks rangos contiguos [start, stop) de tamaño parecido."""
+    size, extra = divmod(n_pages, n_chunks)
+    ranges = []
+    start = 0
+    for k in range(n_chunks):
+        stop = start + size + (1 if k < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extract_pages_parallel(
+    path: Path, n_pages: int, workers: int, backend: str, crop: bool, layout, guard: Optional[Guard] = None,
+) -> List[Optional[str]]:
+    from concurrent.futures import ProcessPoolExecutor  # multiprocessing solo si se usa
+
+    # Con límites: las páginas de más ni se reparten; cada worker corta por tiempo y el
+    # máximo de caracteres se aplica al reunir, en orden de página
+    n_read = n_pages
+    limits = None
+    if guard is not None:
+        if guard.limits.max_pages is not None:
+            n_read = min(n_pages, guard.limits.max_pages)
+        limits = guard.remaining()
+    ranges = _page_ranges(n_read, min(workers, n_read))
+    with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+        chunks = list(pool.map(
+            _extract_page_range,
+            [str(path)] * len(ranges),
+            [r[0] for r in ranges],
+            [r[1] for r in ranges],
+            [backend] * len(ranges),
+            [crop] * len(ranges),
+            [layout] * len(ranges),
+            [limits] * len(ranges),
+        ))
+    # pool.map devuelve los trozos en el orden de los rangos: el texto queda en orden de página
+    pages = [text for chunk, _ in chunks for text in chunk]
+    if guard is None:
+        return pages
+    skipped = {i: reason for _, chunk_skipped in chunks for i, reason in chunk_skipped.items()}
+    return guard.accept_pages(pages + [None] * (n_pages - n_read), skipped)
+
+
+def _extract_pages(
+    source: PdfSource, workers: Optional[int], stats: Optional[dict], backend: str, guard: Optional[Guard] = None,
+) -> List[Optional[str]]:
+    """Texto de cada página, en orden de página; None en las saltadas."""
+    with open_document(source, backend) as doc:
+        n_pages = doc.n_pages
+        if stats is not None:
+            stats["pages"] = n_pages
+        # Los workers reabren el PDF por ruta: un PDF en memoria se extrae en este proceso
+        parallel = isinstance(source, Path) and bool(workers and workers > 1 and n_pages >= PARALLEL_MIN_PAGES)
+        if guard is not None and guard.limits.max_pages is not None:
+            parallel = parallel and min(n_pages, guard.limits.max_pages) >= PARALLEL_MIN_PAGES
+        if not parallel:
+            return _read_pages(doc, range(n_pages), guard)
+        # Geometría de la tabla una vez por documento (primera página), no una por worker
+        crop = doc.crop
+        layout = doc.table_layout() if crop else None
+    return _extract_pages_parallel(source, n_pages, workers, backend, crop, layout, guard)
+
+
+def extract_text_from_pdf(
+    pdf_path: PdfInput,
+    workers: Optional[int] = None,
+    stats: Optional[dict] = None,
+    backend: Optional[str] = None,
+    fallback: bool = True,
+    limits: Optional[Limits] = None,
+) -> str:
     """
     Extrae todo el texto del PDF concatenando las páginas.
-    Usa pdfplumber; si no está instalado, lanza ImportError con mensaje claro.
+    Por defecto usa pdfplumber; si no está instalado, lanza ImportError con mensaje claro.
+    pdf_path puede ser una ruta o el PDF ya en memoria (ver as_pdf_source): así no hace
+    falta escribir a un fichero temporal lo recibido por stdin o por HTTP.
+
+    backend: motor de extracción ("pdfplumber", "pdfminer", "pdfium"; ver pipeline/backends.py).
+    Con fallback, si el motor pedido no está instalado o falla con este PDF, se usa
+    pdfplumber (stats["backend_fallback"] guarda el motivo).
+    Con config.CROP_TO_TABLE solo se extrae el texto de la tabla del cuadrante (ver
+    pipeline/region.py).
+
+    workers > 1 reparte las páginas entre procesos (cada uno abre el PDF y extrae su
+    rango) y reensambla en orden de página: el resultado es idéntico al secuencial.
+    workers = 0 usa un proceso por CPU. Documentos de menos de PARALLEL_MIN_PAGES
+    páginas, y los PDF en memoria, se extraen siempre en secuencia.
+    Si se pasa stats (dict), se rellena stats["pages"] con el número de páginas y
+    stats["backend"] con el motor usado.
+
+    limits: páginas, caracteres y tiempo máximos (ver pipeline/guards.py). Las páginas que
+    no caben se saltan: stats["partial"] = True, stats["skipped_pages"] (desde 1) y
+    stats["limits"] (motivos).
     """
-    if pdfplumber is None:
-        raise ImportError("Se necesita pdfplumber. Ejecuta: pip install pdfplumber")
+    texts = _extract(as_pdf_source(pdf_path), workers, stats, backend, fallback, limits=limits)
+    return "\n".join(text for text in texts if text)
+
+
+def _extract(
+    source: PdfSource, workers: Optional[int], stats: Optional[dict], backend: Optional[str],
+    fallback: bool, limits: Optional[Limits] = None,
+) -> List[Optional[str]]:
+    """_extract_pages con el motor pedido y, si falla o no está instalado, con pdfplumber."""
+    if workers == 0:
+        workers = os.cpu_count() or 1
+
+    name = backend or DEFAULT_BACKEND
+    reason = None
+    if name != DEFAULT_BACKEND and fallback and not is_available(name):
+        name, reason = DEFAULT_BACKEND, f"{name}: no instalado"
+    guard = guard_for(limits)
+    try:
+        pages = _extract_pages(source, workers, stats, name, guard)
+    except Exception as e:
+        if name == DEFAULT_BACKEND or not fallback:
+            raise
+        name, reason = DEFAULT_BACKEND, f"{name}: {type(e).__name__}: {e}"
+        _rewind(source)
+        if guard is not None:
+            # El reintento no vuelve a empezar el presupuesto
+            guard = Guard(replace(limits, budget_s=guard.remaining().budget_s))
+        pages = _extract_pages(source, workers, stats, name, guard)
+    if stats is not None:
+        stats["backend"] = name
+        if reason:
+            stats["backend_fallback"] = reason
+        report = guard.report() if guard is not None else None
+        if report:
+            stats.update(report)
+    return pages
 
-    path = Path(pdf_path)
-    if not path.exists():
-        raise FileNotFoundError(f"PDF no encontrado: {path}")
 
-    parts: List[str] = []
-    with pdfplumber.open(path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
+def _rewind(source: PdfSource) -> None:
+    """Antes de reintentar con otro motor, volver al principio de un fichero ya leído."""
+    if hasattr(source, "seek"):
+        source.seek(0)
+
+
+def iter_pdf_lines(
+    pdf_path: PdfInput,
+    backend: Optional[str] = None,
+    limits: Optional[Limits] = None,
+    stats: Optional[dict] = None,
+    fallback: bool = True,
+) -> Iterator[str]:
+    """
+    Versión en streaming de extract_text_from_pdf: emite las líneas página a página
+    (mismas líneas, en el mismo orden, que extract_text_from_pdf(...).split("\\n")),
+    sin construir el texto completo del documento.
+    limits y stats como en extract_text_from_pdf; las claves de resultado parcial se
+    rellenan al terminar de recorrer el documento.
+    fallback como en extract_text_from_pdf, salvo que solo cubre un motor no instalado o
+    que falla al abrir el PDF: las líneas ya emitidas no se pueden retirar.
+    """
+    source = as_pdf_source(pdf_path)
+    name = backend or DEFAULT_BACKEND
+    reason = None
+    if name != DEFAULT_BACKEND and fallback and not is_available(name):
+        name, reason = DEFAULT_BACKEND, f"{name}: no instalado"
+    try:
+        doc = open_document(source, name)
+    except Exception as e:
+        if name == DEFAULT_BACKEND or not fallback:
+            raise
+        name, reason = DEFAULT_BACKEND, f"{name}: {type(e).__name__}: {e}"
+        _rewind(source)
+        doc = open_document(source, name)
+    if stats is not None:
+        stats["backend"] = name
+        if reason:
+            stats["backend_fallback"] = reason
+    guard = guard_for(limits)
+    with doc:
+        if stats is not None:
+            stats["pages"] = doc.n_pages
+        for i in range(doc.n_pages):
+            if guard is None:
+                text = doc.page_text(i)
+            else:
+                text = guard.extract(i, lambda i=i: doc.page_text(i))
             if text:
-                parts.append(text)
-    return "\n".join(parts)
+                yield from text.split("\n")
+    report = guard.report() if guard is not None else None
+    if stats is not None and report:
+        stats.update(report)
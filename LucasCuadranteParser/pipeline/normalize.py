@@ -7,11 +7,12 @@ de cada rango horario del día (11-16 = 5h, 19-23 = 4h, etc.), sin descansos.
 Los turnos (Mediodía/Tarde/Noche) se rellenan con el solapamiento de esos rangos.
 """
 
-from dataclasses import dataclass, asdict
-from typing import List, Any
+from dataclasses import dataclass
+from typing import List, Union
 
 from .entities import DayEntities, duration_hours
-from .relations import apply_shift_rules, ShiftAggregate
+from .relations import apply_shift_rules, apply_shift_rules_batch, ShiftAggregate
+from .table import FLAG_CROSSES_MIDNIGHT, FLAG_OTHER_ESTABLISHMENT, FLAG_REST_OR_ABSENCE, ShiftTable
 
 
 @dataclass
@@ -33,7 +34,7 @@ def _day_total_hours(day_entities: DayEntities) -> float:
     from collections import defaultdict
     by_employee: dict = defaultdict(list)
     for ps in day_entities.shifts:
-        if ps.is_rest_or_absence or getattr(ps, "is_other_establishment", False):
+        if ps.is_rest_or_absence or ps.is_other_establishment:
             continue
         d = duration_hours(ps)
         key = (ps.employee_name or "")
@@ -44,7 +45,7 @@ def _day_total_hours(day_entities: DayEntities) -> float:
         emp_total = sum(d for _ps, d in pairs)
         cap = None
         for ps, _d in pairs:
-            cap = getattr(ps, "max_hours_cap", None)
+            cap = ps.max_hours_cap
             if cap is not None:
                 break
         if cap is not None:
@@ -63,29 +64,82 @@ def _day_total_hours(day_entities: DayEntities) -> float:
     return total
 
 
-def to_lucas_week(day_entities_list: List[DayEntities]) -> List[dict]:
+def day_total_hours_table(table: ShiftTable) -> List[float]:
+    """_day_total_hours de cada día de un ShiftTable, leyendo sus columnas (mismo resultado)."""
+    skip = FLAG_REST_OR_ABSENCE | FLAG_OTHER_ESTABLISHMENT
+    text = table.text
+    totals: List[float] = []
+    for d in range(table.n_days):
+        by_employee: dict = {}
+        caps: dict = {}
+        for k in range(table.day_offsets[d], table.day_offsets[d + 1]):
+            flags = table.flags[k]
+            if flags & skip:
+                continue
+            start_min = table.start_min[k]
+            end_min = table.end_min[k]
+            if flags & FLAG_CROSSES_MIDNIGHT or end_min <= start_min:
+                end_min += 24 * 60
+            key = text(table.employee[k]) or ""
+            by_employee.setdefault(key, []).append((end_min - start_min) / 60.0)
+            cap = table.cap[k]
+            if key not in caps and cap == cap:  # NaN = sin tope; vale el primero del empleado
+                caps[key] = cap
+        total = 0.0
+        employees_with_work = set()
+        for emp, durations in by_employee.items():
+            emp_total = sum(durations)
+            if emp in caps:
+                emp_total = min(emp_total, caps[emp])
+            total += emp_total
+            if emp:
+                employees_with_work.add(emp.strip())
+        for k in range(table.emp_offsets[d], table.emp_offsets[d + 1]):
+            name = text(table.emp_name[k])
+            hours = table.emp_hours[k]
+            if not name or "sin asignar" in name.lower() or hours <= 0 or hours >= 2:
+                continue
+            if name.strip() not in employees_with_work:
+                total += hours
+        totals.append(total)
+    return totals
+
+
+def _lucas_day_json(date_iso: str, total_hours: float, aggregates: List[ShiftAggregate]) -> dict:
+    shifts_json = [
+        {
+            "shift_name": a.shift_name,
+            "staff_floor": a.staff_floor,
+            "staff_kitchen": a.staff_kitchen,
+            "hours_worked": round(a.hours_worked, 2),
+        }
+        for a in aggregates
+    ]
+    return {
+        "date": date_iso,
+        "total_revenue": 0.0,
+        "total_hours_worked": round(total_hours, 2),
+        "shifts": shifts_json,
+    }
+
+
+def to_lucas_day(day_entities: DayEntities) -> dict:
+    """Un DayEntities -> un día en formato Lucas (ver to_lucas_week)."""
+    return _lucas_day_json(day_entities.date_iso, _day_total_hours(day_entities), apply_shift_rules(day_entities))
+
+
+def to_lucas_week(day_entities_list: Union[List[DayEntities], ShiftTable]) -> List[dict]:
     """
-    Convierte la lista de DayEntities en una lista de días en formato Lucas:
+    Convierte la lista de DayEntities (o un ShiftTable) en una lista de días en formato Lucas:
     cada día tiene date, total_revenue (0), total_hours_worked, shifts (array de
     { shift_name, staff_floor, staff_kitchen, hours_worked }).
+    Las ventanas de turno de todos los días se calculan en bloque (apply_shift_rules_batch).
     """
-    result: List[dict] = []
-    for day_entities in day_entities_list:
-        aggregates: List[ShiftAggregate] = apply_shift_rules(day_entities)
-        total_hours = _day_total_hours(day_entities)
-        shifts_json = [
-            {
-                "shift_name": a.shift_name,
-                "staff_floor": a.staff_floor,
-                "staff_kitchen": a.staff_kitchen,
-                "hours_worked": round(a.hours_worked, 2),
-            }
-            for a in aggregates
-        ]
-        result.append({
-            "date": day_entities.date_iso,
-            "total_revenue": 0.0,
-            "total_hours_worked": round(total_hours, 2),
-            "shifts": shifts_json,
-        })
-    return result
+    aggregates = apply_shift_rules_batch(day_entities_list)
+    if isinstance(day_entities_list, ShiftTable):
+        dates = day_entities_list.dates
+        totals = day_total_hours_table(day_entities_list)
+    else:
+        dates = [d.date_iso for d in day_entities_list]
+        totals = [_day_total_hours(d) for d in day_entities_list]
+    return [_lucas_day_json(*day) for day in zip(dates, totals, aggregates)]
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Recorte a la tabla del cuadrante: solo se reconstruye el texto de la rejilla de horarios.
+
+Cada página BETLEM lleva, además de la rejilla, texto que segment/entities solo saltan:
+la cabecera de la primera página ("Imprimir fecha", "Descargue la aplicación ... código
+QR") y, tras la fila "Total empleados" de cada día, la leyenda "Puestos: / Equipos: /
+Empleados: <todos los nombres>" y "Notas". Esa leyenda va en medio de la página (entre
+un día y el siguiente), así que no basta un rectángulo: se guardan bandas horizontales.
+
+La geometría se toma una vez por documento de la fila de cabecera de la primera página
+("Lunes 10 noviembre 0h 1h ... Total Firma"): columnas de "Total" y "Firma" y margen
+izquierdo de la leyenda (detect_layout). En cada página (table_bands):
+
+- se descarta cada leyenda: desde la línea "Puestos:" que empieza en el margen de la
+  leyenda, mientras las líneas sigan empezando en ese margen. No se corta hasta la
+  siguiente cabecera de día: la etiqueta del día ("Miércoles 12") puede ir unos pt por
+  encima de su fila "Total Firma";
+- en la primera página, de la cabecera del documento solo se guarda lo que queda a la
+  izquierda de la columna "Total" (la línea "Horarios de BETLEM del ... al ...", de donde
+  sale el año), sin el bloque del código QR.
+
+Si la primera página no tiene fila de cabecera (otro formato), no se recorta nada.
+
+El formato Lucas sale igual que con la página entera. En las DayEntities puede cambiar
+el puesto de algún descanso: el puesto de reserva (último puesto visto) ya no puede
+salir de la lista de la leyenda, sino de la tabla.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .backends import Char, Y_TOLERANCE, _cluster_ids
+
+# Tolerancia (pt) al buscar una columna aprendida de la primera página en otra página
+COLUMN_TOLERANCE = 2.0
+# Las líneas de la leyenda empiezan todas en el mismo margen; las cabeceras de día, a
+# menos de 2 pt de él: tolerancia estrecha
+LEGEND_TOLERANCE = 0.5
+LEGEND_START = "Puestos:"
+
+# Banda: (x0, top, x1, bottom); se guardan los caracteres cuyo (x0, top) cae dentro
+Band = Tuple[float, float, float, float]
+
+_INF = float("inf")
+
+
+@dataclass(frozen=True)
+class TableLayout:
+    """Geometría de la tabla aprendida de la primera página (en pt, origen arriba a la izquierda)."""
+
+    total_x0: float  # columna "Total" de la fila de cabecera
+    firma_x0: float  # columna "Firma"
+    legend_x0: Optional[float]  # margen izquierdo de "Puestos:" (None si la página no tiene leyenda)
+
+
+def _find_word(chars: Sequence[Char], word: str) -> List[Char]:
+    """Primer carácter de cada aparición de word como caracteres seguidos (orden de contenido)."""
+    found = []
+    first, n = word[0], len(word)
+    for i, c in enumerate(chars):
+        if c[0] == first and "".join(ch[0] for ch in chars[i:i + n]) == word:
+            found.append(c)
+    return found
+
+
+def _header_tops(chars: Sequence[Char], total_x0: Optional[float] = None, firma_x0: Optional[float] = None) -> List[tuple]:
+    """(top, total_x0, firma_x0) de las filas con "Total" y "Firma" a la misma altura."""
+    totals = _find_word(chars, "Total")
+    rows = []
+    for f in _find_word(chars, "Firma"):
+        if firma_x0 is not None and abs(f[1] - firma_x0) > COLUMN_TOLERANCE:
+            continue
+        for t in totals:
+            if abs(t[3] - f[3]) <= Y_TOLERANCE and t[1] < f[1] and (
+                total_x0 is None or abs(t[1] - total_x0) <= COLUMN_TOLERANCE
+            ):
+                rows.append((min(t[3], f[3]), t[1], f[1]))
+                break
+    return sorted(rows)
+
+
+def detect_layout(first_page_chars: Sequence[Char]) -> Optional[TableLayout]:
+    """Geometría de la tabla a partir de la primera página, o None si no hay fila de cabecera."""
+    rows = _header_tops(first_page_chars)
+    if not rows:
+        return None
+    top, total_x0, firma_x0 = rows[0]
+    legends = [x0 for line_top, _, x0, text in _line_starts(first_page_chars) if text == LEGEND_START and line_top > top]
+    return TableLayout(total_x0=total_x0, firma_x0=firma_x0, legend_x0=legends[0] if legends else None)
+
+
+def _line_starts(chars: Sequence[Char]) -> List[tuple]:
+    """(top, bottom, x0, texto inicial) de cada línea (caracteres agrupados por top, como chars_to_text)."""
+    ids = _cluster_ids([c[3] for c in chars], Y_TOLERANCE)
+    lines: Dict[int, List[Char]] = {}
+    for c in chars:
+        lines.setdefault(ids[c[3]], []).append(c)
+    out = []
+    for k in sorted(lines):
+        line = sorted(lines[k], key=lambda c: c[1])
+        out.append((min(c[3] for c in line), max(c[4] for c in line), line[0][1],
+                    "".join(c[0] for c in line[:len(LEGEND_START)])))
+    return out
+
+
+def table_bands(chars: Sequence[Char], layout: TableLayout, first_page: bool = False) -> List[Band]:
+    """Bandas de la página que forman parte de la tabla (ver docstring del módulo)."""
+    bands: List[Band] = []
+    start = -_INF
+    if first_page:
+        headers = _header_tops(chars, layout.total_x0, layout.firma_x0)
+        if headers:
+            # Cabecera del documento: solo a la izquierda de la columna "Total"
+            start = headers[0][0] - Y_TOLERANCE
+            bands.append((-_INF, -_INF, layout.total_x0, start))
+    if layout.legend_x0 is None:
+        return bands + [(-_INF, start, _INF, _INF)]
+    in_legend = False
+    for top, _bottom, x0, text in _line_starts(chars):
+        at_margin = abs(x0 - layout.legend_x0) <= LEGEND_TOLERANCE
+        if not in_legend and at_margin and text == LEGEND_START and top >= start:
+            # Leyenda: desde "Puestos:" mientras las líneas empiecen en su margen
+            bands.append((-_INF, start, _INF, top))
+            in_legend = True
+        elif in_legend and not at_margin:
+            start = top
+            in_legend = False
+    if not in_legend:
+        bands.append((-_INF, start, _INF, _INF))
+    return bands
+
+
+def in_bands(x0: float, top: float, bands: Sequence[Band]) -> bool:
+    for bx0, btop, bx1, bbottom in bands:
+        if btop <= top < bbottom and bx0 <= x0 < bx1:
+            return True
+    return False
+
+
+def crop_chars(chars: Sequence[Char], bands: Sequence[Band]) -> List[Char]:
+    """Caracteres dentro de alguna banda, en su orden."""
+    return [c for c in chars if in_bands(c[1], c[3], bands)]
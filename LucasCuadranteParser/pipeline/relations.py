@@ -8,10 +8,14 @@ Si una persona trabaja al menos 1h30 en un turno, cuenta como 1 en ese turno (sa
 
 import re
 from dataclasses import dataclass
-from typing import List, Dict
+from functools import lru_cache
+from itertools import islice
+from typing import List, Optional, Tuple, Union
 
 import config
+from . import windows
 from .entities import DayEntities, ParsedShift
+from .table import FLAG_CROSSES_MIDNIGHT, FLAG_OTHER_ESTABLISHMENT, FLAG_REST_OR_ABSENCE, ShiftTable
 
 
 @dataclass
@@ -33,105 +37,210 @@ def _normalize_for_role(s: str) -> str:
     return s
 
 
-def _role_to_area(role: str) -> str | None:
-    """Devuelve 'sala', 'cocina' o None si no se reconoce."""
-    if not role:
-        return None
+# Tabla de puestos precalculada a partir de config.ROLE_TO_AREA (mismo orden: claves más
+# específicas primero): (clave normalizada, clave sin espacios ni guiones, área). Se
+# reconstruye sola si se sustituye config.ROLE_TO_AREA; si se modifica el dict en sitio,
+# llamar a reset_role_cache().
+_role_rules_source: Optional[dict] = None
+_role_rules: List[tuple] = []
+
+
+def reset_role_cache() -> None:
+    """Descarta la tabla de puestos y la memoria rol -> área (tras cambiar ROLE_TO_AREA)."""
+    global _role_rules_source
+    _role_rules_source = None
+    _area_for_role.cache_clear()
+
+
+def _current_role_rules() -> List[tuple]:
+    global _role_rules_source, _role_rules
+    if config.ROLE_TO_AREA is not _role_rules_source:
+        rules = []
+        for key, area in config.ROLE_TO_AREA.items():
+            key_n = _normalize_for_role(key)
+            if key_n:
+                rules.append((key_n, key_n.replace(" ", "").replace("-", ""), area))
+        _role_rules = rules
+        _role_rules_source = config.ROLE_TO_AREA
+        _area_for_role.cache_clear()
+    return _role_rules
+
+
+@lru_cache(maxsize=8192)
+def _area_for_role(role: str) -> Optional[str]:
     r = _normalize_for_role(role)
     if not r:
         return None
-    for key, area in config.ROLE_TO_AREA.items():
-        key_n = _normalize_for_role(key)
-        if not key_n:
-            continue
-        if key_n == r or key_n in r or r in key_n:
+    r_compact = r.replace(" ", "").replace("-", "")
+    for key_n, key_compact, area in _role_rules:
+        if key_n in r or r in key_n:
             return area
-        if key_n.replace(" ", "").replace("-", "") in r.replace(" ", "").replace("-", ""):
+        if key_compact in r_compact:
             return area
     return None
 
 
-def _overlap_hours(
-    start_h: int, start_m: int, end_h: int, end_m: int,
-    crosses_midnight: bool,
-    win_start_h: int, win_start_m: int, win_end_h: int, win_end_m: int,
-    win_crosses_midnight: bool,
-) -> float:
+def _role_to_area(role: str) -> Optional[str]:
+    """Devuelve 'sala', 'cocina' o None si no se reconoce. Memorizado por rol."""
+    if not role:
+        return None
+    _current_role_rules()
+    return _area_for_role(role)
+
+
+def _window_bounds() -> List[Tuple[int, int]]:
     """
-    Calcula solapamiento en horas entre un turno (start-end) y una ventana (win_*).
-    Horas en minutos para comparar: start_min = start_h*60+start_m, etc.
+    (inicio, fin) en minutos de cada ventana de config.SHIFT_NAMES, con fin > inicio.
+    Noche termina al día siguiente (fin + 24 h). Ventana no configurada = (0, 0), sin solape.
     """
-    def to_min(h: int, m: int, next_day: bool = False) -> float:
-        return (h * 60 + m) + (1440 if next_day else 0)
-
-    start_min = to_min(start_h, start_m)
-    end_min = to_min(end_h, end_m)
-    if crosses_midnight:
+    bounds = []
+    for shift_name in config.SHIFT_NAMES:
+        win = config.SHIFT_WINDOWS.get(shift_name)
+        if not win:
+            bounds.append((0, 0))
+            continue
+        (t0, t1) = win
+        win_s = t0.hour * 60 + t0.minute
+        win_e = t1.hour * 60 + t1.minute
+        if shift_name == "Noche":
+            win_e += 1440
+        if win_e <= win_s:
+            win_e += 1440
+        bounds.append((win_s, win_e))
+    return bounds
+
+
+def _shift_span(ps: ParsedShift) -> Tuple[int, int]:
+    """(inicio, fin) del turno en minutos desde las 00:00, con fin > inicio (cruce de medianoche)."""
+    start_min = ps.start_h * 60 + ps.start_m
+    end_min = ps.end_h * 60 + ps.end_m
+    if ps.crosses_midnight:
         end_min += 1440
-    win_s = to_min(win_start_h, win_start_m)
-    win_e = to_min(win_end_h, win_end_m)
-    if win_crosses_midnight:
-        win_e += 1440
-    # Normalizar turno que pasa medianoche: end > start
     if end_min <= start_min:
         end_min += 1440
-    if win_e <= win_s:
-        win_e += 1440
-    overlap_start = max(start_min, win_s)
-    overlap_end = min(end_min, win_e)
-    if overlap_end <= overlap_start:
-        return 0.0
-    return (overlap_end - overlap_start) / 60.0
+    return start_min, end_min
+
+
+def _counts_in_windows(ps: ParsedShift) -> bool:
+    """Descansos/ausencias y turnos en otros establecimientos no suman en ninguna ventana."""
+    return not (ps.is_rest_or_absence or ps.is_other_establishment)
 
 
 def _hours_in_shift_window(ps: ParsedShift, shift_name: str) -> float:
     """Horas del turno ps que caen dentro de la ventana del turno shift_name. Otros establecimientos no cuentan."""
-    if ps.is_rest_or_absence or getattr(ps, "is_other_establishment", False):
+    if not _counts_in_windows(ps) or shift_name not in config.SHIFT_NAMES:
         return 0.0
-    win = config.SHIFT_WINDOWS.get(shift_name)
-    if not win:
-        return 0.0
-    (t0, t1) = win
-    win_start_h, win_start_m = t0.hour, t0.minute
-    win_end_h, win_end_m = t1.hour, t1.minute
-    win_crosses = shift_name == "Noche"
-    return _overlap_hours(
-        ps.start_h, ps.start_m, ps.end_h, ps.end_m, ps.crosses_midnight,
-        win_start_h, win_start_m, win_end_h, win_end_m, win_crosses,
-    )
+    win_s, win_e = _window_bounds()[config.SHIFT_NAMES.index(shift_name)]
+    start_min, end_min = _shift_span(ps)
+    overlap = min(end_min, win_e) - max(start_min, win_s)
+    return overlap / 60.0 if overlap > 0 else 0.0
 
 
-def apply_shift_rules(day_entities: DayEntities) -> List[ShiftAggregate]:
+_AREA_CODES = {"sala": windows.AREA_SALA, "cocina": windows.AREA_COCINA}
+
+
+def _entity_columns(day_entities_list: List[DayEntities]) -> tuple:
+    """(inicios, fines, áreas, cortes por día) de los turnos que cuentan, desde DayEntities."""
+    starts: List[int] = []
+    ends: List[int] = []
+    areas: List[int] = []
+    offsets = [0]
+    for day_entities in day_entities_list:
+        for ps in day_entities.shifts:
+            if not _counts_in_windows(ps):
+                continue
+            start_min, end_min = _shift_span(ps)
+            starts.append(start_min)
+            ends.append(end_min)
+            areas.append(_AREA_CODES.get(_role_to_area(ps.role), windows.AREA_NONE))
+        offsets.append(len(starts))
+    return starts, ends, areas, offsets
+
+
+def _table_columns(table: ShiftTable, use_numpy: bool) -> tuple:
     """
-    Para cada turno nominal (Mediodia, Tarde, Noche): cuenta personas en sala/cocina
-    (cada trabajo con ≥ MIN_HOURS_IN_SHIFT en esa ventana cuenta 1) y suma horas.
+    Igual que _entity_columns pero leyendo las columnas de un ShiftTable. Con NumPy las
+    columnas se leen sin copia y el filtrado/normalización es vectorizado.
     """
-    result: List[ShiftAggregate] = []
-    for shift_name in config.SHIFT_NAMES:
-        staff_floor = 0
-        staff_kitchen = 0
-        hours_worked = 0.0
-        for ps in day_entities.shifts:
-            if ps.is_rest_or_absence or getattr(ps, "is_other_establishment", False):
+    skip = FLAG_REST_OR_ABSENCE | FLAG_OTHER_ESTABLISHMENT
+    # Área de cada puesto distinto (una consulta por texto, no por turno)
+    area_of = {
+        r: _AREA_CODES.get(_role_to_area(table.text(r)), windows.AREA_NONE) for r in set(table.role)
+    }
+    if use_numpy and windows.np is not None and len(table):
+        np = windows.np
+        flags = np.frombuffer(table.flags, dtype=table.flags.typecode)
+        keep = (flags & skip) == 0
+        starts = np.frombuffer(table.start_min, dtype=table.start_min.typecode).astype(np.int64)
+        ends = np.frombuffer(table.end_min, dtype=table.end_min.typecode).astype(np.int64)
+        ends += np.where(flags & FLAG_CROSSES_MIDNIGHT, 1440, 0)
+        ends += np.where(ends <= starts, 1440, 0)
+        lut = np.zeros(len(table.strings) + 1, dtype=np.int8)  # índice -1 -> posición 0
+        for r, area in area_of.items():
+            lut[r + 1] = area
+        areas = lut[np.frombuffer(table.role, dtype=table.role.typecode) + 1]
+        kept_before = np.concatenate([[0], np.cumsum(keep)])
+        offsets = kept_before[np.frombuffer(table.day_offsets, dtype=table.day_offsets.typecode)]
+        return starts[keep], ends[keep], areas[keep], offsets
+    starts: List[int] = []
+    ends: List[int] = []
+    areas: List[int] = []
+    offsets = [0]
+    columns = zip(table.flags.tolist(), table.start_min.tolist(), table.end_min.tolist(), table.role.tolist())
+    for n_shifts in (b - a for a, b in zip(table.day_offsets, table.day_offsets[1:])):
+        for flags, start_min, end_min, role in islice(columns, n_shifts):
+            if flags & skip:
                 continue
-            h = _hours_in_shift_window(ps, shift_name)
-            hours_worked += h
-            # Solo contar como 1 persona en el turno si trabaja al menos MIN_HOURS_IN_SHIFT (1h30).
-            # No usar 0.5 por presencia corta: evita 1-2-2 cuando debería ser 1-1-2 (ej. alguien con 1h en Tarde + otro con 4h).
-            if h >= config.MIN_HOURS_IN_SHIFT:
-                area = _role_to_area(ps.role)
-                if area == "sala":
-                    staff_floor += 1
-                elif area == "cocina":
-                    staff_kitchen += 1
-        staff_floor_final = int(staff_floor)
-        staff_kitchen_final = int(staff_kitchen)
-        result.append(
+            if flags & FLAG_CROSSES_MIDNIGHT:
+                end_min += 1440
+            if end_min <= start_min:
+                end_min += 1440
+            starts.append(start_min)
+            ends.append(end_min)
+            areas.append(area_of[role])
+        offsets.append(len(starts))
+    return starts, ends, areas, offsets
+
+
+def apply_shift_rules_batch(
+    days: Union[List[DayEntities], ShiftTable], use_numpy: Optional[bool] = None
+) -> List[List[ShiftAggregate]]:
+    """
+    apply_shift_rules para muchos días de una vez (ej. re-agregar meses o años de
+    histórico tras cambiar ventanas): los turnos de todos los días se pasan a minutos
+    una sola vez y se cruzan con todas las ventanas en bloque (pipeline/windows.py,
+    NumPy si está disponible). Mismo resultado, día a día, que apply_shift_rules.
+    days puede ser una lista de DayEntities o un ShiftTable (pipeline/table.py).
+    """
+    if isinstance(days, ShiftTable):
+        if use_numpy is None:
+            use_numpy = len(days) >= windows.NUMPY_MIN_SHIFTS and windows.np is not None
+        starts, ends, areas, offsets = _table_columns(days, use_numpy)
+    else:
+        starts, ends, areas, offsets = _entity_columns(days)
+
+    totals = windows.window_totals(
+        starts, ends, areas, offsets, _window_bounds(), config.MIN_HOURS_IN_SHIFT, use_numpy=use_numpy
+    )
+    # Solo cuenta como 1 persona en el turno quien trabaja al menos MIN_HOURS_IN_SHIFT (1h30) en él.
+    # No usar 0.5 por presencia corta: evita 1-2-2 cuando debería ser 1-1-2 (ej. alguien con 1h en Tarde + otro con 4h).
+    return [
+        [
             ShiftAggregate(
                 shift_name=shift_name,
-                staff_floor=staff_floor_final,
-                staff_kitchen=staff_kitchen_final,
-                hours_worked=round(hours_worked, 2),
+                staff_floor=int(floor),
+                staff_kitchen=int(kitchen),
+                hours_worked=round(hours, 2),
             )
-        )
-    return result
+            for shift_name, (hours, floor, kitchen) in zip(config.SHIFT_NAMES, day)
+        ]
+        for day in totals
+    ]
+
+
+def apply_shift_rules(day_entities: DayEntities) -> List[ShiftAggregate]:
+    """
+    Para cada turno nominal (Mediodia, Tarde, Noche): cuenta personas en sala/cocina
+    (cada trabajo con ≥ MIN_HOURS_IN_SHIFT en esa ventana cuenta 1) y suma horas.
+    """
+    return apply_shift_rules_batch([day_entities])[0]
@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""Orquestación: encadena ingest -> segment -> entities -> normalize para un PDF o un texto."""
+
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+from .backends import DEFAULT_BACKEND
+from .cache import ResultCache, pdf_sha256
+from .guards import Limits
+from .ingest import PdfInput, as_pdf_source, extract_text_from_pdf, iter_pdf_lines
+from .segment import iter_day_blocks, segment_by_days, week_year
+from .entities import DayEntities, entity_year, extract_day_entities, extract_entities_from_day_blocks
+from .serialize import EntityStore
+from .timings import StageTimer, stage
+
+# normalize (con relations y windows) se importa al agregar: un acierto de caché en
+# parse_pdf no lo carga (ver tests/test_startup.py)
+
+
+def extract_entities_from_text(
+    text: str, timer: Optional[StageTimer] = None, entity_workers: Optional[int] = None
+) -> List[DayEntities]:
+    """
+    Texto ya extraído de un cuadrante -> DayEntities por día ([] si no hay días).
+    Con timer se miden las etapas "segment" y "entities" y se cuentan líneas, días,
+    turnos y empleados (ver pipeline/timings.py).
+    entity_workers: procesos para las entidades de documentos largos (ver
+    extract_entities_from_day_blocks; None = secuencial).
+    """
+    with stage(timer, "segment"):
+        day_blocks, info = segment_by_days(text)
+    if timer is not None:
+        timer.count("lines", text.count("\n") + 1)
+    if not day_blocks:
+        return []
+
+    with stage(timer, "entities"):
+        day_entities_list = extract_entities_from_day_blocks(
+            day_blocks, year_from_week=week_year(info), workers=entity_workers
+        )
+    if timer is not None:
+        timer.count("days", len(day_entities_list))
+        timer.count("shifts", sum(len(d.shifts) for d in day_entities_list))
+        timer.count("employees", sum(len(d.employees) for d in day_entities_list))
+    return day_entities_list
+
+
+def _extract_pdf_entities(
+    source,
+    workers: Optional[int] = None,
+    stats: Optional[dict] = None,
+    timer: Optional[StageTimer] = None,
+    backend: Optional[str] = None,
+    entity_workers: Optional[int] = None,
+    limits: Optional[Limits] = None,
+) -> List[DayEntities]:
+    """DayEntities de un PDF: texto extraído (ingest) -> segment -> entities."""
+    with stage(timer, "ingest"):
+        text = extract_text_from_pdf(source, workers=workers, stats=stats, backend=backend, limits=limits)
+    return extract_entities_from_text(text, timer=timer, entity_workers=entity_workers)
+
+
+def parse_text(
+    text: str, timer: Optional[StageTimer] = None, entity_workers: Optional[int] = None
+) -> List[dict]:
+    """
+    Convierte el texto ya extraído de un cuadrante en la lista de días formato Lucas.
+    Devuelve [] si no se detecta ningún día.
+    """
+    from .normalize import to_lucas_week
+
+    day_entities_list = extract_entities_from_text(text, timer=timer, entity_workers=entity_workers)
+    with stage(timer, "aggregate"):
+        return to_lucas_week(day_entities_list)
+
+
+def parse_pdf(
+    pdf_path: PdfInput,
+    cache: Optional[ResultCache] = None,
+    workers: Optional[int] = None,
+    entity_store: Optional[EntityStore] = None,
+    timer: Optional[StageTimer] = None,
+    backend: Optional[str] = None,
+    entity_workers: Optional[int] = None,
+    limits: Optional[Limits] = None,
+    stats: Optional[dict] = None,
+) -> List[dict]:
+    """
+    PDF de cuadrante -> lista de días formato Lucas (ver parse_text).
+    Con cache, un PDF idéntico ya parseado con la misma configuración no se vuelve a procesar;
+    si no se puede escribir en la caché se avisa por stderr y se devuelve el resultado igual.
+    Con entity_store se guardan además sus DayEntities (para re-agregar sin el PDF; también
+    solo con aviso si falla la escritura); si aún no están guardadas, el PDF se parsea
+    aunque el resultado esté en caché.
+    pdf_path: ruta o PDF en memoria (bytes, mmap, stdin; ver ingest.as_pdf_source).
+    workers, backend: procesos y motor para la extracción de texto (ver extract_text_from_pdf).
+    entity_workers: procesos para las entidades (ver extract_entities_from_day_blocks).
+    timer: mide cada etapa (cache, ingest, segment, entities, aggregate, store) y cuenta
+    páginas, líneas, días, turnos, empleados y aciertos de caché.
+    limits: páginas, caracteres y tiempo máximos de la extracción (por defecto los de
+    config; ver pipeline/guards.py). Si se pasa stats (dict), se rellena con los datos de
+    la extracción; con páginas saltadas, stats["partial"] = True y stats["skipped_pages"]:
+    el resultado es parcial y no se guarda en la caché ni en entity_store. Si el PDF se
+    parsea (no en un acierto de caché), stats["day_entities"] son sus DayEntities, para
+    no extraerlas otra vez con pdf_entities.
+    """
+    source = as_pdf_source(pdf_path)
+    if limits is None:
+        limits = Limits.from_config()
+    sha = key = None
+    if cache is not None or entity_store is not None:
+        with stage(timer, "cache"):
+            sha = pdf_sha256(source)
+            key = cache.key_for(source, sha256=sha, backend=backend) if cache else None
+            week_data = cache.get(key) if cache else None
+            hit = week_data is not None and (entity_store is None or entity_store.has(sha))
+        if hit:
+            if timer is not None:
+                timer.count("cache_hits", 1)
+                timer.count("days", len(week_data))
+            return week_data
+    from .normalize import to_lucas_week
+
+    if stats is None:
+        stats = {}
+    day_entities_list = _extract_pdf_entities(
+        source, workers=workers, stats=stats, timer=timer, backend=backend, entity_workers=entity_workers,
+        limits=limits,
+    )
+    stats["day_entities"] = day_entities_list
+    if timer is not None:
+        timer.count("pages", stats.get("pages", 0))
+        if stats.get("backend_fallback"):
+            timer.count("backend_fallbacks", 1)
+        if stats.get("partial"):
+            timer.count("skipped_pages", len(stats["skipped_pages"]))
+    with stage(timer, "aggregate"):
+        week_data = to_lucas_week(day_entities_list)
+    if sha is not None and not stats.get("partial"):
+        with stage(timer, "store"):
+            if day_entities_list and entity_store is not None:
+                name = source.name if isinstance(source, Path) else "-"
+                try:
+                    entity_store.put(sha, day_entities_list, source=name, backend=stats.get("backend"))
+                except OSError as e:
+                    print(f"Aviso: no se pudieron guardar las entidades en {entity_store.store_dir}: {e}",
+                          file=sys.stderr)
+            if week_data and cache:
+                try:
+                    cache.put(key, week_data)
+                except OSError as e:
+                    # La caché es solo una optimización: el resultado ya está calculado
+                    print(f"Aviso: no se pudo guardar en la caché {cache.cache_dir}: {e}", file=sys.stderr)
+    return week_data
+
+
+def pdf_entities(
+    pdf_path: PdfInput,
+    entity_store: Optional[EntityStore] = None,
+    backend: Optional[str] = None,
+    workers: Optional[int] = None,
+    limits: Optional[Limits] = None,
+) -> List[DayEntities]:
+    """
+    DayEntities del PDF (ej. para la salida columnar con detalle por empleado): las de
+    entity_store si ya están guardadas (parse_pdf las guarda), si no se extraen de nuevo
+    con limits (por defecto los de config, como parse_pdf). Tras un parse_pdf que sí
+    parseó el PDF, mejor stats["day_entities"]: esto vuelve a extraerlas.
+    """
+    source = as_pdf_source(pdf_path)
+    if entity_store is not None:
+        stored = entity_store.get(pdf_sha256(source))
+        if stored is not None:
+            return stored
+    if limits is None:
+        limits = Limits.from_config()
+    return _extract_pdf_entities(source, workers=workers, backend=backend, limits=limits)
+
+
+def iter_lines_days(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Pipeline en streaming: líneas -> días formato Lucas, uno a uno según se completa
+    cada día. La memoria queda acotada por un día, no por el documento. El año se toma
+    del rango de semana de la cabecera leída hasta ese momento (en los cuadrantes
+    BETLEM va en la primera línea de cada página, antes del primer día).
+    """
+    from .normalize import to_lucas_day
+
+    info: dict = {}
+    for block in iter_day_blocks(lines, info):
+        yield to_lucas_day(extract_day_entities(block, entity_year(week_year(info))))
+
+
+def iter_pdf_days(
+    pdf_path: PdfInput,
+    backend: Optional[str] = None,
+    limits: Optional[Limits] = None,
+    stats: Optional[dict] = None,
+) -> Iterator[dict]:
+    """
+    Como parse_pdf pero en streaming: el primer día sale antes de leer la última página.
+    limits (por defecto los de config) y stats como en parse_pdf; stats["partial"] se
+    conoce al agotar el iterador.
+    """
+    if limits is None:
+        limits = Limits.from_config()
+    return iter_lines_days(iter_pdf_lines(pdf_path, backend=backend, limits=limits, stats=stats))
+
+
+def compare_backends(pdf_path: Union[str, Path], backend: str, reference: str = DEFAULT_BACKEND) -> dict:
+    """
+    Modo validación: extrae el PDF con `reference` y con `backend` (sin fallback) y compara
+    los días de segment_by_days. identical=True si los bloques de día (y la cabecera de
+    semana) coinciden: el motor puede usarse con este tipo de documento sin cambiar el
+    resultado. differing_days lista los días distintos ("Lunes 3 noviembre").
+    """
+    texts, seconds = {}, {}
+    for name in (reference, backend):
+        t0 = time.perf_counter()
+        texts[name] = extract_text_from_pdf(pdf_path, backend=name, fallback=False)
+        seconds[name] = round(time.perf_counter() - t0, 3)
+    ref_blocks, ref_info = segment_by_days(texts[reference])
+    blocks, info = segment_by_days(texts[backend])
+    differing = [
+        f"{b.day_name} {b.day_num} {b.month_name}"
+        for i, b in enumerate(ref_blocks)
+        if i >= len(blocks) or blocks[i] != b
+    ]
+    differing += [f"{b.day_name} {b.day_num} {b.month_name}" for b in blocks[len(ref_blocks):]]
+    return {
+        "pdf": Path(pdf_path).name,
+        "reference": reference,
+        "backend": backend,
+        "identical": not differing and info == ref_info,
+        "text_identical": texts[backend] == texts[reference],
+        "days": len(ref_blocks),
+        "differing_days": differing,
+        "seconds": seconds,
+    }
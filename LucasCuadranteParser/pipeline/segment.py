@@ -2,8 +2,9 @@
 """Segmentación: detectar cabecera de semana y cortar por día."""
 
 import re
-from dataclasses import dataclass
-from typing import List
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Iterable, Iterator, List, Optional
 
 # Patrón: "Lunes 9 febrero", "Martes 10 febrero", etc. (día nombre + número + mes)
 # Mi.?rcoles / S.?bado: PDF puede dar Miércoles (é) o Mircoles (FFFD); Sábado (á) o Sabado/Sbado
@@ -40,9 +41,11 @@ class DayBlock:
     month_name: str
     raw_text: str
     start_line: int
+    # Líneas del bloque (las mismas de raw_text) para no volver a partir el texto en entities
+    lines: Optional[List[str]] = field(default=None, repr=False, compare=False)
 
 
-def _parse_week_range(text: str) -> tuple | None:
+def _parse_week_range(text: str) -> Optional[tuple]:
     """Devuelve (día_inicio, mes, año) del inicio de semana si se encuentra."""
     m = WEEK_RANGE.search(text)
     if not m:
@@ -59,138 +62,191 @@ def _month_spanish_to_num(name: str) -> int:
     return meses.get(name.lower().strip(), 0)
 
 
+# Cabeceras de día: un único patrón precompilado clasifica cada línea en una pasada.
+# Reconoce "Día número" con separador opcional (":" o "-", encodings raros) y, si lo hay,
+# la palabra siguiente (el mes). De un solo match se deduce qué variante es:
+# - _KIND_FULL:   "Lunes 9 febrero ..." / "Lunes: 9 febrero" (mes en la misma línea)
+# - _KIND_NUM:    "Lunes 9" sola (el mes viene en las líneas siguientes)
+# - _KIND_PREFIX: empieza por "Día número" pero no es ninguna de las anteriores ("Martes 10:00 ...")
+# Mismas alternativas de nombre de día que DAY_HEADER.
+_HEADER_SCAN = re.compile(
+    r"(Lunes|Martes|Mi[ée]?rcoles|Mircoles|Mi.?rcoles|Jueves|Viernes|S[áa]?bado|Sabado|Sbado|S.?bado|Domingo)"
+    r"(\s*[:\-]?\s*)(\d{1,2})(?:\s+(\w+))?",
+    re.IGNORECASE,
+)
+# Primeras letras posibles de una cabecera (con IGNORECASE, "ſ" también casa con "s"):
+# el resto de líneas se descartan sin ejecutar ninguna regex
+_HEADER_FIRST_CHARS = frozenset("LMJVSDlmjvsdſ")
+_KIND_NONE = 0
+_KIND_PREFIX = 1
+_KIND_NUM = 2
+_KIND_FULL = 3
+
+_HOURS_ROW = re.compile(r"^[\d\sh]+$")
+_MONTHS = ("enero", "febrero", "marzo", "abril", "mayo", "junio",
+           "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+_MONTH_RANK = {m: k for k, m in enumerate(_MONTHS)}
+# Lookahead: encuentra todas las apariciones de meses, aunque se solapen
+_MONTH_ANY = re.compile("(?=(" + "|".join(_MONTHS) + "))")
+
+# Cómo se corta un bloque: tras "Día número" + mes en líneas siguientes (estricto: solo
+# corta otra cabecera completa o "Día número") o tras cabecera con mes (prefijo: corta
+# cualquier línea que empiece por "Día número")
+_CUT_STRICT = frozenset((_KIND_NUM, _KIND_FULL))
+_CUT_PREFIX = frozenset((_KIND_PREFIX, _KIND_NUM, _KIND_FULL))
+
+
+def _scan_header(line: str) -> tuple:
+    """Clasifica una línea: (tipo _KIND_*, match o None). Una sola regex y solo para candidatas."""
+    head = line.lstrip()[:1]
+    if not head or head not in _HEADER_FIRST_CHARS:
+        return _KIND_NONE, None
+    stripped = line.strip()
+    m = _HEADER_SCAN.match(stripped)
+    if m is None:
+        return _KIND_NONE, None
+    if m.group(4) is not None:
+        return _KIND_FULL, m
+    sep = m.group(2)
+    if sep and sep.isspace() and not stripped[m.end():].strip():
+        return _KIND_NUM, m
+    return _KIND_PREFIX, m
+
+
+def _find_month(next_lines: List[str], skip_total_firma: bool) -> Optional[str]:
+    """Busca un nombre de mes en las líneas siguientes a la cabecera (saltando la fila de horas)."""
+    for raw in next_lines:
+        next_line = raw.strip().lower()
+        if _HOURS_ROW.match(next_line) or (skip_total_firma and ("total" in next_line or "firma" in next_line)):
+            continue
+        found = _MONTH_ANY.findall(next_line)
+        if found:
+            # Si hay varios meses gana el primero en orden de calendario
+            return min(found, key=_MONTH_RANK.__getitem__)
+    return None
+
+
+def _open_block(kind: int, m, next_lines: Callable[[], List[str]]) -> Optional[tuple]:
+    """
+    Si la línea (ya clasificada) abre un día, devuelve (day_name, day_num, month_name, corte).
+    next_lines() devuelve las (hasta) 3 líneas siguientes, para buscar el mes.
+    """
+    if kind == _KIND_FULL:
+        return _normalize_day_name(m.group(1)), int(m.group(3)), m.group(4), _CUT_PREFIX
+    if kind != _KIND_NUM:
+        return None
+    # "Día número" sin mes: el mes puede estar en la línea siguiente o tras la cabecera de horas
+    following = next_lines()
+    month_name = _find_month(following, skip_total_firma=True)
+    if month_name:
+        return _normalize_day_name(m.group(1)), int(m.group(3)), month_name, _CUT_STRICT
+    month_name = _find_month(following, skip_total_firma=False)
+    if month_name:
+        return _normalize_day_name(m.group(1)), int(m.group(3)), month_name, _CUT_PREFIX
+    return None
+
+
+def iter_day_blocks(lines: Iterable[str], info: Optional[dict] = None) -> Iterator[DayBlock]:
+    """
+    Versión en streaming de segment_by_days: consume líneas (por ejemplo, página a
+    página desde ingest.iter_pdf_lines) y emite cada DayBlock en cuanto aparece la
+    cabecera del día siguiente. Solo guarda en memoria el día en curso y, como mucho,
+    3 líneas de adelanto (búsqueda del mes).
+
+    Si se pasa info (dict), se rellena info["week_start_dd_mm_yyyy"] con el rango de
+    semana de la cabecera en cuanto se lee (buscado línea a línea).
+    """
+    it = iter(lines)
+    ahead: Deque[str] = deque()
+
+    def peek() -> List[str]:
+        while len(ahead) < 3:
+            nxt = next(it, None)
+            if nxt is None:
+                break
+            ahead.append(nxt)
+        return list(ahead)
+
+    want_week = info is not None and "week_start_dd_mm_yyyy" not in info
+    header: Optional[tuple] = None
+    chunk: List[str] = []
+    start_line = 0
+    i = -1
+    while True:
+        line = ahead.popleft() if ahead else next(it, None)
+        if line is None:
+            break
+        i += 1
+        if want_week:
+            week_start = _parse_week_range(line)
+            if week_start:
+                info["week_start_dd_mm_yyyy"] = week_start
+                want_week = False
+        kind, m = _scan_header(line)
+        if header is not None:
+            if kind not in header[3]:
+                chunk.append(line)
+                continue
+            yield DayBlock(header[0], header[1], header[2], "\n".join(chunk), start_line, lines=chunk)
+            header = None
+        if kind:
+            header = _open_block(kind, m, peek)
+            if header is not None:
+                chunk = [line]
+                start_line = i + 1
+    if header is not None:
+        yield DayBlock(header[0], header[1], header[2], "\n".join(chunk), start_line, lines=chunk)
+
+
+def week_year(info: dict) -> Optional[int]:
+    """
+    Año del rango de semana de la cabecera (info de segment_by_days o iter_day_blocks),
+    o None si no hay cabecera: entities usa entonces el año actual.
+    """
+    week_start = info.get("week_start_dd_mm_yyyy")
+    return week_start[2] if week_start else None
+
+
 def segment_by_days(full_text: str) -> tuple[List[DayBlock], dict]:
     """
     Segmenta el texto en bloques por día.
     Retorna (lista de DayBlock, info) donde info puede contener week_start para fechas.
+
+    Una sola pasada clasifica todas las líneas y guarda el índice de las que son
+    cabecera; los bloques se recortan por índices (sin volver a recorrer líneas).
     """
     lines = full_text.split("\n")
-    day_blocks: List[DayBlock] = []
     info = {}
-
     week_start = _parse_week_range(full_text)
     if week_start:
         info["week_start_dd_mm_yyyy"] = week_start
 
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        # Patrón básico: día + número (sin mes en la misma línea)
-        day_num_pattern = re.compile(
-            r"^(Lunes|Martes|Mi[ée]?rcoles|Mircoles|Mi.?rcoles|Jueves|Viernes|S[áa]?bado|Sabado|Sbado|S.?bado|Domingo)\s+(\d{1,2})\s*$",
-            re.IGNORECASE,
-        )
-        # Intentar match estricto primero (día + número + mes en misma línea)
-        m = DAY_HEADER.match(line.strip())
-        if not m:
-            # Fallback: buscar patrón más flexible para días que pueden tener encoding raro
-            day_pattern_flexible = re.compile(
-                r"^(Lunes|Martes|Mi[ée]?rcoles|Mircoles|Mi.?rcoles|Jueves|Viernes|S[áa]?bado|Sabado|Sbado|S.?bado|Domingo)\s*[:\-]?\s*(\d{1,2})\s+(\w+)",
-                re.IGNORECASE,
-            )
-            m = day_pattern_flexible.search(line.strip())
-        # Si no hay match pero la línea es "Día número" (sin mes), buscar el mes en las siguientes líneas
-        if not m:
-            m = day_num_pattern.match(line.strip())
-            if m:
-                # El mes puede estar en la línea siguiente o después de la cabecera de horas
-                day_name = _normalize_day_name(m.group(1))
-                day_num = int(m.group(2))
-                month_name = None
-                # Buscar mes en las siguientes 3 líneas (saltando cabeceras de horas)
-                for j in range(i + 1, min(i + 4, len(lines))):
-                    next_line = lines[j].strip().lower()
-                    # Si la línea siguiente es solo números/horas, saltarla
-                    if re.match(r"^[\d\sh]+$", next_line) or "total" in next_line or "firma" in next_line:
-                        continue
-                    # Buscar nombre de mes en español
-                    month_candidates = ["enero", "febrero", "marzo", "abril", "mayo", "junio",
-                                       "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
-                    for month in month_candidates:
-                        if month in next_line:
-                            month_name = month
-                            break
-                    if month_name:
-                        break
-                if month_name:
-                    # Acumular líneas hasta el siguiente día o fin
-                    chunk = [line]
-                    j = i + 1
-                    while j < len(lines):
-                        next_line = lines[j]
-                        next_stripped = next_line.strip()
-                        # Detectar siguiente día (con o sin mes)
-                        if (DAY_HEADER.match(next_stripped) or 
-                            day_pattern_flexible.search(next_stripped) or
-                            day_num_pattern.match(next_stripped)):
-                            break
-                        chunk.append(next_line)
-                        j += 1
-                    raw = "\n".join(chunk)
-                    day_blocks.append(
-                        DayBlock(
-                            day_name=day_name,
-                            day_num=day_num,
-                            month_name=month_name,
-                            raw_text=raw,
-                            start_line=i + 1,
-                        )
-                    )
-                    i = j
-                    continue
-        if m:
-            day_name = _normalize_day_name(m.group(1))
-            try:
-                day_num = int(m.group(2))
-                month_name = m.group(3) if len(m.groups()) >= 3 else None
-                if not month_name:
-                    # Buscar mes en línea siguiente
-                    for j in range(i + 1, min(i + 4, len(lines))):
-                        next_line = lines[j].strip().lower()
-                        if re.match(r"^[\d\sh]+$", next_line):
-                            continue
-                        month_candidates = ["enero", "febrero", "marzo", "abril", "mayo", "junio",
-                                           "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"]
-                        for month in month_candidates:
-                            if month in next_line:
-                                month_name = month
-                                break
-                        if month_name:
-                            break
-            except (ValueError, IndexError):
-                i += 1
-                continue
-            if month_name:
-                # Acumular líneas hasta el siguiente día o fin
-                chunk = [line]
-                j = i + 1
-                while j < len(lines):
-                    next_line = lines[j]
-                    next_stripped = next_line.strip()
-                    day_pattern_flexible = re.compile(
-                        r"^(Lunes|Martes|Mi[ée]?rcoles|Mircoles|Mi.?rcoles|Jueves|Viernes|S[áa]?bado|Sabado|Sbado|S.?bado|Domingo)\s*[:\-]?\s*(\d{1,2})",
-                        re.IGNORECASE,
-                    )
-                    if (DAY_HEADER.match(next_stripped) or 
-                        day_pattern_flexible.search(next_stripped) or
-                        day_num_pattern.match(next_stripped)):
-                        break
-                    chunk.append(next_line)
-                    j += 1
-                raw = "\n".join(chunk)
-                day_blocks.append(
-                    DayBlock(
-                        day_name=day_name,
-                        day_num=day_num,
-                        month_name=month_name,
-                        raw_text=raw,
-                        start_line=i + 1,
-                    )
-                )
-                i = j
-            else:
-                i += 1
-        else:
-            i += 1
+    headers = []  # (índice de línea, tipo, match) de cada línea que empieza por "Día número"
+    for idx, line in enumerate(lines):
+        kind, m = _scan_header(line)
+        if kind:
+            headers.append((idx, kind, m))
 
+    day_blocks: List[DayBlock] = []
+    n_lines = len(lines)
+    h = 0
+    while h < len(headers):
+        idx, kind, m = headers[h]
+        opened = _open_block(kind, m, lambda: lines[idx + 1: idx + 4])
+        h += 1
+        if opened is None:
+            continue
+        cut = opened[3]
+        while h < len(headers) and headers[h][1] not in cut:
+            h += 1
+        end = headers[h][0] if h < len(headers) else n_lines
+        chunk = lines[idx:end]
+        day_blocks.append(DayBlock(
+            day_name=opened[0],
+            day_num=opened[1],
+            month_name=opened[2],
+            raw_text="\n".join(chunk),
+            start_line=idx + 1,
+            lines=chunk,
+        ))
     return day_blocks, info
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Entidades persistidas: DayEntities/ParsedShift de cada PDF en un formato compacto,
+para re-agregar (ventanas, umbral, mapa sala/cocina) sin volver a extraer el PDF.
+
+Un fichero <sha256 del PDF>.v<PARSER_VERSION>-<tabla|pagina>.json.gz por PDF: la versión
+del parser y el recorte (config.CROP_TO_TABLE) van en el nombre, así comprobar si hay
+entidades vigentes es un stat y las de otra versión o recorte no se leen ni se mezclan
+al re-agregar. Los textos repetidos (puestos, nombres) van una sola vez en una tabla
+"strings" y las filas los referencian por índice:
+
+    {"format": 1, "parser_version": "1.2", "crop_to_table": true, "backend": "pdfplumber",
+     "source": "semana7.pdf", "sha256": "...", "parsed_at": "2026-02-16T09:12:03",
+     "strings": ["Camarero/a", "Guillermo", ...],
+     "days": [{"date": "2026-02-09",
+               "employees": [[nombre, total_hours], ...],
+               "shifts": [[rol, start_h, start_m, end_h, end_m, flags,
+                           duration_hours, employee_name, max_hours_cap], ...]}]}
+
+rol y nombres son índices en "strings" (-1 = None); flags = bits FLAG_*. Las horas
+se guardan como float JSON (ida y vuelta exacta). backend es el motor con el que se
+extrajo el texto (el efectivo, tras un posible fallback).
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import config
+from .backends import DEFAULT_BACKEND
+from .entities import DayEntities, ParsedEmployee, ParsedShift
+from .table import FLAG_CROSSES_MIDNIGHT, FLAG_OTHER_ESTABLISHMENT, FLAG_REST_OR_ABSENCE
+
+FORMAT_VERSION = 1
+# Límites de la carpeta (expulsión LRU como en pipeline/cache.py). Una entrada semanal
+# ocupa unos KB: caben años de cuadrantes
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+def entities_to_dict(day_entities_list: List[DayEntities]) -> dict:
+    """Lista de DayEntities -> dict compacto (ver docstring del módulo), sin metadatos."""
+    strings: List[str] = []
+    index: Dict[str, int] = {}
+
+    def ref(s: Optional[str]) -> int:
+        if s is None:
+            return -1
+        k = index.get(s)
+        if k is None:
+            k = index[s] = len(strings)
+            strings.append(s)
+        return k
+
+    days = []
+    for d in day_entities_list:
+        days.append({
+            "date": d.date_iso,
+            "employees": [[ref(e.name), e.total_hours] for e in d.employees],
+            "shifts": [
+                [
+                    ref(ps.role), ps.start_h, ps.start_m, ps.end_h, ps.end_m,
+                    (FLAG_CROSSES_MIDNIGHT if ps.crosses_midnight else 0)
+                    | (FLAG_REST_OR_ABSENCE if ps.is_rest_or_absence else 0)
+                    | (FLAG_OTHER_ESTABLISHMENT if ps.is_other_establishment else 0),
+                    ps.duration_hours, ref(ps.employee_name), ps.max_hours_cap,
+                ]
+                for ps in d.shifts
+            ],
+        })
+    return {"format": FORMAT_VERSION, "strings": strings, "days": days}
+
+
+def entities_from_dict(data: dict) -> List[DayEntities]:
+    """Inverso de entities_to_dict."""
+    if data.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Formato de entidades no soportado: {data.get('format')!r}")
+    strings = data["strings"]
+
+    def txt(k: int) -> Optional[str]:
+        return None if k < 0 else strings[k]
+
+    result: List[DayEntities] = []
+    for d in data["days"]:
+        employees = [ParsedEmployee(name=txt(name), total_hours=hours) for name, hours in d["employees"]]
+        shifts = [
+            ParsedShift(
+                role=txt(role), start_h=sh, start_m=sm, end_h=eh, end_m=em,
+                crosses_midnight=bool(flags & FLAG_CROSSES_MIDNIGHT),
+                is_rest_or_absence=bool(flags & FLAG_REST_OR_ABSENCE),
+                is_other_establishment=bool(flags & FLAG_OTHER_ESTABLISHMENT),
+                duration_hours=duration, employee_name=txt(emp), max_hours_cap=cap,
+            )
+            for role, sh, sm, eh, em, flags, duration, emp, cap in d["shifts"]
+        ]
+        result.append(DayEntities(date_iso=d["date"], employees=employees, shifts=shifts))
+    return result
+
+
+class EntityStore:
+    """
+    Carpeta con las entidades de cada PDF parseado, por SHA-256 del PDF. Por encima de
+    max_entries o max_bytes se expulsan primero las entradas de otra versión del parser
+    o recorte y después las menos usadas (fecha de último acceso).
+    """
+
+    def __init__(
+        self,
+        store_dir: Union[str, Path],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.store_dir = Path(store_dir)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def _variant() -> str:
+        """Parte del nombre que identifica la versión del parser y el recorte actuales."""
+        return f"v{config.PARSER_VERSION}-{'tabla' if config.CROP_TO_TABLE else 'pagina'}"
+
+    def _path(self, sha256: str) -> Path:
+        return self.store_dir / f"{sha256}.{self._variant()}.json.gz"
+
+    def has(self, sha256: str) -> bool:
+        """
+        True si ya hay entidades de este PDF con la versión del parser y el recorte actuales.
+        Un acierto renueva su fecha de acceso (LRU).
+        """
+        path = self._path(sha256)
+        if not path.is_file():
+            return False
+        self._touch(path)
+        return True
+
+    @staticmethod
+    def _touch(path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def put(
+        self, sha256: str, day_entities_list: List[DayEntities], source: str = "", backend: Optional[str] = None
+    ) -> None:
+        """
+        Guarda (escritura atómica) las entidades de un PDF; sustituye las anteriores, también
+        las de otra versión del parser o recorte. backend: motor efectivo de la extracción.
+        """
+        data = entities_to_dict(day_entities_list)
+        data.update({
+            "parser_version": config.PARSER_VERSION,
+            "crop_to_table": config.CROP_TO_TABLE,
+            "backend": backend or DEFAULT_BACKEND,
+            "source": source,
+            "sha256": sha256,
+            "parsed_at": datetime.now().isoformat(timespec="seconds"),
+        })
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(sha256)
+        fd, tmp = tempfile.mkstemp(dir=self.store_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as f:
+                f.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        for old in self.store_dir.glob(f"{sha256}.*"):
+            if old != path and old.name.endswith(".json.gz"):
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+        self._evict()
+
+    def _evict(self) -> None:
+        current = f".{self._variant()}.json.gz"
+        entries = []
+        for path in self.store_dir.glob("*.json.gz"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((path.name.endswith(current), st.st_mtime, st.st_size, path))
+        entries.sort()
+        total = sum(size for _current, _mtime, size, _path in entries)
+        count = len(entries)
+        for _current, _mtime, size, path in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            count -= 1
+            total -= size
+
+    def get(self, sha256: str) -> Optional[List[DayEntities]]:
+        """
+        Entidades guardadas de un PDF con la versión del parser y el recorte actuales, o None.
+        Un acierto renueva su fecha de acceso (LRU).
+        """
+        path = self._path(sha256)
+        data = self._read(path)
+        if data is None:
+            return None
+        self._touch(path)
+        return entities_from_dict(data)
+
+    def entries(self) -> Iterator[Tuple[dict, List[DayEntities]]]:
+        """
+        Todas las entradas vigentes como (metadatos, entidades), de la más antigua a la más
+        reciente según parsed_at. Las de otra versión del parser u otro recorte (se
+        regeneran al volver a parsear el PDF) y las ilegibles se saltan.
+        """
+        found = []
+        for path in self.store_dir.glob(f"*.{self._variant()}.json.gz"):
+            data = self._read(path)
+            if data is not None:
+                found.append(data)
+        found.sort(key=lambda d: (d.get("parsed_at", ""), d.get("source", "")))
+        for data in found:
+            meta = {
+                k: data.get(k)
+                for k in ("source", "sha256", "parsed_at", "parser_version", "crop_to_table", "backend")
+            }
+            yield meta, entities_from_dict(data)
+
+    @staticmethod
+    def _read(path: Path) -> Optional[dict]:
+        try:
+            with gzip.open(path, "rb") as f:
+                data = json.loads(f.read().decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get("format") != FORMAT_VERSION:
+            return None
+        if data.get("parser_version") != config.PARSER_VERSION or data.get("crop_to_table") != config.CROP_TO_TABLE:
+            return None
+        return data
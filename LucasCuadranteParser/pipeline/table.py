@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+ShiftTable: turnos de muchos días guardados por columnas (array de la stdlib), para
+re-agregar histórico sin tener millones de objetos ParsedShift en memoria.
+
+Cada turno ocupa una posición en columnas paralelas (minutos de inicio/fin tal como
+vienen del PDF, flags, índices de puesto y empleado, duración y tope); los textos
+(puestos, nombres, fechas no) se guardan una sola vez en `strings` y las columnas los
+referencian por índice (-1 = None). day_offsets marca dónde empieza cada día.
+
+relations.apply_shift_rules_batch, normalize.day_total_hours_table y
+normalize.to_lucas_week aceptan un ShiftTable directamente (con NumPy, las columnas se
+leen sin copia vía np.frombuffer). Mismo resultado que con la lista de DayEntities.
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+from .entities import DayEntities, ParsedEmployee, ParsedShift
+
+FLAG_CROSSES_MIDNIGHT = 1
+FLAG_REST_OR_ABSENCE = 2
+FLAG_OTHER_ESTABLISHMENT = 4
+
+_NAN = float("nan")
+
+
+def _opt(x: Optional[float]) -> float:
+    return _NAN if x is None else x
+
+
+def _unopt(x: float) -> Optional[float]:
+    return None if math.isnan(x) else x
+
+
+class ShiftTable:
+    """Turnos y empleados de varios días en columnas (ver docstring del módulo)."""
+
+    __slots__ = (
+        "strings", "_index", "dates",
+        "day_offsets", "start_min", "end_min", "flags", "role", "employee", "duration", "cap",
+        "emp_offsets", "emp_name", "emp_hours",
+    )
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.dates: List[str] = []
+        # Turnos: el día d ocupa [day_offsets[d], day_offsets[d + 1])
+        self.day_offsets = array("i", [0])
+        self.start_min = array("h")  # start_h * 60 + start_m
+        self.end_min = array("h")    # end_h * 60 + end_m (sin normalizar medianoche)
+        self.flags = array("B")      # bits FLAG_*
+        self.role = array("i")       # índice en strings
+        self.employee = array("i")   # índice en strings
+        self.duration = array("d")   # duration_hours (NaN = None)
+        self.cap = array("d")        # max_hours_cap (NaN = None)
+        # Empleados (nombre + horas totales) del día d: [emp_offsets[d], emp_offsets[d + 1])
+        self.emp_offsets = array("i", [0])
+        self.emp_name = array("i")
+        self.emp_hours = array("d")
+
+    @classmethod
+    def from_day_entities(cls, day_entities_list: Iterable[DayEntities]) -> "ShiftTable":
+        table = cls()
+        for day_entities in day_entities_list:
+            table.append_day(day_entities)
+        return table
+
+    def intern(self, s: Optional[str]) -> int:
+        """Índice de s en strings (lo añade si es nuevo); -1 para None."""
+        if s is None:
+            return -1
+        k = self._index.get(s)
+        if k is None:
+            k = self._index[s] = len(self.strings)
+            self.strings.append(s)
+        return k
+
+    def text(self, k: int) -> Optional[str]:
+        return None if k < 0 else self.strings[k]
+
+    def append_day(self, day_entities: DayEntities) -> None:
+        intern = self.intern
+        self.dates.append(day_entities.date_iso)
+        for ps in day_entities.shifts:
+            self.start_min.append(ps.start_h * 60 + ps.start_m)
+            self.end_min.append(ps.end_h * 60 + ps.end_m)
+            self.flags.append(
+                (FLAG_CROSSES_MIDNIGHT if ps.crosses_midnight else 0)
+                | (FLAG_REST_OR_ABSENCE if ps.is_rest_or_absence else 0)
+                | (FLAG_OTHER_ESTABLISHMENT if ps.is_other_establishment else 0)
+            )
+            self.role.append(intern(ps.role))
+            self.employee.append(intern(ps.employee_name))
+            self.duration.append(_opt(ps.duration_hours))
+            self.cap.append(_opt(ps.max_hours_cap))
+        self.day_offsets.append(len(self.start_min))
+        for e in day_entities.employees:
+            self.emp_name.append(intern(e.name))
+            self.emp_hours.append(e.total_hours)
+        self.emp_offsets.append(len(self.emp_name))
+
+    @property
+    def n_days(self) -> int:
+        return len(self.dates)
+
+    def __len__(self) -> int:
+        return len(self.start_min)
+
+    def day(self, d: int) -> DayEntities:
+        """Reconstruye el DayEntities del día d."""
+        text = self.text
+        shifts = []
+        for k in range(self.day_offsets[d], self.day_offsets[d + 1]):
+            flags = self.flags[k]
+            start_h, start_m = divmod(self.start_min[k], 60)
+            end_h, end_m = divmod(self.end_min[k], 60)
+            shifts.append(ParsedShift(
+                role=text(self.role[k]), start_h=start_h, start_m=start_m, end_h=end_h, end_m=end_m,
+                crosses_midnight=bool(flags & FLAG_CROSSES_MIDNIGHT),
+                is_rest_or_absence=bool(flags & FLAG_REST_OR_ABSENCE),
+                is_other_establishment=bool(flags & FLAG_OTHER_ESTABLISHMENT),
+                duration_hours=_unopt(self.duration[k]),
+                employee_name=text(self.employee[k]),
+                max_hours_cap=_unopt(self.cap[k]),
+            ))
+        employees = [
+            ParsedEmployee(name=text(self.emp_name[k]), total_hours=self.emp_hours[k])
+            for k in range(self.emp_offsets[d], self.emp_offsets[d + 1])
+        ]
+        return DayEntities(date_iso=self.dates[d], employees=employees, shifts=shifts)
+
+    def to_day_entities(self) -> List[DayEntities]:
+        return [self.day(d) for d in range(self.n_days)]
+
+    def nbytes(self) -> int:
+        """Bytes de las columnas (sin contar la tabla de textos ni las fechas)."""
+        columns = (
+            self.day_offsets, self.start_min, self.end_min, self.flags, self.role, self.employee,
+            self.duration, self.cap, self.emp_offsets, self.emp_name, self.emp_hours,
+        )
+        return sum(len(c) * c.itemsize for c in columns)
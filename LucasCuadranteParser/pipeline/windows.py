@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de ventanas de turno: horas de cada turno trabajado dentro de cada ventana
+(Mediodía, Tarde, Noche) para muchos turnos a la vez.
+
+Los turnos llegan ya convertidos a minutos enteros (inicio, fin con fin > inicio) y
+las ventanas igual; el solapamiento con todas las ventanas es una matriz
+[ventana x turno]. Con NumPy (opcional) se calcula en una sola operación; sin NumPy,
+con un bucle en Python puro. Ambos caminos dan exactamente los mismos números que la
+regla turno a turno: horas = minutos / 60.0 y la suma de horas de cada día se
+acumula en el orden de los turnos (misma secuencia de sumas en coma flotante).
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+# NumPy es opcional y tarda ~0,1 s en importarse: se importa la primera vez que hace
+# falta (bloques de NUMPY_MIN_SHIFTS turnos o más, o use_numpy=True). `windows.np` desde
+# fuera también lo carga (módulo __getattr__) y vale None si no está instalado.
+_numpy_checked = False
+
+
+def _numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+        _numpy_checked = True
+    return np
+
+
+def __getattr__(name: str):
+    if name == "np":
+        return _numpy()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Códigos de área por turno (ver relations._role_to_area)
+AREA_NONE = 0
+AREA_SALA = 1
+AREA_COCINA = 2
+
+# Por debajo de este número de turnos el bucle en Python es más rápido que NumPy
+NUMPY_MIN_SHIFTS = 256
+
+# Agregado de un día y una ventana: (horas sumadas, personas en sala, personas en cocina)
+WindowTotals = Tuple[float, int, int]
+
+
+def window_totals(
+    starts: Sequence[int],
+    ends: Sequence[int],
+    areas: Sequence[int],
+    day_offsets: Sequence[int],
+    bounds: Sequence[Tuple[int, int]],
+    min_hours: float,
+    use_numpy: Optional[bool] = None,
+) -> List[List[WindowTotals]]:
+    """
+    Agrega los turnos de varios días contra todas las ventanas.
+
+    starts/ends/areas: un valor por turno (minutos desde las 00:00 del día y código de
+    área AREA_*), los turnos de todos los días seguidos. day_offsets: índices de corte,
+    len = número de días + 1 (los turnos del día d son [day_offsets[d], day_offsets[d+1])).
+    bounds: (inicio, fin) en minutos de cada ventana; (0, 0) = ventana inexistente.
+
+    Un turno cuenta como 1 persona en una ventana si sus horas en ella son
+    >= min_hours. Devuelve, por día, una lista con un WindowTotals por ventana.
+    use_numpy: None = automático (NumPy si está instalado y hay suficientes turnos).
+    """
+    if use_numpy is None:
+        use_numpy = len(starts) >= NUMPY_MIN_SHIFTS and _numpy() is not None
+    if use_numpy:
+        if _numpy() is None:
+            raise RuntimeError("NumPy no está instalado")
+        return _window_totals_numpy(starts, ends, areas, day_offsets, bounds, min_hours)
+    return _window_totals_python(starts, ends, areas, day_offsets, bounds, min_hours)
+
+
+def _window_totals_python(starts, ends, areas, day_offsets, bounds, min_hours) -> List[List[WindowTotals]]:
+    result: List[List[WindowTotals]] = []
+    for d in range(len(day_offsets) - 1):
+        a, b = day_offsets[d], day_offsets[d + 1]
+        day: List[WindowTotals] = []
+        for win_s, win_e in bounds:
+            hours = 0.0
+            floor = kitchen = 0
+            for k in range(a, b):
+                overlap = min(ends[k], win_e) - max(starts[k], win_s)
+                h = overlap / 60.0 if overlap > 0 else 0.0
+                hours += h
+                if h >= min_hours:
+                    if areas[k] == AREA_SALA:
+                        floor += 1
+                    elif areas[k] == AREA_COCINA:
+                        kitchen += 1
+            day.append((hours, floor, kitchen))
+        result.append(day)
+    return result
+
+
+def _window_totals_numpy(starts, ends, areas, day_offsets, bounds, min_hours) -> List[List[WindowTotals]]:
+    n_days = len(day_offsets) - 1
+    n_win = len(bounds)
+    if n_days <= 0:
+        return []
+    s = np.asarray(starts, dtype=np.int64)
+    e = np.asarray(ends, dtype=np.int64)
+    area = np.asarray(areas, dtype=np.int8)
+    offsets = np.asarray(day_offsets, dtype=np.int64)
+    win = np.asarray(bounds, dtype=np.int64).reshape(n_win, 2)
+
+    # Matriz [ventana x turno] de minutos solapados -> horas
+    overlap = np.minimum(e[None, :], win[:, 1:2]) - np.maximum(s[None, :], win[:, 0:1])
+    hours = np.where(overlap > 0, overlap, 0) / 60.0
+
+    # Personas: conteos enteros por día vía suma acumulada (exacta en enteros)
+    counted = hours >= min_hours
+    zeros = np.zeros((n_win, 1), dtype=np.int64)
+    floor_acc = np.concatenate([zeros, np.cumsum(counted & (area == AREA_SALA), axis=1)], axis=1)
+    kitchen_acc = np.concatenate([zeros, np.cumsum(counted & (area == AREA_COCINA), axis=1)], axis=1)
+    floor = floor_acc[:, offsets[1:]] - floor_acc[:, offsets[:-1]]
+    kitchen = kitchen_acc[:, offsets[1:]] - kitchen_acc[:, offsets[:-1]]
+
+    # Horas: tabla [ventana x día x posición] rellena con ceros y acumulada en orden
+    # (np.cumsum suma secuencialmente, igual que el bucle turno a turno)
+    counts = np.diff(offsets)
+    width = int(counts.max()) if counts.size else 0
+    if width:
+        day_of = np.repeat(np.arange(n_days), counts)
+        pos = np.arange(len(s)) - np.repeat(offsets[:-1], counts)
+        table = np.zeros((n_win, n_days, width), dtype=np.float64)
+        table[:, day_of, pos] = hours
+        sums = np.cumsum(table, axis=2)[:, :, -1]
+    else:
+        sums = np.zeros((n_win, n_days), dtype=np.float64)
+
+    sums_l, floor_l, kitchen_l = sums.T.tolist(), floor.T.tolist(), kitchen.T.tolist()
+    return [
+        [(sums_l[d][w], floor_l[d][w], kitchen_l[d][w]) for w in range(n_win)]
+        for d in range(n_days)
+    ]
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Modo servidor (python main.py --serve): mantiene el pipeline cargado y procesa
+muchos PDFs en el mismo proceso, sin pagar el arranque de Python ni la importación
+de pdfplumber en cada importación.
+
+Protocolo JSON-lines por stdin/stdout (una petición y una respuesta por línea):
+
+    -> {"id": "a1", "pdf_path": "/tmp/semana.pdf", "timeout": 60}
+    <- {"id": "a1", "ok": true, "days": [...], "elapsed_ms": 812}
+    <- {"id": "a1", "ok": false, "error": "timeout (60s)", "elapsed_ms": 60001}
+
+Con "timings": true la respuesta incluye "timings" (tiempos por etapa, contadores y
+pico de memoria del worker; ver pipeline/timings.py).
+
+Los límites de extracción del servidor (--max-pages, --budget...; ver pipeline/guards.py),
+--full-page y --backend se aplican a cada trabajo. Un resultado parcial sigue siendo
+"ok": true y trae además "partial": true, "skipped_pages" (desde 1) y "limits". Con
+--budget por debajo del timeout, un PDF lento devuelve los días leídos en vez de un
+error de timeout.
+
+Otras operaciones: {"id": ..., "op": "ping"} y {"op": "shutdown"}. Al arrancar se
+emite {"event": "ready", "max_jobs": N}. Las respuestas pueden llegar en distinto
+orden que las peticiones (se casan por "id").
+
+Cada trabajo se ejecuta en un proceso worker persistente (como máximo max_jobs a la
+vez). Si un trabajo supera su timeout, el worker se mata y se sustituye por otro.
+Los workers son procesos daemon, que no pueden lanzar procesos propios: cada PDF se
+extrae en secuencia (sin --ingest-workers ni --entity-workers) y el paralelismo es el
+de --max-jobs.
+"""
+
+import itertools
+import json
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from typing import Optional, TextIO
+
+DEFAULT_TIMEOUT_S = 120.0
+
+
+def _worker_loop(
+    conn,
+    cache_dir: Optional[str],
+    entity_dir: Optional[str] = None,
+    crop_to_table: bool = True,
+    backend: Optional[str] = None,
+) -> None:
+    """Bucle de un worker: importa el pipeline una vez y atiende trabajos hasta recibir None."""
+    import config
+    from pipeline.cache import ResultCache
+    from pipeline.guards import partial_info
+    from pipeline.runner import parse_pdf
+    from pipeline.serialize import EntityStore
+    from pipeline.timings import StageTimer
+
+    # Con "spawn" el worker no hereda config: --full-page llega como argumento
+    config.CROP_TO_TABLE = crop_to_table
+    cache = ResultCache(cache_dir) if cache_dir else None
+    store = EntityStore(entity_dir) if entity_dir else None
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+        if msg is None:
+            break
+        timer = StageTimer() if msg.get("timings") else None
+        stats: dict = {}
+        try:
+            days = parse_pdf(
+                msg["pdf_path"], cache=None if msg.get("no_cache") else cache, entity_store=store, timer=timer,
+                backend=backend, limits=msg.get("limits"), stats=stats,
+            )
+            res = {"ok": True, "days": days, **(partial_info(stats) or {})}
+        except Exception as e:
+            res = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        if timer is not None:
+            res["timings"] = timer.to_dict()
+        conn.send(res)
+    conn.close()
+
+
+class _WorkerSlot:
+    """Un proceso worker persistente y su pipe. Un slot atiende un trabajo a la vez."""
+
+    def __init__(
+        self,
+        ctx,
+        cache_dir: Optional[str],
+        entity_dir: Optional[str] = None,
+        limits=None,
+        crop_to_table: bool = True,
+        backend: Optional[str] = None,
+    ) -> None:
+        self._ctx = ctx
+        self._limits = limits
+        self._crop_to_table = crop_to_table
+        self._backend = backend
+        self._cache_dir = cache_dir
+        self._entity_dir = entity_dir
+        self._start()
+
+    def _start(self) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        self.proc = self._ctx.Process(
+            target=_worker_loop,
+            args=(child_conn, self._cache_dir, self._entity_dir, self._crop_to_table, self._backend),
+            daemon=True,
+        )
+        self.proc.start()
+        child_conn.close()
+        self.conn = parent_conn
+
+    def _restart(self) -> None:
+        self.proc.kill()
+        self.proc.join()
+        self.conn.close()
+        self._start()
+
+    def run(self, pdf_path: str, timeout: Optional[float], no_cache: bool = False, timings: bool = False) -> dict:
+        """Ejecuta un trabajo; si el worker muere (antes o durante el trabajo) se sustituye por otro."""
+        try:
+            self.conn.send({"pdf_path": pdf_path, "no_cache": no_cache, "timings": timings, "limits": self._limits})
+            if not self.conn.poll(timeout):
+                self._restart()
+                return {"ok": False, "error": f"timeout ({timeout:g}s)"}
+            return self.conn.recv()
+        except (EOFError, BrokenPipeError, OSError):
+            self._restart()
+            return {"ok": False, "error": "el worker terminó inesperadamente"}
+
+    def close(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.proc.join(timeout=5)
+        if self.proc.is_alive():
+            self.proc.kill()
+            self.proc.join()
+        self.conn.close()
+
+
+def _job_options(req: dict, default_timeout: Optional[float]) -> dict:
+    """
+    timeout, no_cache y timings de una petición, validados (ValueError si no son válidos).
+    timeout: número de segundos; <= 0 o null = sin límite (como --timeout 0).
+    no_cache / timings: booleanos JSON.
+    """
+    timeout = req.get("timeout", default_timeout)
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))):
+        raise ValueError(f"timeout debe ser un número de segundos: {timeout!r}")
+    options = {"timeout": float(timeout) if timeout is not None and timeout > 0 else None}
+    for key in ("no_cache", "timings"):
+        value = req.get(key, False)
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} debe ser true o false: {value!r}")
+        options[key] = value
+    return options
+
+
+def serve(
+    max_jobs: int = 1,
+    default_timeout: Optional[float] = DEFAULT_TIMEOUT_S,
+    stdin: TextIO = None,
+    stdout: TextIO = None,
+    cache_dir: Optional[str] = None,
+    entity_dir: Optional[str] = None,
+    backend: Optional[str] = None,
+) -> int:
+    """
+    Atiende peticiones JSON-lines de stdin hasta EOF o {"op": "shutdown"}.
+    max_jobs = trabajos simultáneos (= procesos worker). default_timeout en segundos
+    (None = sin límite) si la petición no trae "timeout"; "timeout" <= 0 también es sin
+    límite. Una petición con campos de tipo inválido recibe "ok": false y no detiene el
+    servidor. cache_dir activa la caché de resultados (pipeline/cache.py); una petición
+    con "no_cache": true la ignora.
+    entity_dir guarda las entidades de cada PDF para re-agregar (pipeline/serialize.py).
+    backend: motor de extracción de texto de todos los trabajos (ver pipeline/backends.py).
+    Los límites de extracción y config.CROP_TO_TABLE se toman de config al arrancar.
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    max_jobs = max(1, int(max_jobs))
+    out_lock = threading.Lock()
+    auto_ids = itertools.count(1)
+
+    def emit(obj: dict) -> None:
+        line = json.dumps(obj, ensure_ascii=False)
+        with out_lock:
+            stdout.write(line + "\n")
+            stdout.flush()
+
+    import config
+    from pipeline.guards import Limits
+
+    ctx = multiprocessing.get_context()
+    # Límites y recorte de config tomados aquí: los workers no heredan config con el arranque "spawn"
+    limits = Limits.from_config()
+    slots = [
+        _WorkerSlot(ctx, cache_dir, entity_dir, limits, config.CROP_TO_TABLE, backend) for _ in range(max_jobs)
+    ]
+    # Cola acotada: si todos los slots están ocupados, la lectura de stdin espera (backpressure)
+    jobs: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=max_jobs)
+
+    def slot_loop(slot: _WorkerSlot) -> None:
+        while True:
+            req = jobs.get()
+            if req is None:
+                break
+            t0 = time.perf_counter()
+            try:
+                res = slot.run(req["pdf_path"], req["timeout"], req["no_cache"], req["timings"])
+            except Exception as e:
+                # Un fallo del slot (ej. al reiniciar el worker) no puede dejar la petición sin
+                # respuesta ni retirar el slot: el siguiente trabajo lo vuelve a intentar
+                res = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            emit({"id": req["id"], **res, "elapsed_ms": round((time.perf_counter() - t0) * 1000)})
+
+    threads = [threading.Thread(target=slot_loop, args=(s,), daemon=True) for s in slots]
+    for t in threads:
+        t.start()
+    emit({"event": "ready", "max_jobs": max_jobs})
+
+    for raw in stdin:
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            req = json.loads(raw)
+            if not isinstance(req, dict):
+                raise ValueError("se esperaba un objeto")
+        except ValueError as e:
+            emit({"id": None, "ok": False, "error": f"Petición JSON inválida: {e}"})
+            continue
+        req_id = req.get("id")
+        if req_id is None:
+            req_id = next(auto_ids)
+        op = req.get("op", "parse")
+        if op == "ping":
+            emit({"id": req_id, "ok": True})
+            continue
+        if op == "shutdown":
+            break
+        if op != "parse" or not req.get("pdf_path"):
+            emit({"id": req_id, "ok": False, "error": "Petición sin pdf_path u op desconocida"})
+            continue
+        try:
+            options = _job_options(req, default_timeout)
+        except ValueError as e:
+            emit({"id": req_id, "ok": False, "error": f"Petición inválida: {e}"})
+            continue
+        jobs.put({"id": req_id, "pdf_path": str(req["pdf_path"]), **options})
+
+    for _ in slots:
+        jobs.put(None)
+    for t in threads:
+        t.join()
+    for s in slots:
+        s.close()
+    return 0
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de los motores de extracción de texto (pipeline/backends.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import generate_pages, write_pdf
+from pipeline import backends, ingest
+from pipeline.backends import chars_to_text
+from pipeline.ingest import extract_text_from_pdf
+from pipeline.runner import compare_backends
+
+
+def _chars(text: str, x: float, top: float, width: float = 4.0):
+    return [(c, x + i * width, x + (i + 1) * width, top, top + 7, True) for i, c in enumerate(text)]
+
+
+def test_chars_to_text_words_and_lines():
+    # Espacio explícito, hueco > x_tolerance y una segunda línea con top ligeramente distinto
+    chars = _chars("Lunes 9", 20, 100) + _chars("10:00", 70, 101) + _chars("Manager", 20, 110)
+    assert chars_to_text(chars) == "Lunes 9 10:00\nManager"
+    # Caracteres fuera de orden en la línea: se ordenan por x
+    assert chars_to_text(list(reversed(_chars("abc", 0, 0)))) == "abc"
+    assert chars_to_text([]) == ""
+
+
+def test_unknown_backend_raises(tmp_path):
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=1, employees=2))
+    with pytest.raises(ValueError):
+        extract_text_from_pdf(pdf, backend="tesseract")
+
+
+def test_pdfminer_matches_pdfplumber(tmp_path):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=3, employees=12))
+    stats: dict = {}
+    text = extract_text_from_pdf(pdf, backend="pdfminer", stats=stats)
+    assert stats["backend"] == "pdfminer" and "backend_fallback" not in stats
+    assert text == extract_text_from_pdf(pdf)
+    assert list(ingest.iter_pdf_lines(pdf, backend="pdfminer")) == text.split("\n")
+
+
+def test_missing_backend_falls_back_to_pdfplumber(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=5))
+    expected = extract_text_from_pdf(pdf)
+    monkeypatch.setattr(ingest, "is_available", lambda name: name != "pdfium")
+    stats: dict = {}
+    assert extract_text_from_pdf(pdf, backend="pdfium", stats=stats) == expected
+    assert stats["backend"] == "pdfplumber" and "pdfium" in stats["backend_fallback"]
+    # También en streaming (iter_pdf_lines, usado por --format ndjson)
+    stats = {}
+    assert list(ingest.iter_pdf_lines(pdf, backend="pdfium", stats=stats)) == expected.split("\n")
+    assert stats["backend"] == "pdfplumber" and "pdfium" in stats["backend_fallback"]
+
+    # El motor falla con este PDF: también se vuelve a pdfplumber (salvo fallback=False)
+    def broken(path):
+        raise RuntimeError("roto")
+
+    monkeypatch.setitem(backends._BACKENDS, "pdfminer", (broken, "pdfminer"))
+    stats = {}
+    assert extract_text_from_pdf(pdf, backend="pdfminer", stats=stats) == expected
+    assert "RuntimeError" in stats["backend_fallback"]
+    stats = {}
+    assert list(ingest.iter_pdf_lines(pdf, backend="pdfminer", stats=stats)) == expected.split("\n")
+    assert "RuntimeError" in stats["backend_fallback"]
+    with pytest.raises(RuntimeError):
+        extract_text_from_pdf(pdf, backend="pdfminer", fallback=False)
+
+
+def test_pdfminer_closes_file_on_unreadable_pdf(tmp_path, monkeypatch):
+    pytest.importorskip("pdfminer")
+    bad = tmp_path / "roto.pdf"
+    bad.write_bytes(b"esto no es un PDF")
+    opened = []
+    real_stream = backends._binary_stream
+
+    def tracked(source):
+        f, owns = real_stream(source)
+        opened.append(f)
+        return f, owns
+
+    monkeypatch.setattr(backends, "_binary_stream", tracked)
+    with pytest.raises(Exception):
+        backends.PdfminerDocument(bad)
+    assert len(opened) == 1 and opened[0].closed
+
+
+def test_compare_backends_reports_days(tmp_path):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6))
+    res = compare_backends(pdf, "pdfminer")
+    assert res["identical"] and res["text_identical"]
+    assert res["days"] == 2 and res["differing_days"] == []
+    assert set(res["seconds"]) == {"pdfplumber", "pdfminer"}
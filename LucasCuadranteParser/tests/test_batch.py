@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del modo lote (pipeline/batch.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import generate_pages, write_pdf
+from pipeline import batch
+from pipeline.batch import BatchResult, expand_inputs, merge_days, run_batch
+from pipeline.runner import pdf_entities
+
+
+def test_expand_inputs_files_dirs_and_globs(tmp_path):
+    for name in ("s2.pdf", "s1.pdf", "notas.txt"):
+        (tmp_path / name).write_bytes(b"")
+    sub = tmp_path / "sub"
+    sub.mkdir()
+    (sub / "s3.PDF").write_bytes(b"")
+    paths = expand_inputs([str(tmp_path), str(tmp_path / "s*.pdf"), str(sub)])
+    assert [p.name for p in paths] == ["s1.pdf", "s2.pdf", "s3.PDF"]
+
+
+def test_bad_pdf_does_not_abort_batch(tmp_path):
+    missing = tmp_path / "no_existe.pdf"
+    broken = tmp_path / "roto.pdf"
+    broken.write_bytes(b"esto no es un PDF")
+    results = list(run_batch([missing, broken], jobs=1))
+    assert [r.pdf_path for r in results] == [str(missing), str(broken)]
+    assert all(not r.ok and r.error for r in results)
+
+
+def test_merge_days_dedups_by_date_later_input_wins():
+    day = lambda d, h: {"date": d, "total_hours_worked": h}
+    merged = merge_days([
+        BatchResult("a.pdf", ok=True, days=[day("2026-02-10", 1.0), day("2026-02-09", 1.0)]),
+        BatchResult("roto.pdf", ok=False, error="x"),
+        BatchResult("b.pdf", ok=True, days=[day("2026-02-10", 2.0)]),
+    ])
+    assert merged == [day("2026-02-09", 1.0), day("2026-02-10", 2.0)]
+
+
+def test_batch_entities_come_from_the_parse(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=5))
+    expected = pdf_entities(pdf)
+    cache_dir = str(tmp_path / "cache")
+
+    def extract_again(*args, **kwargs):
+        raise AssertionError("el PDF ya se parseó: no hay que volver a extraer las entidades")
+
+    # Parseado en el worker: BatchResult.entities son las del parseo, sin segunda extracción
+    with monkeypatch.context() as m:
+        m.setattr(batch, "pdf_entities", extract_again)
+        res = next(run_batch([pdf], jobs=1, cache_dir=cache_dir, entities=True))
+    assert res.ok and res.entities == expected
+    # Acierto de caché sin entidades guardadas: se extraen una vez, en el worker
+    res = next(run_batch([pdf], jobs=1, cache_dir=cache_dir, entities=True))
+    assert res.ok and res.entities == expected
+    assert next(run_batch([pdf], jobs=1)).entities is None
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la caché de resultados (pipeline/cache.py)."""
+
+import os
+import sys
+from datetime import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import config
+from synthetic import generate_pages, write_pdf
+from pipeline.cache import ResultCache, config_fingerprint
+from pipeline.runner import parse_pdf
+
+WEEK = [{"date": "2026-02-09", "total_revenue": 0.0, "total_hours_worked": 31.22, "shifts": []}]
+
+
+def test_cache_key_depends_on_content_and_config(tmp_path, monkeypatch):
+    pdf_a = tmp_path / "a.pdf"
+    pdf_b = tmp_path / "b.pdf"
+    pdf_a.write_bytes(b"%PDF-1.4 semana 7")
+    pdf_b.write_bytes(b"%PDF-1.4 semana 7")
+    cache = ResultCache(tmp_path / "cache")
+    key = cache.key_for(pdf_a)
+    assert key == cache.key_for(pdf_b)
+    pdf_b.write_bytes(b"%PDF-1.4 semana 8")
+    assert cache.key_for(pdf_b) != key
+
+    fp = config_fingerprint()
+    windows = dict(config.SHIFT_WINDOWS)
+    windows["Tarde"] = (time(16, 0), time(20, 0))
+    monkeypatch.setattr(config, "SHIFT_WINDOWS", windows)
+    assert config_fingerprint() != fp
+    fp = config_fingerprint()
+    monkeypatch.setattr(config, "MIN_HOURS_IN_SHIFT", 2.0)
+    assert config_fingerprint() != fp
+    assert cache.key_for(pdf_a) != key
+
+
+def test_cache_roundtrip_and_lru_eviction(tmp_path):
+    cache = ResultCache(tmp_path, max_entries=2)
+    assert cache.get("k1") is None
+    cache.put("k1", WEEK)
+    assert cache.get("k1") == WEEK
+    cache.put("k2", WEEK)
+    # k1 se usa más recientemente que k2 -> al añadir k3 se expulsa k2
+    os.utime(tmp_path / "k2.json", (1, 1))
+    cache.get("k1")
+    cache.put("k3", WEEK)
+    assert cache.get("k2") is None
+    assert cache.get("k1") == WEEK
+    assert cache.get("k3") == WEEK
+
+
+def test_cache_discards_corrupt_entry(tmp_path):
+    cache = ResultCache(tmp_path)
+    (tmp_path / "roto.json").write_text("{no json", encoding="utf-8")
+    assert cache.get("roto") is None
+    assert not (tmp_path / "roto.json").exists()
+
+
+def test_unwritable_cache_does_not_fail_parse(tmp_path, capsys):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=4))
+    (tmp_path / "fichero").write_text("no soy una carpeta", encoding="utf-8")
+    cache = ResultCache(tmp_path / "fichero" / "cache")
+    days = parse_pdf(pdf, cache=cache)
+    assert len(days) == 2 and days == parse_pdf(pdf)
+    assert "Aviso: no se pudo guardar en la caché" in capsys.readouterr().err
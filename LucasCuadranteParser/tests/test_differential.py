@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del arnés diferencial frente al motor de referencia (benchmarks/differential.py)."""
+
+import copy
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import reference
+from differential import ENGINES, generate_case, random_cases, run_differential
+
+
+def test_engines_match_frozen_reference():
+    report = run_differential(random_cases(60, seed=1000))
+    assert report["cases"] == 60 and report["reference_seconds"] > 0
+    for name, res in report["engines"].items():
+        assert res["divergences"] == [], (name, str(res["divergences"][0]))
+        assert res["speedup"] > 0
+
+
+def test_first_divergent_day_and_shift_is_reported():
+    text = generate_case(7)
+    assert generate_case(7) == text  # determinista
+    days = reference.parse_text(text)
+    assert len(days) >= 2
+
+    def broken(text):
+        # Un motor que cuenta una persona de más en sala en la Tarde desde el segundo día
+        out = copy.deepcopy(ENGINES["pipeline"](text))
+        for day in out[1:]:
+            day["shifts"][1]["staff_floor"] += 1
+        return out
+
+    def failing(text):
+        raise ValueError("roto")
+
+    report = run_differential([("caso", text)], {"roto": broken, "falla": failing})
+    (div,) = report["engines"]["roto"]["divergences"]
+    assert (div.date, div.shift, div.field) == (days[1]["date"], "Tarde", "staff_floor")
+    assert div.got == div.expected + 1
+    assert report["engines"]["falla"]["divergences"][0].field == "excepción"
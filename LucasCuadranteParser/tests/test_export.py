@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de los formatos de salida para histórico (pipeline/export.py)."""
+
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import config
+from synthetic import generate_text
+from pipeline import export
+from pipeline.relations import _hours_in_shift_window
+from pipeline.runner import extract_entities_from_text, parse_text
+
+
+def test_ndjson_and_compact_json_round_trip():
+    days = parse_text(generate_text(days=3, employees=8))
+    buf = io.StringIO()
+    assert export.write_ndjson(iter(days), buf) == 3
+    lines = buf.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == days
+    compact = export.dumps_json(days, compact=True)
+    assert json.loads(compact) == days
+    assert "\n" not in compact and len(compact) < len(export.dumps_json(days))
+
+
+def test_columnar_tables_match_json(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    text = generate_text(days=3, employees=10)
+    days = parse_text(text)
+    table = export.days_table(days)
+    assert table.num_rows == sum(len(d["shifts"]) for d in days)
+    row = table.slice(1, 1).to_pylist()[0]
+    assert row["date"].isoformat() == days[0]["date"]
+    assert row["shift_name"] == days[0]["shifts"][1]["shift_name"]
+    assert row["hours_worked"] == days[0]["shifts"][1]["hours_worked"]
+
+    entities = extract_entities_from_text(text)
+    detail = export.detail_table(entities)
+    shifts = [ps for d in entities for ps in d.shifts]
+    assert detail.num_rows == len(shifts)
+    for name in config.SHIFT_NAMES:
+        expected = [_hours_in_shift_window(ps, name) for ps in shifts]
+        assert detail.column(f"hours_{name.lower()}").to_pylist() == pytest.approx(expected)
+
+    for fmt in export.COLUMNAR_FORMATS:
+        path = tmp_path / f"detalle.{fmt}"
+        export.write_table(detail, path, fmt)
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            back = pq.read_table(path)
+        else:
+            back = pa.ipc.open_file(str(path)).read_all()
+        assert back.equals(detail)
+    assert pa.ipc.open_file(pa.BufferReader(export.to_bytes(table, "arrow"))).read_all().equals(table)
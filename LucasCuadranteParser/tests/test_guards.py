@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de los límites de la extracción (pipeline/guards.py)."""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import generate_pages, write_pdf
+from pipeline.batch import run_batch
+from pipeline.cache import ResultCache
+from pipeline.guards import Guard, Limits
+from pipeline.incremental import parse_pdf_incremental
+from pipeline.ingest import extract_text_from_pdf
+from pipeline.runner import iter_pdf_days, parse_pdf
+
+
+def test_guard_chars_timeout_and_budget():
+    guard = Guard(Limits(max_chars=10))
+    assert [guard.extract(i, lambda: "x" * 6) for i in range(3)] == ["x" * 6, None, None]
+    assert guard.report() == {"partial": True, "skipped_pages": [2, 3], "limits": ["max_chars"]}
+
+    # Una página lenta se interrumpe y se sigue con la siguiente
+    guard = Guard(Limits(page_timeout_s=0.05))
+    t0 = time.monotonic()
+    assert guard.extract(0, lambda: time.sleep(2) or "lenta") is None
+    assert guard.extract(1, lambda: "rápida") == "rápida"
+    assert time.monotonic() - t0 < 1
+    assert guard.report()["skipped_pages"] == [1] and guard.report()["limits"] == ["page_timeout"]
+
+    guard = Guard(Limits(budget_s=0))
+    assert guard.extract(0, lambda: "x") is None and guard.report()["limits"] == ["budget"]
+    assert Guard(Limits()).report() is None
+
+
+def test_max_pages_partial_result_not_cached(tmp_path):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=4, employees=6))
+    full = parse_pdf(pdf)
+    cache = ResultCache(tmp_path / "cache")
+    stats: dict = {}
+    days = parse_pdf(pdf, cache=cache, limits=Limits(max_pages=3), stats=stats)
+    assert days == full[:3]
+    assert stats["partial"] is True and stats["skipped_pages"] == [4] and stats["limits"] == ["max_pages"]
+    assert cache.get(cache.key_for(pdf)) is None
+    # En paralelo los workers ni reciben las páginas de más: mismo texto y mismas páginas saltadas
+    limits = Limits(max_pages=3)
+    seq_stats: dict = {}
+    par_stats: dict = {}
+    text = extract_text_from_pdf(pdf, stats=seq_stats, limits=limits)
+    assert extract_text_from_pdf(pdf, workers=2, stats=par_stats, limits=limits) == text
+    assert par_stats["skipped_pages"] == seq_stats["skipped_pages"] == [4]
+
+    res = next(run_batch([pdf], jobs=1, limits=limits))
+    assert res.ok and res.days == full[:3] and res.partial["skipped_pages"] == [4]
+    # Sin límites el resultado está completo y sí se guarda
+    assert parse_pdf(pdf, cache=cache) == full and cache.get(cache.key_for(pdf)) == full
+
+
+def test_streaming_and_incremental_apply_limits(tmp_path):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=3, employees=6))
+    full = parse_pdf(pdf)
+    limits = Limits(max_pages=2)
+    stats: dict = {}
+    assert list(iter_pdf_days(pdf, limits=limits, stats=stats)) == full[:2]
+    assert stats["skipped_pages"] == [3]
+
+    state = tmp_path / "estado.json"
+    res = parse_pdf_incremental(pdf, state, limits=limits)
+    assert res["days"] == full[:2] and res["partial"]["skipped_pages"] == [3]
+    assert not state.exists()  # un parcial no deja estado del que reutilizar páginas
+    res = parse_pdf_incremental(pdf, state)
+    assert res["days"] == full and res["partial"] is None and state.exists()
+    # Las páginas reutilizadas del estado también cuentan para max_pages
+    res = parse_pdf_incremental(pdf, state, limits=limits)
+    assert res["days"] == full[:2] and res["pages_reparsed"] == 0
+
+
+def test_partial_stdout_exits_with_partial_code(tmp_path):
+    pytest.importorskip("pdfplumber")
+    import json
+    import subprocess
+
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=3, employees=6))
+    cmd = [sys.executable, str(ROOT / "main.py"), "-", "--stdout", "--compact", "--no-cache", "--no-entities"]
+    # Como la API: PDF por stdin, días por stdout; el parcial se distingue por el código de salida
+    proc = subprocess.run(cmd + ["--max-pages", "2"], input=pdf.read_bytes(), capture_output=True)
+    assert proc.returncode == 3 and b"resultado parcial" in proc.stderr
+    assert json.loads(proc.stdout) == parse_pdf(pdf)[:2]
+    proc = subprocess.run(cmd, input=pdf.read_bytes(), capture_output=True)
+    assert proc.returncode == 0 and len(json.loads(proc.stdout)) == 3
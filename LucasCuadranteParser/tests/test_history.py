@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del histórico SQLite (pipeline/history.py y main.py query)."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import generate_text
+from pipeline.history import HistoryStore, pdf_document_date
+from pipeline.normalize import to_lucas_week
+from pipeline.runner import extract_entities_from_text
+
+
+def test_newer_parse_supersedes_dates(tmp_path):
+    old_entities = extract_entities_from_text(generate_text(days=4, employees=6, seed=1))
+    new_entities = extract_entities_from_text(generate_text(days=4, employees=9, seed=2))
+    old, new = to_lucas_week(old_entities), to_lucas_week(new_entities)
+    assert [d["date"] for d in old] == [d["date"] for d in new] and old != new
+
+    with HistoryStore(tmp_path / "h.sqlite") as db:
+        assert db.upsert("a" * 64, old, old_entities, source="v1.pdf") == 4
+        # Nueva versión de los dos últimos días: sustituye solo esas fechas
+        db.upsert("b" * 64, new[2:], new_entities[2:], source="v2.pdf")
+        assert list(db.days()) == old[:2] + new[2:]
+        assert list(db.days(old[1]["date"], old[2]["date"])) == [old[1], new[2]]
+        assert list(db.days(sha256="a" * 64)) == old[:2]
+
+        noche = list(db.shifts(shift_name="Noche"))
+        assert [r["date"] for r in noche] == [d["date"] for d in old]
+        assert noche[3]["hours_worked"] == new[3]["shifts"][2]["hours_worked"]
+
+        rows = list(db.employee_shifts(new[3]["date"], new[3]["date"]))
+        assert len(rows) == len(new_entities[3].shifts)
+        assert {r["sha256"] for r in rows} == {"b" * 64}
+        name = rows[0]["employee"]
+        assert all(r["employee"] == name for r in db.employee_shifts(employee=name))
+
+
+def test_older_pdf_does_not_supersede_newer(tmp_path):
+    old_entities = extract_entities_from_text(generate_text(days=4, employees=6, seed=1))
+    new_entities = extract_entities_from_text(generate_text(days=4, employees=9, seed=2))
+    old, new = to_lucas_week(old_entities), to_lucas_week(new_entities)
+
+    with HistoryStore(tmp_path / "h.sqlite") as db:
+        assert db.upsert("b" * 64, new[1:], new_entities[1:], version="2026-02-19T17:00:00") == 3
+        # Cuadrante antiguo cargado después: solo entra la fecha que no estaba
+        assert db.upsert("a" * 64, old, old_entities, version="2026-02-19T16:00:00") == 1
+        assert list(db.days()) == [old[0]] + new[1:]
+        assert {r["sha256"] for r in db.employee_shifts(new[1]["date"])} == {"b" * 64}
+        # Otra versión más reciente sí sustituye
+        assert db.upsert("c" * 64, old, old_entities, version="2026-02-20T09:00:00") == 4
+        assert list(db.days()) == old
+
+    with HistoryStore(tmp_path / "sin_fecha.sqlite") as db:
+        # Sin fecha (PDF sin /ModDate, --from-text): pierde frente a cualquier PDF con fecha,
+        # aunque se cargue después; entre dos sin fecha gana el último guardado
+        assert db.upsert("a" * 64, old[:2], old_entities[:2]) == 2
+        assert db.upsert("e" * 64, new[:1], new_entities[:1]) == 1
+        assert list(db.days()) == new[:1] + old[1:2]
+        assert db.upsert("b" * 64, new, new_entities, version="2020-01-01T00:00:00") == 4
+        assert db.upsert("c" * 64, old, old_entities) == 0
+        assert list(db.days()) == new
+
+    pdf = b"%PDF-1.4\n1 0 obj\n<</CreationDate (D:20260101) /ModDate (D:20260219162556+00'00')>>\nendobj\n"
+    assert pdf_document_date(pdf) == "2026-02-19T16:25:56"
+    assert pdf_document_date(pdf.replace(b"/ModDate", b"/Other")) == "2026-01-01T00:00:00"
+    (tmp_path / "s.pdf").write_bytes(b"%PDF-1.4\n" + b"x" * 200_000 + pdf)
+    assert pdf_document_date(tmp_path / "s.pdf") == "2026-02-19T16:25:56"
+    assert pdf_document_date(b"%PDF-1.4\n%%EOF") is None
+
+
+def test_query_command_reads_index(tmp_path):
+    text_path = tmp_path / "semana.txt"
+    text_path.write_text(generate_text(days=3, employees=5), encoding="utf-8")
+    db = tmp_path / "h.sqlite"
+    main = str(ROOT / "main.py")
+    subprocess.run([sys.executable, main, "--from-text", str(text_path), "-o", str(tmp_path / "out"),
+                    "--db", str(db)], check=True, capture_output=True)
+    expected = json.loads((tmp_path / "out" / "cuadrante_lucas.json").read_text(encoding="utf-8"))
+
+    proc = subprocess.run([sys.executable, main, "query", "--db", str(db), "--from", expected[1]["date"]],
+                          check=True, capture_output=True)
+    assert [json.loads(line) for line in proc.stdout.splitlines()] == expected[1:]
+    proc = subprocess.run([sys.executable, main, "query", "--db", str(db), "--format", "json", "--employees"],
+                          check=True, capture_output=True)
+    assert {r["date"] for r in json.loads(proc.stdout)} == {d["date"] for d in expected}
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del re-parseo incremental (pipeline/incremental.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import generate_pages, write_pdf
+from pipeline.incremental import diff_days, page_fingerprints, parse_pdf_incremental
+from pipeline.runner import parse_pdf
+
+
+def test_diff_days():
+    a = [{"date": "2026-03-02", "x": 1}, {"date": "2026-03-03", "x": 1}]
+    b = [{"date": "2026-03-03", "x": 2}, {"date": "2026-03-04", "x": 1}]
+    assert diff_days(a, b) == {
+        "added": ["2026-03-04"], "removed": ["2026-03-02"], "changed": ["2026-03-03"], "unchanged": [],
+    }
+
+
+def test_only_changed_pages_and_days_are_reparsed(tmp_path):
+    pytest.importorskip("pdfplumber")
+    pages = generate_pages(days=4, employees=8)
+    v1 = write_pdf(tmp_path / "v1.pdf", pages)
+    state = tmp_path / "estado.json"
+
+    first = parse_pdf_incremental(v1, state)
+    assert first["pages_reparsed"] == 4 and first["days_reparsed"] == 4
+    assert len(first["diff"]["added"]) == 4
+    assert first["days"] == parse_pdf(v1)
+
+    # Versión revisada: cambia el horario de un empleado el tercer día
+    revised = [list(p) for p in pages]
+    row = next(i for i, ln in enumerate(revised[2]) if " - " in ln and ln[:1].isupper() and ":" in ln)
+    revised[2][row] = revised[2][row].split(" ")[0] + " 08:00 - 09:00"
+    v2 = write_pdf(tmp_path / "v2.pdf", revised)
+    fps1, fps2 = page_fingerprints(v1), page_fingerprints(v2)
+    assert [a == b for a, b in zip(fps1, fps2)] == [True, True, False, True]
+
+    second = parse_pdf_incremental(v2, state)
+    assert second["pages_reparsed"] == 1 and second["days_reparsed"] == 1
+    assert second["days"] == parse_pdf(v2)
+    assert second["diff"]["changed"] == [second["days"][2]["date"]]
+    assert len(second["diff"]["unchanged"]) == 3
+
+    # Sin cambios: nada que re-parsear
+    third = parse_pdf_incremental(v2, state)
+    assert third["pages_reparsed"] == 0 and third["diff"]["changed"] == []
+
+
+def test_year_without_week_header_follows_the_clock_like_runner(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    from datetime import datetime
+
+    import pipeline.entities
+    import pipeline.incremental
+
+    def freeze(year: int, month: int) -> None:
+        class Frozen(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime(year, month, 15)
+
+        monkeypatch.setattr(pipeline.entities, "datetime", Frozen)
+        monkeypatch.setattr(pipeline.incremental, "datetime", Frozen)
+
+    pages = [[ln for ln in p if "Horarios de BETLEM" not in ln] for p in generate_pages(days=2, employees=6)]
+    pdf = write_pdf(tmp_path / "s.pdf", pages)
+    state = tmp_path / "estado.json"
+    freeze(2025, 12)
+    first = parse_pdf_incremental(pdf, state)
+    assert len(first["days"]) == 2 and first["days"] == parse_pdf(pdf)
+
+    # Sin cabecera el año es el del reloj (entities.entity_year): en enero los mismos
+    # bloques dan otras fechas, así que se re-parsean y coinciden con un parseo completo
+    freeze(2026, 1)
+    second = parse_pdf_incremental(pdf, state)
+    assert second["pages_reparsed"] == 0 and second["days_reparsed"] == 2
+    assert second["days"] == parse_pdf(pdf) and second["days"] != first["days"]
+    assert all(d.startswith("2026-") for d in second["diff"]["added"])
+
+
+def test_state_depends_on_crop_and_effective_backend(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    import config
+    import pipeline.incremental
+
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6))
+    state = tmp_path / "estado.json"
+    parse_pdf_incremental(pdf, state)
+    assert parse_pdf_incremental(pdf, state)["pages_reparsed"] == 0
+
+    # Otro recorte cambia el texto de las páginas: no se reutiliza nada
+    monkeypatch.setattr(config, "CROP_TO_TABLE", not config.CROP_TO_TABLE)
+    assert parse_pdf_incremental(pdf, state)["pages_reparsed"] == 2
+    monkeypatch.undo()
+
+    # Motor pedido sin instalar: pdfplumber, como ingest, y el estado queda con el efectivo
+    parse_pdf_incremental(pdf, state)
+    monkeypatch.setattr(pipeline.incremental, "is_available", lambda name: False)
+    res = parse_pdf_incremental(pdf, state, backend="pdfium")
+    assert res["backend"] == "pdfplumber" and res["backend_fallback"] == "pdfium: no instalado"
+    assert res["pages_reparsed"] == 0 and res["days"] == parse_pdf(pdf)
+    monkeypatch.undo()
+
+    # Motor instalado que falla al abrir el PDF: se repite con pdfplumber y su estado
+    real_open = pipeline.incremental.open_document
+
+    def broken_open(source, backend):
+        if backend == "pdfium":
+            raise RuntimeError("PDF ilegible")
+        return real_open(source, backend)
+
+    monkeypatch.setattr(pipeline.incremental, "is_available", lambda name: True)
+    monkeypatch.setattr(pipeline.incremental, "open_document", broken_open)
+    res = parse_pdf_incremental(pdf, tmp_path / "otro.json", backend="pdfium")
+    assert res["backend"] == "pdfplumber" and res["backend_fallback"] == "pdfium: RuntimeError: PDF ilegible"
+    assert res["days"] == parse_pdf(pdf)
+
+
+def test_changed_table_layout_invalidates_reused_pages(tmp_path):
+    pytest.importorskip("pdfplumber")
+    import json
+
+    pages = generate_pages(days=3, employees=6)
+    v1 = write_pdf(tmp_path / "v1.pdf", pages)
+    state = tmp_path / "estado.json"
+    parse_pdf_incremental(v1, state)
+    assert json.loads(state.read_text(encoding="utf-8"))["table_layout"]["legend_x0"] is not None
+
+    # La primera página pierde la leyenda: la geometría cambia (sin legend_x0) y el texto
+    # recortado del resto de páginas, aunque no cambien, ya no es el guardado
+    revised = [list(p) for p in pages]
+    revised[0] = [ln for ln in revised[0] if not ln.startswith("Puestos:")]
+    v2 = write_pdf(tmp_path / "v2.pdf", revised)
+    second = parse_pdf_incremental(v2, state)
+    assert second["pages_reparsed"] == 3
+    assert second["days"] == parse_pdf(v2)
+    assert json.loads(state.read_text(encoding="utf-8"))["table_layout"]["legend_x0"] is None
+
+    # Misma primera página: la geometría guardada vale y solo se lee la página cambiada
+    revised[1] = revised[1][:-1] + ["-- 2 of 3 (rev)"]
+    v3 = write_pdf(tmp_path / "v3.pdf", revised)
+    third = parse_pdf_incremental(v3, state)
+    assert third["pages_reparsed"] == 1 and third["days"] == parse_pdf(v3)
+
+
+def test_stdout_emits_days_and_diff_without_files(tmp_path):
+    pytest.importorskip("pdfplumber")
+    import json
+    import subprocess
+
+    pdf = write_pdf(tmp_path / "v1.pdf", generate_pages(days=2, employees=4))
+    out = tmp_path / "out"
+    proc = subprocess.run(
+        [sys.executable, str(ROOT / "main.py"), str(pdf), "--incremental", str(tmp_path / "estado.json"),
+         "--stdout", "--compact", "-o", str(out), "--no-cache", "--no-entities"],
+        capture_output=True, check=True,
+    )
+    res = json.loads(proc.stdout)
+    assert res["days"] == parse_pdf(pdf)
+    assert len(res["diff"]["added"]) == 2
+    assert not out.exists()
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la ingesta de PDF (requieren pdfplumber y los PDF de documentacion/)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline.ingest import _page_ranges, extract_text_from_pdf
+
+SAMPLE_PDF = ROOT.parent / "documentacion" / "2026-02-09_a_2026-02-15_asistencia.pdf"
+
+
+def test_page_ranges_cover_all_pages_in_order():
+    assert _page_ranges(7, 3) == [(0, 3), (3, 5), (5, 7)]
+    assert _page_ranges(2, 2) == [(0, 1), (1, 2)]
+
+
+def test_parallel_extraction_is_identical_to_sequential():
+    pytest.importorskip("pdfplumber")
+    if not SAMPLE_PDF.exists():
+        pytest.skip("PDF de ejemplo no disponible")
+    assert extract_text_from_pdf(SAMPLE_PDF, workers=3) == extract_text_from_pdf(SAMPLE_PDF)
+
+
+def test_in_memory_input_matches_path(tmp_path):
+    pytest.importorskip("pdfplumber")
+    import io
+    import mmap
+
+    sys.path.insert(0, str(ROOT / "benchmarks"))
+    from synthetic import generate_pages, write_pdf
+    from pipeline.runner import parse_pdf
+
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6))
+    expected = extract_text_from_pdf(pdf)
+    data = pdf.read_bytes()
+    assert extract_text_from_pdf(data) == expected
+    assert extract_text_from_pdf(io.BytesIO(data)) == expected
+    with open(pdf, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        assert extract_text_from_pdf(mm, backend="pdfminer") == expected
+    assert parse_pdf(data) == parse_pdf(pdf)
+    with pytest.raises(FileNotFoundError):
+        extract_text_from_pdf(tmp_path / "no.pdf")
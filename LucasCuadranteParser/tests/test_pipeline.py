@@ -1,17 +1,23 @@
 # -*- coding: utf-8 -*-
 """Pruebas básicas del pipeline (segmentación, entidades, reglas, normalización)."""
 
+import pickle
 import sys
 from pathlib import Path
 
 # Raíz del proyecto
 ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
 
-from pipeline.segment import segment_by_days, DayBlock
-from pipeline.entities import extract_entities_from_day_blocks, DayEntities
-from pipeline.relations import apply_shift_rules
+import config
+from pipeline import entities, windows
+from pipeline.entities import DayEntities, ParsedShift, extract_entities_from_day_blocks
 from pipeline.normalize import to_lucas_week
+from pipeline.relations import _role_to_area, apply_shift_rules, apply_shift_rules_batch, reset_role_cache
+from pipeline.runner import iter_lines_days, parse_text
+from pipeline.segment import iter_day_blocks, segment_by_days
+from synthetic import generate_text
 
 
 def test_segment_by_days():
@@ -146,6 +152,123 @@ SHEK 12:00 - 16:00 20:00 - 00:00
     assert shifts["Noche"]["staff_floor"] == 2
 
 
+def test_shifts_keep_employee_and_role_of_their_row():
+    """Cada rango horario se asocia al empleado y al rol de su fila (línea anterior)."""
+    text = """
+Lunes 9 febrero 0h 1h Total Firma
+Guillermo Manager 08h00
+DEO MARTÍN 16:00 - 00:00
+Jose Descanso semanal 00h00
+GARCIA DE LA VEGA (8h)
+Mizan Cocinero/a Cocinero/a 08h00
+SHEK 12:00 - 16:00 20:00 - 00:00
+"""
+    blocks, _ = segment_by_days(text)
+    day = extract_entities_from_day_blocks(blocks, year_from_week=2026)[0]
+    got = [(ps.employee_name.split()[0], ps.role, ps.start_h, ps.is_rest_or_absence) for ps in day.shifts]
+    assert got == [
+        ("Guillermo", "Manager", 16, False),
+        ("Jose", "Manager", 0, True),
+        ("Mizan", "Cocinero", 12, False),
+        ("Mizan", "Cocinero", 20, False),
+    ]
+
+
+def test_role_to_area_precedence_and_config_changes(monkeypatch):
+    assert _role_to_area("Segundo de sala") == "sala"
+    assert _role_to_area("Segundo de cocina") == "cocina"
+    assert _role_to_area("Chef Operativo - MOLINA") == "cocina"
+    assert _role_to_area("Guillermo") is None
+    # Sustituir el mapa invalida la tabla precalculada y la memoria
+    monkeypatch.setattr(config, "ROLE_TO_AREA", {"manager": "cocina"})
+    assert _role_to_area("Manager") == "cocina"
+    # Modificarlo en sitio requiere reset_role_cache()
+    config.ROLE_TO_AREA["guillermo"] = "sala"
+    reset_role_cache()
+    assert _role_to_area("Guillermo") == "sala"
+    monkeypatch.undo()
+    reset_role_cache()
+    assert _role_to_area("Manager") == "sala"
+
+
+def test_shift_windows_batch_matches_per_day():
+    """Cálculo en bloque = día a día: umbral 1h30, Noche cruzando medianoche, descansos y otros centros."""
+    days = [
+        DayEntities("2026-02-09", [], [
+            ParsedShift("Camarero/a", 20, 0, 1, 0),                        # Noche 5h (cruza)
+            ParsedShift("Cocinero/a", 22, 30, 2, 0, crosses_midnight=True),  # Noche 2h30 dentro de ventana
+            ParsedShift("Manager", 14, 45, 16, 15),                        # 1h15 Mediodía, 14 min Tarde
+            ParsedShift("Camarero/a", 10, 0, 16, 0, is_rest_or_absence=True),
+            ParsedShift("Cocinero/a", 10, 0, 16, 0, is_other_establishment=True),
+        ]),
+        DayEntities("2026-02-10", [], []),
+        DayEntities("2026-02-11", [], [ParsedShift("Jefe de sala", 11, 0, 12, 30)]),
+    ]
+    per_day = [apply_shift_rules(d) for d in days]
+    noche = {a.shift_name: a for a in per_day[0]}["Noche"]
+    assert (noche.staff_floor, noche.staff_kitchen, noche.hours_worked) == (1, 1, 7.5)
+    mediodia = {a.shift_name: a for a in per_day[0]}["Mediodia"]
+    assert (mediodia.staff_floor, mediodia.hours_worked) == (0, 1.25)
+    assert [a.hours_worked for a in per_day[1]] == [0.0, 0.0, 0.0]
+    assert per_day[2][0].staff_floor == 1  # exactamente 1h30 cuenta
+    assert apply_shift_rules_batch(days, use_numpy=False) == per_day
+    if windows.np is not None:
+        assert apply_shift_rules_batch(days, use_numpy=True) == per_day
+
+
+WEEK_TEXT = """
+Horarios de BETLEM del 09/02/2026 al 15/02/2026
+Lunes 9 febrero 0h 1h 2h Total Firma
+Jose Camarero/a 08h00
+GARCIA DE LA VEGA 16:00 - 00:00
+Ivan Segundo de cocina 09h00
+PELEGRINA IGLESIA 14:00 - 23:00
+Martes 10
+febrero
+Santiago Adolfo Camarero/a Camarero/a 09h00
+MEJIA PALACIO 11:00 - 16:00 19:00 - 23:00
+Mi?rcoles 11 febrero 0h 1h Total Firma
+Mizan Cocinero/a Cocinero/a 08h00
+SHEK 12:00 - 16:00 20:00 - 00:00
+"""
+
+
+def test_streaming_pipeline_matches_batch():
+    lines = WEEK_TEXT.split("\n")
+    blocks, _ = segment_by_days(WEEK_TEXT)
+    assert [b.day_num for b in blocks] == [9, 10, 11]
+    assert list(iter_day_blocks(lines)) == blocks
+    assert list(iter_lines_days(lines)) == parse_text(WEEK_TEXT)
+
+
+def test_streaming_pipeline_emits_first_day_early():
+    lines = WEEK_TEXT.split("\n")
+    consumed = []
+
+    def source():
+        for ln in lines:
+            consumed.append(ln)
+            yield ln
+
+    first = next(iter_lines_days(source()))
+    assert first["date"] == "2026-02-09"
+    assert len(consumed) < len(lines)
+
+
+def test_parallel_entities_match_sequential(monkeypatch):
+    blocks, _info = segment_by_days(generate_text(days=9, employees=12))
+    sequential = extract_entities_from_day_blocks(blocks, year_from_week=2026)
+    # Semanas cortas: por debajo del umbral no se arrancan procesos
+    monkeypatch.setattr("concurrent.futures.ProcessPoolExecutor", None)
+    assert extract_entities_from_day_blocks(blocks, year_from_week=2026, workers=4) == sequential
+    monkeypatch.undo()
+
+    monkeypatch.setattr(entities, "PARALLEL_MIN_BLOCKS", 2)
+    assert extract_entities_from_day_blocks(blocks, year_from_week=2026, workers=2) == sequential
+    shift = sequential[0].shifts[0]
+    assert pickle.loads(pickle.dumps(shift)) == shift
+
+
 if __name__ == "__main__":
     test_segment_by_days()
     test_entities_and_normalize()
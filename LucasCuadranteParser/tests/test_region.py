@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del recorte a la tabla del cuadrante (pipeline/region.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import config
+from synthetic import generate_pages, write_pdf
+from pipeline.backends import chars_to_text
+from pipeline.ingest import extract_text_from_pdf
+from pipeline.region import crop_chars, detect_layout, table_bands
+from pipeline.runner import parse_text
+
+
+def _chars(text: str, x: float, top: float, width: float = 4.0):
+    return [(c, x + i * width, x + (i + 1) * width, top, top + 7, True) for i, c in enumerate(text)]
+
+
+def _page(first: bool):
+    # Como BETLEM: leyenda en el margen 20; etiqueta del día a 21,5 y unos pt por encima
+    # de su fila "Total Firma"; la columna de horas empieza a la derecha de la etiqueta
+    chars = []
+    if first:
+        chars += _chars("Horarios de BETLEM del 10/11/2025 al 16/11/2025", 20, 10)
+        chars += _chars("código QR", 420, 10)
+    chars += _chars("Lunes 10", 21.5, 30) + _chars("0h 1h Total Firma", 300, 35)
+    chars += _chars("Ana 10:00 - 16:00", 21.5, 50)
+    chars += _chars("Puestos: Camarero Manager", 20, 70) + _chars("Empleados: Ana,Luis", 20, 80)
+    chars += _chars("Martes", 21.5, 100) + _chars("0h 1h Total Firma", 300, 105) + _chars("11", 21.5, 110)
+    chars += _chars("Luis 16:00 - 23:00", 21.5, 120)
+    return chars
+
+
+def test_bands_drop_header_and_legends_only():
+    layout = detect_layout(_page(first=True))
+    assert layout is not None and layout.legend_x0 == 20
+    text = chars_to_text(crop_chars(_page(True), table_bands(_page(True), layout, first_page=True)))
+    assert text.split("\n") == [
+        "Horarios de BETLEM del 10/11/2025 al 16/11/2025",
+        "Lunes 10",
+        "0h 1h Total Firma",
+        "Ana 10:00 - 16:00",
+        "Martes",
+        "0h 1h Total Firma",
+        "11",
+        "Luis 16:00 - 23:00",
+    ]
+    # En las demás páginas la cabecera del documento no se toca (no hay)
+    other = _page(first=False)
+    assert "Puestos" not in chars_to_text(crop_chars(other, table_bands(other, layout)))
+    # Otro formato (sin fila "Total Firma"): no se recorta
+    assert detect_layout(_chars("Horarios de la semana", 20, 10)) is None
+
+
+def test_cropped_text_same_result_every_engine(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=3, employees=6))
+    monkeypatch.setattr(config, "CROP_TO_TABLE", False)
+    full = extract_text_from_pdf(pdf)
+    monkeypatch.setattr(config, "CROP_TO_TABLE", True)
+    cropped = extract_text_from_pdf(pdf)
+    assert "Puestos:" in full and "Puestos:" not in cropped and len(cropped) < len(full)
+    assert parse_text(cropped) == parse_text(full)
+    assert extract_text_from_pdf(pdf, backend="pdfminer", fallback=False) == cropped
+    # En paralelo los workers usan la geometría de la primera página
+    assert extract_text_from_pdf(pdf, workers=2) == cropped
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de las entidades persistidas (pipeline/serialize.py) y de la re-agregación."""
+
+import sys
+from datetime import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import config
+from synthetic import generate_pages, write_pdf
+from pipeline.entities import DayEntities, ParsedEmployee, ParsedShift
+from pipeline.normalize import to_lucas_week
+from pipeline.relations import reset_role_cache
+from pipeline.runner import extract_entities_from_text, parse_pdf
+from pipeline.serialize import EntityStore, entities_from_dict, entities_to_dict
+
+TEXT = """
+Horarios de BETLEM del 09/02/2026 al 15/02/2026
+Lunes 9 febrero 	0h 	1h 	Total 	Firma
+Manager
+10:00 - 16:00
+Camarero/a
+16:00 - 20:00
+Cocinero/a
+20:00 - 01:00
+Martes 10 febrero 	0h 	1h 	Total 	Firma
+Camarero/a
+12:15 - 15:45
+"""
+
+
+def test_entities_roundtrip_is_exact():
+    days = extract_entities_from_text(TEXT)
+    days.append(DayEntities("2026-02-11", [ParsedEmployee("Leonel VITALE", 7.216666666666667)], [
+        ParsedShift("Cocinero/a - MOLINA", 9, 0, 17, 0, is_other_establishment=True, employee_name="Leonel VITALE"),
+        ParsedShift("Descanso", 0, 0, 0, 0, is_rest_or_absence=True, max_hours_cap=3.25),
+        ParsedShift("Camarero/a", 20, 0, 2, 0, crosses_midnight=True, duration_hours=6.0),
+    ]))
+    assert entities_from_dict(entities_to_dict(days)) == days
+
+
+def test_store_and_reaggregate_with_new_windows(tmp_path, monkeypatch):
+    days = extract_entities_from_text(TEXT)
+    store = EntityStore(tmp_path)
+    assert store.get("abc") is None and not store.has("abc")
+    store.put("abc", days, source="semana7.pdf")
+    assert store.has("abc")
+    (meta, stored), = store.entries()
+    assert meta["source"] == "semana7.pdf" and stored == days
+
+    # Re-agregar con otra ventana de Tarde = parsear otra vez el texto con esa ventana
+    windows = dict(config.SHIFT_WINDOWS)
+    windows["Tarde"] = (time(17, 0), time(18, 0))
+    monkeypatch.setattr(config, "SHIFT_WINDOWS", windows)
+    monkeypatch.setattr(config, "MIN_HOURS_IN_SHIFT", 1.0)
+    reset_role_cache()
+    reaggregated = to_lucas_week(store.get("abc"))
+    assert reaggregated == to_lucas_week(extract_entities_from_text(TEXT))
+    tarde = {s["shift_name"]: s for s in reaggregated[0]["shifts"]}["Tarde"]
+    assert (tarde["staff_floor"], tarde["hours_worked"]) == (1, 1.0)
+
+
+def test_store_ignores_other_parser_version_and_crop(tmp_path, monkeypatch):
+    store = EntityStore(tmp_path)
+    days = extract_entities_from_text(TEXT)
+    store.put("abc", days, backend="pdfium")
+    (meta, _stored), = store.entries()
+    assert (meta["crop_to_table"], meta["backend"]) == (config.CROP_TO_TABLE, "pdfium")
+
+    monkeypatch.setattr(config, "CROP_TO_TABLE", not config.CROP_TO_TABLE)
+    assert not store.has("abc") and store.get("abc") is None and not list(store.entries())
+    monkeypatch.undo()
+    monkeypatch.setattr(config, "PARSER_VERSION", config.PARSER_VERSION + "-nueva")
+    assert not store.has("abc") and store.get("abc") is None and not list(store.entries())
+
+    # Al guardar con la versión nueva se sustituye la entrada antigua del mismo PDF
+    store.put("abc", days)
+    assert store.get("abc") == days
+    assert len(list(tmp_path.glob("abc.*"))) == 1
+
+
+def test_unwritable_entity_store_does_not_fail_parse(tmp_path, capsys):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=4))
+    (tmp_path / "fichero").write_text("no soy una carpeta", encoding="utf-8")
+    store = EntityStore(tmp_path / "fichero" / "entidades")
+    assert len(parse_pdf(pdf, entity_store=store)) == 2
+    assert "Aviso: no se pudieron guardar las entidades" in capsys.readouterr().err
+
+
+def test_store_evicts_stale_then_least_recently_used(tmp_path, monkeypatch):
+    import os
+
+    days = extract_entities_from_text(TEXT)
+    store = EntityStore(tmp_path, max_entries=2)
+    monkeypatch.setattr(config, "PARSER_VERSION", "0.9")
+    store.put("viejo", days)
+    monkeypatch.undo()
+    store.put("a", days)
+    # Con el límite lleno sale antes la entrada de otra versión, aunque sea más reciente
+    os.utime(next(tmp_path.glob("viejo.*")), None)
+    os.utime(next(tmp_path.glob("a.*")), (1, 1))
+    store.put("b", days)
+    assert sorted(p.name.split(".")[0] for p in tmp_path.glob("*.json.gz")) == ["a", "b"]
+    # Después, la menos usada: "a" se acaba de usar, así que sale "b"
+    os.utime(next(tmp_path.glob("b.*")), (1, 1))
+    assert store.has("a")
+    store.put("c", days)
+    assert store.has("a") and store.has("c") and not store.has("b")
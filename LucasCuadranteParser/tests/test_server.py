@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del modo servidor JSON-lines (server.serve)."""
+
+import io
+import json
+import multiprocessing
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import config
+from pipeline.cache import ResultCache
+import server
+from server import _WorkerSlot, serve
+from synthetic import generate_pages, write_pdf
+
+
+def _run(lines, **kwargs):
+    stdin = io.StringIO("\n".join(json.dumps(x) if not isinstance(x, str) else x for x in lines) + "\n")
+    stdout = io.StringIO()
+    assert serve(stdin=stdin, stdout=stdout, **kwargs) == 0
+    return [json.loads(ln) for ln in stdout.getvalue().splitlines()]
+
+
+def test_serve_ping_errors_and_ids():
+    out = _run([
+        {"id": "p1", "op": "ping"},
+        "esto no es json",
+        {"id": 7, "pdf_path": str(ROOT / "no_existe.pdf")},
+        {"id": 8},
+    ], max_jobs=2)
+    assert out[0] == {"event": "ready", "max_jobs": 2}
+    by_id = {r["id"]: r for r in out[1:]}
+    assert by_id["p1"]["ok"] is True
+    assert by_id[None]["ok"] is False
+    assert by_id[7]["ok"] is False and "no encontrado" in by_id[7]["error"]
+    assert by_id[8]["ok"] is False
+
+
+def test_serve_rejects_invalid_fields_and_keeps_running():
+    pdf = str(ROOT / "no_existe.pdf")
+    out = _run([
+        {"id": 1, "pdf_path": pdf, "timeout": "abc"},
+        {"id": 2, "pdf_path": pdf, "no_cache": "false"},
+        {"id": 3, "pdf_path": pdf, "timings": 1},
+        {"id": 4, "pdf_path": pdf, "timeout": 0},
+        {"id": 5, "op": "ping"},
+    ])
+    by_id = {r["id"]: r for r in out[1:]}
+    for i in (1, 2, 3):
+        assert by_id[i]["ok"] is False and "Petición inválida" in by_id[i]["error"]
+    # timeout 0 = sin límite: el trabajo se ejecuta (y falla por el PDF, no por timeout)
+    assert "no encontrado" in by_id[4]["error"]
+    assert by_id[5]["ok"] is True
+
+
+def test_serve_stops_on_shutdown():
+    out = _run([{"op": "shutdown"}, {"id": 1, "op": "ping"}])
+    assert [r.get("event") for r in out] == ["ready"]
+
+
+def test_serve_passes_full_page_to_spawned_workers(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6))
+    spawn = multiprocessing.get_context("spawn")
+    monkeypatch.setattr(multiprocessing, "get_context", lambda *a: spawn)
+    monkeypatch.setattr(config, "CROP_TO_TABLE", False)  # como --serve --full-page
+    out = _run([{"id": 1, "pdf_path": str(pdf)}], cache_dir=str(tmp_path / "cache"))
+    assert out[1]["ok"] is True
+    # El worker guardó el resultado con la clave de página completa, no la del recorte
+    cache = ResultCache(tmp_path / "cache")
+    assert cache.get(cache.key_for(pdf)) == out[1]["days"]
+    monkeypatch.setattr(config, "CROP_TO_TABLE", True)
+    assert cache.get(cache.key_for(pdf)) is None
+
+
+def test_serve_passes_backend_to_workers(tmp_path):
+    pytest.importorskip("pdfplumber")
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6))
+    out = _run([{"id": 1, "pdf_path": str(pdf)}], cache_dir=str(tmp_path / "cache"), backend="pdfminer")
+    assert out[1]["ok"] is True
+    # El worker guardó el resultado con la clave de ese motor
+    cache = ResultCache(tmp_path / "cache")
+    assert cache.get(cache.key_for(pdf, backend="pdfminer")) == out[1]["days"]
+    assert cache.get(cache.key_for(pdf)) is None
+
+
+def test_serve_rejects_worker_pools():
+    proc = subprocess.run([sys.executable, str(ROOT / "main.py"), "--serve", "--ingest-workers", "4"],
+                          input=b"", capture_output=True)
+    assert proc.returncode == 1 and b"--max-jobs" in proc.stderr
+
+
+def test_dead_worker_is_replaced_between_requests(tmp_path):
+    pytest.importorskip("pdfplumber")
+    pdf = str(write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6)))
+    slot = _WorkerSlot(multiprocessing.get_context(), None)
+    try:
+        first = slot.run(pdf, timeout=60)
+        # Worker muerto en reposo: el envío falla, se responde y el slot sigue sirviendo
+        slot.proc.kill()
+        slot.proc.join()
+        second = slot.run(pdf, timeout=60)
+        third = slot.run(pdf, timeout=60)
+    finally:
+        slot.close()
+    assert first["ok"] is True
+    assert second == {"ok": False, "error": "el worker terminó inesperadamente"}
+    assert third["ok"] is True and third["days"] == first["days"]
+
+
+def test_slot_error_still_answers_and_keeps_slot(monkeypatch):
+    calls = []
+
+    def flaky(self, pdf_path, timeout, no_cache=False, timings=False):
+        calls.append(pdf_path)
+        if len(calls) == 1:
+            raise RuntimeError("reinicio fallido")
+        return {"ok": True, "days": []}
+
+    monkeypatch.setattr(server._WorkerSlot, "run", flaky)
+    out = _run([{"id": "x", "pdf_path": "a.pdf"}, {"id": "y", "pdf_path": "b.pdf"}], max_jobs=1)
+    by_id = {r["id"]: r for r in out[1:]}
+    assert by_id["x"]["ok"] is False and "reinicio fallido" in by_id["x"]["error"]
+    assert by_id["y"]["ok"] is True
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Arranque en frío: importar main/pipeline no debe cargar pdfplumber, NumPy ni el parseo."""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+TEXT = """
+Horarios de BETLEM del 09/02/2026 al 15/02/2026
+Lunes 9 febrero 	0h 	1h 	Total 	Firma
+Manager
+10:00 - 16:00
+Camarero/a
+16:00 - 20:00
+"""
+
+
+def _loaded_after(code: str, modules=("pdfplumber", "numpy")) -> dict:
+    probe = code + f"\nimport json, sys\nprint(json.dumps({{m: m in sys.modules for m in {tuple(modules)!r}}}))"
+    out = subprocess.run([sys.executable, "-c", probe], cwd=str(ROOT), capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def test_imports_are_lazy():
+    assert _loaded_after("import main, pipeline, config; pipeline.parse_text") == {"pdfplumber": False, "numpy": False}
+    # Pocos turnos: se agrega en Python puro sin importar NumPy
+    assert _loaded_after(f"from pipeline import parse_text; parse_text({TEXT!r})")["numpy"] is False
+    # main solo importa el pipeline en el modo que se ejecuta (--help, query: nada del parseo)
+    parsing = ("pipeline.runner", "pipeline.entities", "pipeline.segment", "pipeline.normalize")
+    assert not any(_loaded_after("import main", parsing).values())
+
+
+def test_cache_hit_does_not_load_parsing(tmp_path):
+    pytest.importorskip("pdfplumber")
+    sys.path.insert(0, str(ROOT / "benchmarks"))
+    from synthetic import generate_pages, write_pdf
+
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6))
+    run = (
+        f"import sys, main; sys.argv = ['main.py', {str(pdf)!r}, '-o', {str(tmp_path / 'out')!r}, "
+        f"'--cache-dir', {str(tmp_path / 'cache')!r}, '--no-entities']; main.main()"
+    )
+    parsing = ("pipeline.normalize", "pipeline.relations", "pdfplumber")
+    assert all(_loaded_after(run, parsing).values())
+    assert not any(_loaded_after(run, parsing).values())
+
+
+def test_from_text_matches_parse_text(tmp_path):
+    from pipeline.runner import parse_text
+
+    src = tmp_path / "cuadrante.txt"
+    src.write_text(TEXT, encoding="utf-8")
+    subprocess.run(
+        [sys.executable, str(ROOT / "main.py"), "--from-text", str(src), "-o", str(tmp_path / "out")],
+        check=True, capture_output=True,
+    )
+    out = json.loads((tmp_path / "out" / "cuadrante_lucas.json").read_text(encoding="utf-8"))
+    assert out == parse_text(TEXT)
+
+
+def test_pdf_from_stdin_to_stdout(tmp_path):
+    pytest.importorskip("pdfplumber")
+    sys.path.insert(0, str(ROOT / "benchmarks"))
+    from synthetic import generate_pages, write_pdf
+    from pipeline.runner import parse_pdf
+
+    pdf = write_pdf(tmp_path / "s.pdf", generate_pages(days=2, employees=6))
+    res = subprocess.run(
+        [sys.executable, str(ROOT / "main.py"), "-", "--stdout", "--no-cache", "--no-entities",
+         "-o", str(tmp_path / "out")],
+        input=pdf.read_bytes(), check=True, capture_output=True,
+    )
+    assert json.loads(res.stdout.decode("utf-8")) == parse_pdf(pdf)
+    assert not (tmp_path / "out").exists()
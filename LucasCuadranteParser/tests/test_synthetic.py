@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""Pruebas del generador de cuadrantes sintéticos (benchmarks/synthetic.py)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from synthetic import generate_pages, generate_text, write_pdf
+from pipeline.runner import parse_text
+
+
+def test_generated_text_parses_into_consecutive_days():
+    text = generate_text(days=9, employees=30)
+    days = parse_text(text)
+    assert [d["date"] for d in days] == [f"2026-03-{n:02d}" for n in range(2, 11)]
+    assert all(d["total_hours_worked"] > 0 for d in days)
+    assert generate_text(days=9, employees=30) == text  # determinista
+
+
+def test_pdf_roundtrip_matches_text(tmp_path):
+    pytest.importorskip("pdfplumber")
+    from pipeline.ingest import extract_text_from_pdf
+
+    pages = generate_pages(days=2, employees=8)
+    pdf = write_pdf(tmp_path / "s.pdf", pages)
+    text = extract_text_from_pdf(pdf)
+    assert parse_text(text) == parse_text("\n".join("\n".join(p) for p in pages))
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de ShiftTable (pipeline/table.py): mismos resultados que la lista de DayEntities."""
+
+import dataclasses
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline import windows
+from pipeline.entities import DayEntities, ParsedEmployee, ParsedShift
+from pipeline.normalize import _day_total_hours, day_total_hours_table, to_lucas_week
+from pipeline.relations import apply_shift_rules_batch
+from pipeline.table import ShiftTable
+
+DAYS = [
+    DayEntities("2026-02-09", [ParsedEmployee("Ana", 9.0), ParsedEmployee("Luis", 0.78)], [
+        ParsedShift("Camarero/a", 12, 0, 16, 0, employee_name="Ana"),
+        ParsedShift("Camarero/a", 20, 0, 1, 0, employee_name="Ana", max_hours_cap=8.0),
+        ParsedShift("Cocinero/a", 22, 30, 2, 0, crosses_midnight=True, employee_name="Pepe"),
+        ParsedShift("Descanso", 0, 0, 0, 0, is_rest_or_absence=True, employee_name="Luis"),
+        ParsedShift("Cocinero/a - MOLINA", 10, 0, 16, 0, is_other_establishment=True, employee_name="Pepe"),
+    ]),
+    DayEntities("2026-02-10", [], []),
+    DayEntities("2026-02-11", [], [ParsedShift("Manager", 10, 15, 13, 45, duration_hours=3.5)]),
+]
+
+
+def test_parsed_shift_is_slotted_and_frozen():
+    ps = DAYS[0].shifts[0]
+    assert not hasattr(ps, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        ps.role = "Manager"
+
+
+def test_table_roundtrip_and_same_results():
+    table = ShiftTable.from_day_entities(DAYS)
+    assert table.n_days == 3 and len(table) == 6
+    assert table.strings.count("Camarero/a") == 1  # textos internados
+    assert table.to_day_entities() == DAYS
+    assert day_total_hours_table(table) == [_day_total_hours(d) for d in DAYS]
+    assert to_lucas_week(table) == to_lucas_week(DAYS)
+    assert apply_shift_rules_batch(table, use_numpy=False) == apply_shift_rules_batch(DAYS)
+    if windows.np is not None:
+        assert apply_shift_rules_batch(table, use_numpy=True) == apply_shift_rules_batch(DAYS)
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Pruebas de la instrumentación por etapas (pipeline/timings.py)."""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pipeline.runner import parse_text
+from pipeline.timings import StageTimer, peak_rss_mb, stage
+
+TEXT = """
+Horarios de BETLEM del 09/02/2026 al 15/02/2026
+Lunes 9 febrero 	0h 	1h 	Total 	Firma
+Manager
+10:00 - 16:00
+Camarero/a
+16:00 - 20:00
+Martes 10 febrero 	0h 	1h 	Total 	Firma
+Camarero/a
+12:15 - 15:45
+"""
+
+
+def test_parse_text_records_stages_and_counts():
+    timer = StageTimer()
+    days = parse_text(TEXT, timer=timer)
+    meta = timer.to_dict()
+    assert list(meta["stages_ms"]) == ["segment", "entities", "aggregate"]
+    assert meta["counts"]["days"] == len(days) == 2
+    assert meta["counts"]["shifts"] == 3
+    assert meta["counts"]["lines"] == TEXT.count("\n") + 1
+    assert meta["total_ms"] >= sum(meta["stages_ms"].values()) - 0.1
+    rss = peak_rss_mb()
+    assert rss is None or rss > 0
+    # Sin timer el resultado es el mismo
+    assert parse_text(TEXT) == days
+
+
+def test_stage_accumulates_and_none_timer_is_noop():
+    timer = StageTimer()
+    for _ in range(3):
+        with stage(timer, "x"):
+            pass
+    timer.count("pages", 2)
+    timer.count("pages", 3)
+    assert set(timer.stages_ms) == {"x"} and timer.counts == {"pages": 5}
+    with stage(None, "y"):
+        pass
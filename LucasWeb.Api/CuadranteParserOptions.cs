@@ -10,4 +10,13 @@ public class CuadranteParserOptions
 
     /// <summary>Ruta absoluta a la carpeta LucasCuadranteParser (donde está main.py). Si está vacía se usa ..\LucasCuadranteParser respecto al ContentRootPath de la API.</summary>
     public string ParserProjectPath { get; set; } = "";
+
+    /// <summary>Páginas máximas que lee el parser (--max-pages). Un cuadrante semanal tiene 7; 0 = sin límite.</summary>
+    public int MaxPages { get; set; } = 62;
+
+    /// <summary>Segundos máximos por página (--page-timeout); una página más lenta se salta. 0 = sin límite.</summary>
+    public double PageTimeoutSeconds { get; set; } = 15;
+
+    /// <summary>Segundos máximos de la extracción de todo el PDF (--budget). 0 = sin límite.</summary>
+    public double BudgetSeconds { get; set; } = 90;
 }
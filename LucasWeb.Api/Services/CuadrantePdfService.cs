@@ -1,4 +1,5 @@
 using System.Diagnostics;
+using System.Globalization;
 using System.Text.Json;
 using LucasWeb.Api.DTOs;
 using Microsoft.AspNetCore.Hosting;
@@ -9,6 +10,9 @@ namespace LucasWeb.Api.Services;
 /// <summary>Invocación del parser Python LucasCuadranteParser para extraer datos del PDF de cuadrante. El parser devuelve por día: total_hours_worked y por turno (Mediodia, Tarde, Noche): staff_floor, staff_kitchen, hours_worked. Solo cuenta trabajo en BETLEM (excluye descansos y roles con " - ESTABLECIMIENTO", ej. Chef Operativo - MOLINA).</summary>
 public class CuadrantePdfService : ICuadrantePdfService
 {
+    /// <summary>Código de salida de main.py con un resultado parcial (EXIT_PARTIAL): páginas saltadas por los límites.</summary>
+    private const int ExitPartial = 3;
+
     private readonly CuadranteParserOptions _options;
     private readonly IWebHostEnvironment _env;
 
@@ -28,49 +32,62 @@ public class CuadrantePdfService : ICuadrantePdfService
         if (!File.Exists(mainPy))
             throw new InvalidOperationException($"No se encuentra main.py en {parserDir}.");
 
-        string tempPdfPath = Path.Combine(Path.GetTempPath(), "LucasCuadrante_" + Guid.NewGuid().ToString("N")[..8] + ".pdf");
-        string tempOutDir = Path.Combine(Path.GetTempPath(), "LucasCuadrante_" + Guid.NewGuid().ToString("N")[..8]);
-        try
+        // El PDF va por stdin y el JSON vuelve por stdout (main.py - --stdout): sin fichero
+        // temporal ni carpeta de salida. --compact: JSON sin sangría (menos bytes que leer).
+        // --no-entities: la API no re-agrega, no hace falta guardar entidades en .cache/entidades.
+        var psi = new ProcessStartInfo
         {
-            Directory.CreateDirectory(tempOutDir);
-            await using (var fs = File.Create(tempPdfPath))
-                await pdfStream.CopyToAsync(fs, cancellationToken);
-
-            var psi = new ProcessStartInfo
-            {
-                FileName = _options.PythonPath,
-                ArgumentList = { mainPy, tempPdfPath, "--output-dir", tempOutDir },
-                WorkingDirectory = parserDir,
-                RedirectStandardOutput = true,
-                RedirectStandardError = true,
-                UseShellExecute = false,
-                CreateNoWindow = true,
-            };
-
-            using var process = Process.Start(psi);
-            if (process == null)
-                throw new InvalidOperationException("No se pudo iniciar el proceso de Python.");
-
-            var stdout = await process.StandardOutput.ReadToEndAsync(cancellationToken);
-            var stderr = await process.StandardError.ReadToEndAsync(cancellationToken);
-            await process.WaitForExitAsync(cancellationToken);
+            FileName = _options.PythonPath,
+            ArgumentList = { mainPy, "-", "--stdout", "--compact", "--no-entities" },
+            WorkingDirectory = parserDir,
+            RedirectStandardInput = true,
+            RedirectStandardOutput = true,
+            RedirectStandardError = true,
+            UseShellExecute = false,
+            CreateNoWindow = true,
+        };
 
-            if (process.ExitCode != 0)
-                throw new InvalidOperationException($"El parser devolvió código {process.ExitCode}. " + (string.IsNullOrWhiteSpace(stderr) ? stdout : stderr));
+        // Límites de la extracción: un PDF enorme o malformado no deja colgada la importación
+        if (_options.MaxPages > 0)
+            psi.ArgumentList.Add("--max-pages=" + _options.MaxPages.ToString(CultureInfo.InvariantCulture));
+        if (_options.PageTimeoutSeconds > 0)
+            psi.ArgumentList.Add("--page-timeout=" + _options.PageTimeoutSeconds.ToString(CultureInfo.InvariantCulture));
+        if (_options.BudgetSeconds > 0)
+            psi.ArgumentList.Add("--budget=" + _options.BudgetSeconds.ToString(CultureInfo.InvariantCulture));
 
-            var jsonPath = Path.Combine(tempOutDir, "cuadrante_lucas.json");
-            if (!File.Exists(jsonPath))
-                throw new InvalidOperationException("El parser no generó cuadrante_lucas.json. " + stdout);
+        using var process = Process.Start(psi);
+        if (process == null)
+            throw new InvalidOperationException("No se pudo iniciar el proceso de Python.");
 
-            var json = await File.ReadAllTextAsync(jsonPath, cancellationToken);
-            var list = JsonSerializer.Deserialize<List<CuadranteDayDto>>(json);
-            return list ?? new List<CuadranteDayDto>();
+        // Leer stdout/stderr mientras se escribe stdin, para que ningún búfer de tubería se llene
+        var stdoutBuffer = new MemoryStream();
+        var stdoutTask = process.StandardOutput.BaseStream.CopyToAsync(stdoutBuffer, cancellationToken);
+        var stderrTask = process.StandardError.ReadToEndAsync(cancellationToken);
+        try
+        {
+            await using var stdin = process.StandardInput.BaseStream;
+            await pdfStream.CopyToAsync(stdin, cancellationToken);
         }
-        finally
+        catch (IOException)
         {
-            try { if (File.Exists(tempPdfPath)) File.Delete(tempPdfPath); } catch { }
-            try { if (Directory.Exists(tempOutDir)) Directory.Delete(tempOutDir, true); } catch { }
+            // El parser terminó antes de leer todo el PDF (tubería cerrada): el error sale en stderr
         }
+
+        await stdoutTask;
+        var stderr = await stderrTask;
+        await process.WaitForExitAsync(cancellationToken);
+
+        // Parcial: faltan días de la semana. No se importa, para no guardar personal y horas incompletos
+        if (process.ExitCode == ExitPartial)
+            throw new InvalidOperationException("El parser solo pudo leer parte del PDF (límites de páginas o de tiempo); no se importa un cuadrante incompleto. " + stderr);
+        if (process.ExitCode != 0)
+            throw new InvalidOperationException($"El parser devolvió código {process.ExitCode}. " + stderr);
+
+        stdoutBuffer.Position = 0;
+        if (stdoutBuffer.Length == 0)
+            throw new InvalidOperationException("El parser no devolvió JSON. " + stderr);
+        var list = await JsonSerializer.DeserializeAsync<List<CuadranteDayDto>>(stdoutBuffer, cancellationToken: cancellationToken);
+        return list ?? new List<CuadranteDayDto>();
     }
 
     private string GetParserProjectPath()